@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost, so ?profile=1 dumps cover the whole middleware stack.
+    'codechecker.instrumentation.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,6 +69,39 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Each CODECHECKER_* dict is read over the DEFAULT_* dict of the codechecker
+# module that uses it, so only values that differ from those defaults (or
+# come from the environment) belong here.
+
+CODECHECKER_GITHUB = {
+    'TOKEN': os.environ.get('GITHUB_TOKEN'),
+    'HTTP_CACHE_PATH': BASE_DIR / 'http_cache.sqlite3',
+}
+if os.environ.get('GITHUB_API_URL'):
+    CODECHECKER_GITHUB['API_URL'] = os.environ['GITHUB_API_URL']
+
+CODECHECKER_INSTRUMENTATION = {
+    'TRACEMALLOC': os.environ.get('CODECHECKER_TRACEMALLOC', '') == '1',
+    'PROFILE_DIR': os.environ.get('CODECHECKER_PROFILE_DIR'),
+}
+
+CODECHECKER_CODE_MODEL = {
+    'PATH': BASE_DIR / 'code_anomaly_model.joblib',
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Shared between processes: chart specs are registered by job and
+    # detector workers and rendered by whichever web worker is asked.
+    'charts': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'chart_cache',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
 
 TEMPLATES = [
     {
@@ -0,0 +1,119 @@
+import ast
+
+from .imports import ImportAnalysis, ImportRecord, ScopeCollector
+
+
+BRANCH_NODES = (ast.If, ast.IfExp, ast.For, ast.AsyncFor, ast.While, ast.Try, ast.With, ast.AsyncWith)
+
+
+class _ContextCollector(ScopeCollector):
+    """
+    Collect everything the detectors need from a module in one traversal.
+
+    The scope bookkeeping of the import analysis rides along on the same
+    walk, so the context never traverses the tree a second time for it.
+    """
+
+    def __init__(self, context):
+        super().__init__()
+        self.context = context
+
+    def _import(self, node):
+        for alias in node.names:
+            # Star imports have no binding to track, but still count as imports.
+            if alias.name == '*':
+                self.context.imports.append(ImportRecord(node, alias))
+        first = len(self.records)
+        super()._import(node)
+        self.context.imports.extend(self.records[first:])
+
+    visit_Import = _import
+    visit_ImportFrom = _import
+
+    def visit_Name(self, node):
+        self.context.used_names.add(node.id)
+        super().visit_Name(node)
+
+    def visit_Attribute(self, node):
+        value = node
+        while isinstance(value, ast.Attribute):
+            value = value.value
+        if isinstance(value, ast.Name):
+            self.context.used_names.add(value.id)
+        super().visit_Attribute(node)
+
+    def visit_FunctionDef(self, node):
+        self.context.functions.append(node)
+        super().visit_FunctionDef(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node):
+        self.context.classes.append(node)
+        super().visit_ClassDef(node)
+
+    def generic_visit(self, node):
+        if isinstance(node, BRANCH_NODES):
+            self.context.branch_count += 1
+            if getattr(node, 'orelse', None):
+                self.context.branch_count += 1
+        super().generic_visit(node)
+
+
+class AnalysisContext:
+    """
+    Parsed view of a code snippet shared by every detector of a request.
+
+    The source is parsed once and walked once; detectors read the collected
+    imports, names, definitions, branch counts, import usage and line
+    metrics from here instead of re-parsing or re-scanning the raw string.
+    """
+
+    def __init__(self, code, tree=None):
+        self.code = code
+        self.lines = code.split('\n')
+        self.tree = tree if tree is not None else ast.parse(code)
+
+        self.imports = []
+        self.used_names = set()
+        self.functions = []
+        self.classes = []
+        self.branch_count = 0
+
+        collector = _ContextCollector(self)
+        collector.visit(self.tree)
+        self.import_analysis = ImportAnalysis(collector)
+
+    @property
+    def line_count(self):
+        return len(self.lines)
+
+    @property
+    def avg_line_length(self):
+        if not self.lines:
+            return 0
+        return sum(len(line) for line in self.lines) / len(self.lines)
+
+    @property
+    def import_count(self):
+        return len({id(record.node) for record in self.imports})
+
+    @property
+    def function_count(self):
+        return len(self.functions)
+
+    def unused_imports(self):
+        """
+        Import records that no name, attribute chain, __all__ entry or string annotation uses.
+        """
+        return self.import_analysis.unused
+
+
+def build_context(code, tree=None):
+    """
+    Build an AnalysisContext, returning None when the code does not parse.
+    """
+    try:
+        return AnalysisContext(code, tree=tree)
+    except (SyntaxError, ValueError):
+        return None
@@ -0,0 +1,249 @@
+import asyncio
+import base64
+import itertools
+import math
+import weakref
+from collections import Counter
+
+import httpx
+from django.conf import settings
+
+from .github import DEFAULT_GITHUB, parse_repo_url
+from .http_cache import HttpCache
+from .ml_model import commits_request, count_commits_per_day, filter_repo_tree, summarize_repo_data
+
+# Connections per httpx pool; larger budgets are split across several pools.
+CONNECTIONS_PER_POOL = 16
+
+
+class AsyncGitHubClient:
+    """
+    Non-blocking access to the GitHub REST API over a pooled httpx.AsyncClient.
+
+    The async counterpart of GitHubClient for views running under ASGI: a
+    request waiting on GitHub costs a suspended coroutine rather than a
+    worker thread, so one process can keep hundreds of scans in flight.
+    max_connections caps the sockets open across all of them, and
+    max_workers caps how many downloads a single scan fans out at once.
+    """
+
+    def __init__(self, api_url=DEFAULT_GITHUB['API_URL'], token=None,
+                 max_workers=DEFAULT_GITHUB['MAX_WORKERS'], max_connections=DEFAULT_GITHUB['MAX_CONNECTIONS'],
+                 timeout=DEFAULT_GITHUB['TIMEOUT'], http_cache=None, transport=None):
+        self.api_url = api_url.rstrip('/')
+        self.max_workers = max_workers
+        self.http_cache = http_cache
+
+        headers = {'Accept': 'application/vnd.github+json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        # httpcore rescans every connection of a pool whenever a request
+        # starts or finishes, which turns quadratic past a few dozen sockets;
+        # several small pools keep each scan short. Requests wait for a free
+        # connection on a semaphore rather than in httpcore's queue, which is
+        # walked the same way.
+        shards = max(1, math.ceil(max_connections / CONNECTIONS_PER_POOL))
+        self.pools = []
+        for _ in range(shards):
+            size = math.ceil(max_connections / shards)
+            client = httpx.AsyncClient(
+                headers=headers,
+                timeout=timeout,
+                limits=httpx.Limits(max_connections=size, max_keepalive_connections=size),
+                follow_redirects=True,
+                transport=transport,
+            )
+            self.pools.append((client, asyncio.Semaphore(size)))
+        self._next_pool = itertools.cycle(self.pools)
+
+    def repo_api_url(self, owner, repo, suffix=''):
+        return f'{self.api_url}/repos/{owner}/{repo}{suffix}'
+
+    async def get(self, url, params=None):
+        request = self.build_request(url, params)
+        cache_url = str(request.url) if self.http_cache is not None else None
+        if cache_url is not None:
+            # The cache is SQLite; keep its (short) blocking calls off the event loop.
+            request.headers.update(await asyncio.to_thread(self.http_cache.conditional_headers, cache_url))
+
+        response = await self.send(request)
+
+        if cache_url is not None:
+            if response.status_code == 304:
+                entry = await asyncio.to_thread(self.http_cache.cached, cache_url)
+                if entry is not None:
+                    headers, body = entry
+                    return httpx.Response(200, headers=headers, content=body, request=request)
+            elif response.status_code == 200:
+                await asyncio.to_thread(self.http_cache.store, cache_url, response)
+        response.raise_for_status()
+        return response
+
+    def build_request(self, url, params=None):
+        # Every pool sends the same headers, so any of them can build the request.
+        return self.pools[0][0].build_request('GET', url, params=params)
+
+    async def send(self, request):
+        client, slots = next(self._next_pool)
+        async with slots:
+            return await client.send(request)
+
+    async def get_json(self, url, params=None):
+        return (await self.get(url, params=params)).json()
+
+    async def iter_pages(self, url, params=None, max_pages=None):
+        """
+        Lazily yield each page (a list of items) of a paginated listing, following Link rel="next".
+        """
+        pages = 0
+        while url and (max_pages is None or pages < max_pages):
+            response = await self.get(url, params=params)
+            pages += 1
+            yield response.json()
+            # The next URL already carries the query string.
+            url = response.links.get('next', {}).get('url')
+            params = None
+
+    async def get_tree(self, owner, repo, ref='HEAD'):
+        return await self.get_json(self.repo_api_url(owner, repo, f'/git/trees/{ref}'), params={'recursive': '1'})
+
+    async def iter_blobs(self, owner, repo, shas):
+        """
+        Fetch blob contents by SHA, at most max_workers at a time, yielding (sha, bytes) as each completes.
+        """
+        async def fetch(sha):
+            response = await self.send(self.build_request(self.repo_api_url(owner, repo, f'/git/blobs/{sha}')))
+            response.raise_for_status()
+            return sha, base64.b64decode(response.json()['content'])
+
+        async for item in self._as_completed(fetch, shas):
+            yield item
+
+    async def iter_downloads(self, urls):
+        """
+        Download text bodies, at most max_workers at a time, yielding (url, text) as each completes.
+        """
+        async def fetch(url):
+            response = await self.get(url)
+            return url, response.text
+
+        async for item in self._as_completed(fetch, urls):
+            yield item
+
+    async def _as_completed(self, fetch, items):
+        """
+        Run fetch over items with at most max_workers calls in flight, yielding each result as it completes.
+
+        The next item only becomes a task once one has finished, and
+        finished tasks are dropped once their result is yielded.
+        """
+        items = iter(items)
+        pending = {asyncio.ensure_future(fetch(item)) for item in itertools.islice(items, self.max_workers)}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                pending.update(asyncio.ensure_future(fetch(item)) for item in itertools.islice(items, len(done)))
+                for task in done:
+                    yield task.result()
+        finally:
+            # A consumer that stops early (or fails) must not leave downloads running.
+            for task in pending:
+                task.cancel()
+
+    async def aclose(self):
+        for client, _ in self.pools:
+            await client.aclose()
+
+
+# One client per event loop: httpx connections belong to the loop that opened them.
+_clients = weakref.WeakKeyDictionary()
+
+
+async def _close_with_loop(client):
+    """
+    Stay suspended for the life of the event loop and close the client (and its HTTP cache) when it shuts down.
+
+    asyncio.run (which asgiref also uses for the loops it starts) closes
+    every suspended async generator before closing the loop.
+    """
+    try:
+        yield
+    finally:
+        await client.aclose()
+        if client.http_cache is not None:
+            client.http_cache.close()
+
+
+async def get_async_github_client():
+    """
+    Return the AsyncGitHubClient of the running event loop, configured from CODECHECKER_GITHUB.
+
+    The client lives as long as its loop and is closed when the loop shuts
+    down. Under ASGI there is one loop per process, so every request shares
+    the client's connection pool for the life of the process. Async views
+    served by WSGI run each request in a loop of its own and so get a
+    client of their own, closed with that loop.
+    """
+    loop = asyncio.get_running_loop()
+    entry = _clients.get(loop)
+    if entry is None:
+        options = {**DEFAULT_GITHUB, **getattr(settings, 'CODECHECKER_GITHUB', {})}
+        http_cache = HttpCache(options['HTTP_CACHE_PATH']) if options['HTTP_CACHE_PATH'] else None
+        client = AsyncGitHubClient(
+            api_url=options['API_URL'],
+            token=options['TOKEN'],
+            max_workers=options['MAX_WORKERS'],
+            max_connections=options['MAX_CONNECTIONS'],
+            timeout=options['TIMEOUT'],
+            http_cache=http_cache,
+        )
+        entry = _clients[loop] = (client, _close_with_loop(client))
+        await anext(entry[1])
+    return entry[0]
+
+
+async def fetch_repo_summary(repo_url, client):
+    owner, repo = parse_repo_url(repo_url)
+    try:
+        return summarize_repo_data(repo_url, await client.get_json(client.repo_api_url(owner, repo)))
+    except httpx.HTTPError as e:
+        raise ValueError(f"Error fetching repository data: {e}")
+
+
+async def fetch_repo_tree(repo_url, client, ref='HEAD'):
+    """
+    The repository's filtered git tree as (tree_sha, {path: blob_sha}, truncated).
+    """
+    owner, repo = parse_repo_url(repo_url)
+    try:
+        return filter_repo_tree(await client.get_tree(owner, repo, ref))
+    except httpx.HTTPError as e:
+        raise ValueError(f"Error fetching repository tree: {e}")
+
+
+async def fetch_repo_files(repo_url, client):
+    """
+    The top-level files of a repository with their blob SHAs and download URLs.
+    """
+    owner, repo = parse_repo_url(repo_url)
+    try:
+        contents = await client.get_json(client.repo_api_url(owner, repo, '/contents'))
+    except httpx.HTTPError as e:
+        raise ValueError(f"Error fetching repository contents: {e}")
+    return [item for item in contents if item['type'] == 'file']
+
+
+async def count_commits(repo_url, client, since=None, until=None, max_pages=None):
+    """
+    Commits per day, counted one page at a time as the pages arrive.
+    """
+    owner, repo, params, max_pages = commits_request(repo_url, since, until, max_pages)
+    counts = Counter()
+    try:
+        async for page in client.iter_pages(client.repo_api_url(owner, repo, '/commits'), params, max_pages):
+            counts.update(count_commits_per_day(page))
+    except httpx.HTTPStatusError as e:
+        raise ValueError(f"Error fetching commits: {e.response.status_code} Client Error")
+    except httpx.HTTPError as e:
+        raise ValueError(f"Error fetching commits: {e}")
+    return dict(counts)
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import CodeSnippet, AnalysisResult, BlobAnalysis
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a detector changes its output so stale cached results are
+# never served for the new pipeline.
+ANALYZER_VERSION = '8'
+
+# SQLite caps the number of bound parameters per query.
+SHA_LOOKUP_BATCH = 500
+
+DEFAULT_RESULT_CACHE = {
+    'MAX_ENTRIES': 1024,
+    'PERSISTENT': True,
+}
+
+
+def code_digest(code, version=ANALYZER_VERSION):
+    """
+    Content address of a submission: sha256 over the analyzer version and the code.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(version.encode('utf-8'))
+    hasher.update(b'\0')
+    hasher.update(code.encode('utf-8'))
+    return hasher.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache of /check/ results keyed by code digest.
+
+    The first tier is a bounded in-memory LRU local to the worker process.
+    The optional second tier stores results as CodeSnippet/AnalysisResult
+    rows so they survive restarts and are shared between workers.
+    """
+
+    def __init__(self, max_entries=1024, persistent=True):
+        self.max_entries = max_entries
+        self.persistent = persistent
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        result = self._load_persistent(key) if self.persistent else None
+
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.persistent_hits += 1
+            self._remember(key, result)
+        return result
+
+    def set(self, key, code, result):
+        with self._lock:
+            self._remember(key, result)
+        if self.persistent:
+            self._store_persistent(key, code, result)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.persistent_hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.persistent_hits + self.misses
+            return {
+                'analyzer_version': ANALYZER_VERSION,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'persistent': self.persistent,
+                'hits': self.hits,
+                'persistent_hits': self.persistent_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': (self.hits + self.persistent_hits) / lookups if lookups else 0.0,
+            }
+
+    def _remember(self, key, result):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _load_persistent(self, key):
+        try:
+            analysis = (
+                AnalysisResult.objects
+                .filter(snippet__code_hash=key)
+                .order_by('-created_at')
+                .values_list('analysis', flat=True)
+                .first()
+            )
+        except DatabaseError as e:
+            logger.warning("Result cache lookup failed: %s", e)
+            return None
+        return json.loads(analysis) if analysis is not None else None
+
+    def _store_persistent(self, key, code, result):
+        try:
+            with transaction.atomic():
+                snippet, _ = CodeSnippet.objects.get_or_create(
+                    code_hash=key,
+                    defaults={'code': code, 'result': result.get('result', '')},
+                )
+                AnalysisResult.objects.create(
+                    snippet=snippet,
+                    analysis=json.dumps(result, cls=JSONEncoder),
+                )
+        except DatabaseError as e:
+            logger.warning("Result cache store failed: %s", e)
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """
+    Return the process-wide result cache, configured from CODECHECKER_RESULT_CACHE.
+    """
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                options = {**DEFAULT_RESULT_CACHE, **getattr(settings, 'CODECHECKER_RESULT_CACHE', {})}
+                _result_cache = ResultCache(
+                    max_entries=options['MAX_ENTRIES'],
+                    persistent=options['PERSISTENT'],
+                )
+    return _result_cache
+
+
+def load_blob_analyses(shas):
+    """
+    Stored per-file analyses for the given git blob SHAs under the current analyzer version.
+    """
+    shas = list(dict.fromkeys(shas))
+    analyses = {}
+    try:
+        for start in range(0, len(shas), SHA_LOOKUP_BATCH):
+            rows = BlobAnalysis.objects.filter(
+                sha__in=shas[start:start + SHA_LOOKUP_BATCH],
+                analyzer_version=ANALYZER_VERSION,
+            ).values_list('sha', 'analysis')
+            analyses.update((sha, json.loads(analysis)) for sha, analysis in rows)
+    except DatabaseError as e:
+        logger.warning("Blob analysis lookup failed: %s", e)
+    return analyses
+
+
+def store_blob_analysis(sha, analysis):
+    """
+    Remember the analysis of a blob so unchanged files are never analyzed twice.
+    """
+    try:
+        BlobAnalysis.objects.update_or_create(
+            sha=sha,
+            analyzer_version=ANALYZER_VERSION,
+            defaults={'analysis': json.dumps(analysis, cls=JSONEncoder)},
+        )
+    except DatabaseError as e:
+        logger.warning("Blob analysis store failed: %s", e)
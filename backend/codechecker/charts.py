@@ -0,0 +1,221 @@
+import hashlib
+import io
+import json
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+from django.urls import reverse
+
+from .instrumentation import stage
+from .lazy import lazy_module
+
+matplotlib_figure = lazy_module('matplotlib.figure')
+sns = lazy_module('seaborn')
+
+# Bump whenever a renderer changes its drawing so old images are not served for new specs.
+CHART_VERSION = '1'
+
+DEFAULT_CHARTS = {
+    'CACHE': 'charts',
+    'TIMEOUT': 7 * 24 * 3600,
+    'MAX_POINTS': 20_000,
+    'DPI': 100,
+}
+
+CHART_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+
+def _options():
+    return {**DEFAULT_CHARTS, **getattr(settings, 'CODECHECKER_CHARTS', {})}
+
+
+def get_chart_cache():
+    """
+    Cache holding chart specs and rendered images.
+
+    It should be shared between processes (file, database or memcached
+    backend) because specs are often registered in a job or stage worker
+    and rendered in a web worker.
+    """
+    try:
+        return caches[_options()['CACHE']]
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+def chart_id(kind, data):
+    """
+    Content address of a chart: sha256 over the renderer version, kind and data.
+    """
+    payload = json.dumps([CHART_VERSION, kind, data], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def chart_spec(kind, data):
+    """
+    The data needed to draw a chart, as stored in the chart cache.
+    """
+    if kind not in CHART_RENDERERS:
+        raise ValueError(f'Unknown chart kind: {kind}')
+    return {'kind': kind, 'data': data}
+
+
+def register_spec(spec):
+    """
+    Store a chart spec and return the URL path it is served from.
+
+    Nothing is drawn here; the image is rendered the first time a client
+    requests it and cached under the same content hash. Registering a spec
+    again refreshes its expiry, so callers that keep a spec longer than the
+    chart cache (e.g. cached /check/ results) register it again before
+    handing out its URL.
+    """
+    identifier = chart_id(spec['kind'], spec['data'])
+    get_chart_cache().set(f'codechecker:chart-spec:{identifier}', spec, _options()['TIMEOUT'])
+    return reverse('chart', kwargs={'chart_id': identifier, 'fmt': 'png'})
+
+
+def register_chart(kind, data):
+    """
+    Store the data needed to draw a chart and return the URL path it is served from.
+    """
+    return register_spec(chart_spec(kind, data))
+
+
+def render_chart(identifier, fmt):
+    """
+    Image bytes of a registered chart in the given format, or None if the spec is unknown or expired.
+    """
+    options = _options()
+    cache = get_chart_cache()
+    image_key = f'codechecker:chart-image:{identifier}:{fmt}'
+    image = cache.get(image_key)
+    if image is not None:
+        return image
+
+    spec = cache.get(f'codechecker:chart-spec:{identifier}')
+    if spec is None:
+        return None
+
+    kind = CHART_RENDERERS[spec['kind']]
+    with stage(f"chart.draw.{spec['kind']}"):
+        figure = matplotlib_figure.Figure(figsize=kind['figsize'], dpi=options['DPI'])
+        kind['draw'](figure, spec['data'])
+    with stage(f'chart.encode.{fmt}'):
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format=fmt)
+        image = buffer.getvalue()
+
+    cache.set(image_key, image, options['TIMEOUT'])
+    return image
+
+
+def downsample(num_points, max_points=None):
+    """
+    Sorted indices of at most max_points evenly spaced points out of num_points.
+    """
+    max_points = max_points or _options()['MAX_POINTS']
+    if num_points <= max_points:
+        return np.arange(num_points)
+    return np.unique(np.linspace(0, num_points - 1, max_points).astype(np.int64))
+
+
+def _rounded(values):
+    return np.round(np.asarray(values, dtype=np.float64), 4).tolist()
+
+
+def anomaly_chart_data(values, anomalies, model_name):
+    """
+    Spec for the per-row anomaly scatter; large inputs are thinned to MAX_POINTS.
+    """
+    anomalies = np.asarray(anomalies, dtype=np.int64)
+    shown = downsample(len(values))
+    shown_anomalies = anomalies[downsample(len(anomalies))]
+    return {
+        'title': f'{model_name} Anomaly Detection',
+        'index': shown.tolist(),
+        'values': _rounded(values[shown]),
+        'anomaly_index': shown_anomalies.tolist(),
+        'anomaly_values': _rounded(values[shown_anomalies]),
+    }
+
+
+def cluster_chart_data(features, labels):
+    shown = downsample(len(features))
+    return {
+        'x': _rounded(features[shown, 0]),
+        'y': _rounded(features[shown, 1] if features.shape[1] > 1 else np.zeros(len(shown))),
+        'labels': np.asarray(labels)[shown].tolist(),
+    }
+
+
+def _draw_keyword_distribution(figure, data):
+    ax = figure.subplots()
+    ax.bar(data['labels'], data['data'], width=0.6)
+    ax.set_xlabel('Keywords')
+    ax.set_ylabel('Frequency')
+    ax.set_title('Keyword Distribution')
+    ax.set_xticks(range(len(data['labels'])))
+    ax.set_xticklabels(data['labels'], rotation=45, ha='right')
+    figure.tight_layout()
+
+
+def _draw_clone_heatmap(figure, data):
+    ax = figure.subplots()
+    sns.heatmap(np.asarray(data['matrix']), annot=True, cmap='YlGnBu', fmt='.2f', ax=ax)
+    ax.set_title('Code Clones Similarity Heatmap')
+    ax.set_xlabel('Code Snippets')
+    ax.set_ylabel('Code Snippets')
+    figure.tight_layout()
+
+
+def _draw_commit_counts(figure, data):
+    ax = figure.subplots()
+    ax.bar(data['dates'], data['counts'])
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Number of Commits')
+    ax.set_title('Number of Commits per Day')
+    ax.tick_params(axis='x', labelrotation=45)
+
+
+def _draw_anomalies(figure, data):
+    ax = figure.subplots()
+    ax.scatter(data['index'], data['values'], c='blue', label='Normal')
+    ax.scatter(data['anomaly_index'], data['anomaly_values'], c='red', label='Anomaly')
+    ax.set_title(data['title'])
+    ax.set_xlabel('Index')
+    ax.set_ylabel('Feature Value')
+    ax.legend()
+    ax.grid(True)
+
+
+def _draw_clusters(figure, data):
+    ax = figure.subplots()
+    scatter = ax.scatter(data['x'], data['y'], c=data['labels'], cmap='viridis')
+    figure.colorbar(scatter, ax=ax, label='Cluster Label')
+    ax.set_title('KMeans Clustering')
+    ax.set_xlabel('Feature 1')
+    ax.set_ylabel('Feature 2')
+
+
+def _draw_shap_summary(figure, data):
+    # Same reading as shap.summary_plot(plot_type="bar"): features ranked by mean |SHAP value|.
+    order = np.argsort(data['mean_abs'])
+    ax = figure.subplots()
+    ax.barh([data['feature_names'][i] for i in order], [data['mean_abs'][i] for i in order], color='#1E88E5')
+    ax.set_xlabel('mean(|SHAP value|) (average impact on model output magnitude)')
+    figure.tight_layout()
+
+
+CHART_RENDERERS = {
+    'keyword_distribution': {'draw': _draw_keyword_distribution, 'figsize': (14, 8)},
+    'clone_heatmap': {'draw': _draw_clone_heatmap, 'figsize': (10, 8)},
+    'commit_counts': {'draw': _draw_commit_counts, 'figsize': (10, 6)},
+    'anomalies': {'draw': _draw_anomalies, 'figsize': (10, 6)},
+    'clusters': {'draw': _draw_clusters, 'figsize': (10, 6)},
+    'shap_summary': {'draw': _draw_shap_summary, 'figsize': (8, 6)},
+}
@@ -0,0 +1,52 @@
+import numpy as np
+
+from .lazy import lazy_module
+
+sparse = lazy_module('scipy.sparse')
+sklearn_preprocessing = lazy_module('sklearn.preprocessing')
+
+# Upper bound on similarity products held at once (about 64 MB as CSR).
+DEFAULT_MAX_PRODUCTS = 2 ** 23
+
+
+def similar_pairs(embeddings, threshold=0.9, block_size=None, max_products=DEFAULT_MAX_PRODUCTS):
+    """
+    Find every pair of rows whose cosine similarity exceeds the threshold.
+
+    The similarity matrix is never materialised: rows are processed in
+    blocks and each block is multiplied only against itself and the rows
+    after it, so the upper triangle is computed once. Unless given
+    explicitly, the block size is chosen so a block never holds more than
+    max_products similarities, which keeps peak memory flat as N grows.
+
+    Returns three arrays (rows, cols, similarities) with rows < cols.
+    """
+    X = sklearn_preprocessing.normalize(sparse.csr_matrix(embeddings, dtype=np.float32), norm='l2', copy=False)
+    num_rows = X.shape[0]
+    if block_size is None:
+        block_size = max(1, min(num_rows, max_products // max(num_rows, 1)))
+
+    row_parts, col_parts, sim_parts = [], [], []
+    for start in range(0, num_rows, block_size):
+        end = min(start + block_size, num_rows)
+        block = (X[start:end] @ X[start:].T).tocsr()
+
+        # Threshold first so row indices are only expanded for the survivors.
+        positions = np.flatnonzero(block.data > threshold)
+        rows = np.searchsorted(block.indptr, positions, side='right') - 1
+        cols = block.indices[positions]
+        keep = cols > rows
+        row_parts.append(rows[keep].astype(np.int64) + start)
+        col_parts.append(cols[keep].astype(np.int64) + start)
+        sim_parts.append(block.data[positions[keep]])
+        del block
+
+    if not row_parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+    rows = np.concatenate(row_parts)
+    cols = np.concatenate(col_parts)
+    similarities = np.minimum(np.concatenate(sim_parts), 1.0)
+
+    order = np.lexsort((cols, rows))
+    return rows[order], cols[order], similarities[order]
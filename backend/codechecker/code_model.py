@@ -0,0 +1,144 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .lazy import lazy_module
+
+joblib = lazy_module('joblib')
+sklearn_ensemble = lazy_module('sklearn.ensemble')
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the feature vector changes so models trained on the old layout are rejected.
+FEATURE_VERSION = 1
+FEATURE_NAMES = ('line_count', 'avg_line_length', 'import_count', 'function_count')
+
+DEFAULT_CODE_MODEL = {
+    'PATH': None,
+    'CONTAMINATION': 0.1,
+    'N_ESTIMATORS': 200,
+    # Seconds between checks of the model file's mtime for hot reload.
+    'RELOAD_INTERVAL': 5,
+}
+
+
+def code_model_options():
+    return {**DEFAULT_CODE_MODEL, **getattr(settings, 'CODECHECKER_CODE_MODEL', {})}
+
+
+class CodeAnomalyModel:
+    """
+    An IsolationForest fitted offline over a reference corpus, with the metadata saved next to it.
+    """
+
+    def __init__(self, estimator, version, trained_at, num_samples, feature_version=FEATURE_VERSION):
+        self.estimator = estimator
+        self.version = version
+        self.trained_at = trained_at
+        self.num_samples = num_samples
+        self.feature_version = feature_version
+
+    @classmethod
+    def fit(cls, features, contamination=0.1, n_estimators=200):
+        estimator = sklearn_ensemble.IsolationForest(contamination=contamination, n_estimators=n_estimators, random_state=0)
+        estimator.fit(np.asarray(features, dtype=np.float64))
+        return cls(estimator, uuid.uuid4().hex[:12], timezone.now().isoformat(), len(features))
+
+    def score(self, features):
+        """
+        decision_function over a (n, 4) feature matrix; negative scores are anomalies.
+        """
+        return self.estimator.decision_function(np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURE_NAMES)))
+
+    def save(self, path):
+        """
+        Write the model atomically so a worker reloading it never sees a partial file.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False) as target:
+            joblib.dump({
+                'estimator': self.estimator,
+                'version': self.version,
+                'trained_at': self.trained_at,
+                'num_samples': self.num_samples,
+                'feature_version': self.feature_version,
+                'feature_names': FEATURE_NAMES,
+            }, target)
+        os.replace(target.name, path)
+
+    @classmethod
+    def load(cls, path):
+        bundle = joblib.load(path)
+        if bundle.get('feature_version') != FEATURE_VERSION:
+            raise ValueError(
+                f"Model at {path} was trained on feature version {bundle.get('feature_version')}, "
+                f"expected {FEATURE_VERSION}; retrain it with manage.py train_code_model."
+            )
+        return cls(bundle['estimator'], bundle['version'], bundle['trained_at'], bundle['num_samples'])
+
+
+class _ModelSlot:
+    """
+    Per-process holder that loads the model on first use and reloads it when the file changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._model = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._missing_logged = False
+
+    def get(self):
+        options = code_model_options()
+        path = options['PATH']
+        now = time.monotonic()
+        if not path or (self._checked_at and now - self._checked_at < options['RELOAD_INTERVAL']):
+            return self._model
+
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                if not self._missing_logged:
+                    logger.warning("No code anomaly model at %s; run manage.py train_code_model.", path)
+                    self._missing_logged = True
+                self._model, self._mtime = None, None
+                return None
+
+            if mtime != self._mtime:
+                try:
+                    self._model = CodeAnomalyModel.load(path)
+                except Exception:
+                    logger.exception("Could not load code anomaly model from %s", path)
+                else:
+                    logger.info("Loaded code anomaly model %s from %s", self._model.version, path)
+                self._mtime = mtime
+                self._missing_logged = False
+            return self._model
+
+
+_slot = _ModelSlot()
+
+
+def get_code_model():
+    """
+    Return the current code anomaly model of this process, or None if none has been trained.
+    """
+    return _slot.get()
+
+
+def code_model_version():
+    """
+    Version tag of the loaded model, folded into result cache keys.
+    """
+    model = get_code_model()
+    return model.version if model is not None else 'none'
@@ -0,0 +1,69 @@
+from django.conf import settings
+
+from .lazy import lazy_module
+
+sklearn_cluster = lazy_module('sklearn.cluster')
+sklearn_ensemble = lazy_module('sklearn.ensemble')
+sklearn_kernel_approximation = lazy_module('sklearn.kernel_approximation')
+sklearn_linear_model = lazy_module('sklearn.linear_model')
+sklearn_pipeline = lazy_module('sklearn.pipeline')
+sklearn_svm = lazy_module('sklearn.svm')
+
+DEFAULT_LARGE_DATA = {
+    'ISO_FOREST_ROWS': 50_000,
+    'SVM_ROWS': 10_000,
+    'KMEANS_ROWS': 50_000,
+    'ISO_FOREST_MAX_SAMPLES': 256,
+    'NYSTROEM_COMPONENTS': 300,
+    'MINIBATCH_SIZE': 4096,
+}
+
+SVM_NU = 0.1
+SVM_GAMMA = 0.1
+CONTAMINATION = 0.1
+N_CLUSTERS = 3
+
+
+def _options():
+    return {**DEFAULT_LARGE_DATA, **getattr(settings, 'CODECHECKER_LARGE_DATA', {})}
+
+
+def make_iso_forest(num_rows, options=None):
+    """
+    IsolationForest for the dataset check; large inputs fit in parallel on small subsamples per tree.
+    """
+    options = options or _options()
+    if num_rows > options['ISO_FOREST_ROWS']:
+        model = sklearn_ensemble.IsolationForest(
+            contamination=CONTAMINATION,
+            max_samples=options['ISO_FOREST_MAX_SAMPLES'],
+            n_jobs=-1,
+        )
+        return model, 'isolation-forest-subsampled'
+    return sklearn_ensemble.IsolationForest(contamination=CONTAMINATION), 'isolation-forest'
+
+
+def make_svm(num_rows, options=None):
+    """
+    One-Class SVM; above the threshold the O(n^2) RBF kernel is replaced by a
+    Nystroem feature map feeding a linear SGD one-class SVM.
+    """
+    options = options or _options()
+    if num_rows > options['SVM_ROWS']:
+        model = sklearn_pipeline.make_pipeline(
+            sklearn_kernel_approximation.Nystroem(gamma=SVM_GAMMA, n_components=min(options['NYSTROEM_COMPONENTS'], num_rows), random_state=0),
+            sklearn_linear_model.SGDOneClassSVM(nu=SVM_NU, random_state=0),
+        )
+        return model, 'nystroem-sgd-one-class-svm'
+    return sklearn_svm.OneClassSVM(nu=SVM_NU, kernel="rbf", gamma=SVM_GAMMA), 'one-class-svm'
+
+
+def make_kmeans(num_rows, options=None):
+    """
+    KMeans for the cluster chart; MiniBatchKMeans above the threshold.
+    """
+    options = options or _options()
+    if num_rows > options['KMEANS_ROWS']:
+        model = sklearn_cluster.MiniBatchKMeans(n_clusters=N_CLUSTERS, batch_size=options['MINIBATCH_SIZE'], random_state=0)
+        return model, 'minibatch-kmeans'
+    return sklearn_cluster.KMeans(n_clusters=N_CLUSTERS), 'kmeans'
@@ -0,0 +1,143 @@
+import ast
+import hashlib
+from collections import defaultdict, namedtuple
+
+from .analysis import AnalysisContext
+
+# Definitions smaller than this are too generic (``def f(): pass``) to be
+# reported as clones of each other.
+DEFAULT_MIN_NODES = 12
+
+# Fields that carry no structure worth comparing.
+IGNORED_FIELDS = {'ctx', 'type_comment', 'kind'}
+
+Fingerprint = namedtuple('Fingerprint', ['digest', 'source', 'name', 'lineno', 'size'])
+
+
+class StructuralHasher:
+    """
+    Merkle-style hasher over an AST with identifiers and literals erased.
+
+    Every node's digest is derived from its type and its children's
+    digests, so two definitions hash equal exactly when they have the same
+    shape regardless of the names and constant values used in them. Digests
+    are memoised per node, so hashing a class and then its methods walks
+    each node once.
+    """
+
+    def __init__(self):
+        self._digests = {}
+        self._sizes = {}
+
+    def digest(self, node):
+        key = id(node)
+        if key not in self._digests:
+            self._digests[key], self._sizes[key] = self._hash(node)
+        return self._digests[key]
+
+    def size(self, node):
+        self.digest(node)
+        return self._sizes[id(node)]
+
+    def _hash(self, node):
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(type(node).__name__.encode())
+        size = 1
+
+        for field, value in ast.iter_fields(node):
+            if field in IGNORED_FIELDS:
+                continue
+            hasher.update(b'|' + field.encode() + b'=')
+            for item in value if isinstance(value, list) else [value]:
+                if isinstance(item, ast.AST):
+                    hasher.update(self.digest(item))
+                    size += self._sizes[id(item)]
+                elif isinstance(node, ast.Constant) and field == 'value':
+                    # Literals collapse to their type: 1 and 2 match, 1 and '1' do not.
+                    hasher.update(type(item).__name__.encode())
+                elif item is None:
+                    hasher.update(b'-')
+                else:
+                    # Identifiers (names, attributes, arguments, aliases) are erased.
+                    hasher.update(b'_')
+
+        return hasher.digest(), size
+
+
+def fingerprint_code(code, source=None, context=None, min_nodes=DEFAULT_MIN_NODES):
+    """
+    Structural fingerprints for every function and class defined in the code.
+    """
+    if context is None:
+        context = AnalysisContext(code)
+
+    hasher = StructuralHasher()
+    fingerprints = []
+    for node in context.classes + context.functions:
+        size = hasher.size(node)
+        if size >= min_nodes:
+            fingerprints.append(Fingerprint(hasher.digest(node).hex(), source, node.name, node.lineno, size))
+
+    fingerprints.sort(key=lambda fingerprint: fingerprint.lineno)
+    return fingerprints
+
+
+class FingerprintIndex:
+    """
+    Inverted index from structural digest to the definitions that produce it.
+
+    Sources can be added, replaced and removed one at a time, so the index is
+    maintained incrementally as files arrive and clone lookup is a dict probe
+    rather than a similarity computation over the whole corpus.
+    """
+
+    def __init__(self, min_nodes=DEFAULT_MIN_NODES):
+        self.min_nodes = min_nodes
+        self._postings = defaultdict(list)
+        self._sources = {}
+
+    def __len__(self):
+        return len(self._sources)
+
+    def __contains__(self, source):
+        return source in self._sources
+
+    def add(self, source, code=None, context=None, fingerprints=None):
+        """
+        Index (or re-index) a source; returns its fingerprints.
+        """
+        if fingerprints is None:
+            fingerprints = fingerprint_code(code, source=source, context=context, min_nodes=self.min_nodes)
+
+        self.remove(source)
+        self._sources[source] = fingerprints
+        for fingerprint in fingerprints:
+            self._postings[fingerprint.digest].append(fingerprint)
+        return fingerprints
+
+    def remove(self, source):
+        for fingerprint in self._sources.pop(source, []):
+            postings = self._postings[fingerprint.digest]
+            postings.remove(fingerprint)
+            if not postings:
+                del self._postings[fingerprint.digest]
+
+    def lookup(self, digest):
+        return list(self._postings.get(digest, []))
+
+    def matches_for(self, source):
+        """
+        Map each indexed definition of a source to its structural clones elsewhere.
+        """
+        matches = {}
+        for fingerprint in self._sources.get(source, []):
+            others = [other for other in self._postings[fingerprint.digest] if other is not fingerprint]
+            if others:
+                matches[fingerprint] = others
+        return matches
+
+    def clone_groups(self):
+        """
+        Every digest shared by more than one definition, with its members.
+        """
+        return {digest: list(postings) for digest, postings in self._postings.items() if len(postings) > 1}
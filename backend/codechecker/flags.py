@@ -0,0 +1,7 @@
+def is_truthy(value):
+    """
+    Interpret a JSON boolean or a form field ("1", "true", "yes", "on") as a flag.
+    """
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
@@ -0,0 +1,239 @@
+import base64
+import contextvars
+import hashlib
+import itertools
+import re
+import tarfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .http_cache import HttpCache
+
+DEFAULT_GITHUB = {
+    'API_URL': 'https://api.github.com',
+    'TOKEN': None,
+    'MAX_WORKERS': 8,
+    # Sockets the async client may hold open across all concurrent scans.
+    'MAX_CONNECTIONS': 100,
+    'TIMEOUT': 10,
+    'HTTP_CACHE_PATH': None,
+    'COMMIT_MAX_PAGES': 10,
+    'INGESTION': 'tree',
+    # Tree scans fetch changed blobs one request each; past this many, or
+    # on a repository's first scan, they read the tarball instead.
+    'TREE_MAX_BLOBS': 20,
+    'ARCHIVE_EXTENSIONS': ('.py',),
+    'ARCHIVE_MAX_FILE_SIZE': 1024 * 1024,
+}
+
+REPO_URL_PATTERN = re.compile(r'^https://github\.com/([^/]+)/([^/]+?)(?:\.git)?/?$', re.IGNORECASE)
+
+
+def parse_repo_url(repo_url):
+    """
+    Split a https://github.com/owner/repo URL into (owner, repo).
+    """
+    match = REPO_URL_PATTERN.match(repo_url or '')
+    if not match:
+        raise ValueError("Invalid GitHub URL. URL should be in the format 'https://github.com/owner/repo'.")
+    return match.groups()
+
+
+def git_blob_sha(data):
+    """
+    The SHA git assigns to a blob with these bytes, as listed by the GitHub API.
+    """
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+class GitHubClient:
+    """
+    Shared, connection-pooled access to the GitHub REST API.
+
+    One requests.Session is reused for every call so TCP/TLS connections are
+    kept alive, file downloads fan out over a bounded thread pool, and
+    independent API calls can be submitted to run side by side. The API base
+    URL is configurable so the client can be pointed at a local stub server.
+    When an HttpCache is attached, plain GETs are sent as conditional
+    requests and 304 answers are served from it.
+    """
+
+    def __init__(self, api_url=DEFAULT_GITHUB['API_URL'], token=None,
+                 max_workers=DEFAULT_GITHUB['MAX_WORKERS'], timeout=DEFAULT_GITHUB['TIMEOUT'], session=None,
+                 http_cache=None):
+        self.api_url = api_url.rstrip('/')
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.http_cache = http_cache
+
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers * 2)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Accept': 'application/vnd.github+json'})
+        if token:
+            self.session.headers['Authorization'] = f'Bearer {token}'
+
+        # Downloads and top-level calls use separate pools so a top-level task
+        # waiting on its downloads can never starve them of workers.
+        self._download_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='github-download')
+        self._task_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='github-task')
+
+    def repo_api_url(self, owner, repo, suffix=''):
+        return f'{self.api_url}/repos/{owner}/{repo}{suffix}'
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        cache_url = None
+        if self.http_cache is not None and not kwargs.get('stream'):
+            cache_url = requests.Request('GET', url, params=kwargs.get('params')).prepare().url
+            kwargs['headers'] = {**self.http_cache.conditional_headers(cache_url), **kwargs.get('headers', {})}
+
+        response = self.session.get(url, **kwargs)
+
+        if cache_url is not None:
+            if response.status_code == 304:
+                return self.http_cache.replay(cache_url, response)
+            if response.status_code == 200:
+                self.http_cache.store(cache_url, response)
+        response.raise_for_status()
+        return response
+
+    def get_json(self, url, **kwargs):
+        return self.get(url, **kwargs).json()
+
+    def iter_pages(self, url, params=None, max_pages=None):
+        """
+        Lazily yield the items of a paginated listing, following Link rel="next".
+
+        Only one page is held at a time; at most max_pages pages are fetched.
+        """
+        pages = 0
+        while url and (max_pages is None or pages < max_pages):
+            response = self.get(url, params=params)
+            pages += 1
+            yield from response.json()
+            # The next URL already carries the query string.
+            url = response.links.get('next', {}).get('url')
+            params = None
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Run an independent call (metadata, contents, commits...) in the background.
+
+        The call runs in a copy of the caller's context, so stages it runs
+        count towards the caller's request timings.
+        """
+        return self._task_executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+    def download_all(self, urls):
+        """
+        Download text bodies concurrently, at most max_workers at a time, preserving order.
+        """
+        return list(self._download_executor.map(lambda url: self.get(url).text, urls))
+
+    def iter_completed(self, fn, items):
+        """
+        Run fn over items on the download pool, yielding (item, result) as each call completes.
+
+        At most 2 * max_workers calls are in flight: another item is only
+        submitted once a result has been taken, and results are released as
+        they are yielded, so memory follows the consumer rather than the
+        number of items.
+        """
+        items = iter(items)
+        pending = {}
+        for item in itertools.islice(items, 2 * self.max_workers):
+            pending[self._download_executor.submit(fn, item)] = item
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                for following in itertools.islice(items, 1):
+                    pending[self._download_executor.submit(fn, following)] = following
+                yield item, future.result()
+
+    def iter_downloads(self, urls):
+        """
+        Download text bodies concurrently, yielding (url, text) as each one completes.
+        """
+        return self.iter_completed(lambda url: self.get(url).text, urls)
+
+    def get_tree(self, owner, repo, ref='HEAD'):
+        """
+        The recursive git tree of a ref: {'sha', 'tree': [{'path', 'type', 'sha', 'size'}, ...], 'truncated'}.
+
+        Sent as a conditional request, so an unchanged tree costs a 304.
+        """
+        return self.get_json(self.repo_api_url(owner, repo, f'/git/trees/{ref}'), params={'recursive': '1'})
+
+    def iter_blobs(self, owner, repo, shas):
+        """
+        Fetch blob contents by SHA concurrently, yielding (sha, bytes) as each one completes.
+
+        Blobs are immutable, so they bypass the HTTP cache; their analyses
+        are what gets stored.
+        """
+        return self.iter_completed(lambda sha: self._fetch_blob(owner, repo, sha), shas)
+
+    def _fetch_blob(self, owner, repo, sha):
+        response = self.session.get(self.repo_api_url(owner, repo, f'/git/blobs/{sha}'), timeout=self.timeout)
+        response.raise_for_status()
+        return base64.b64decode(response.json()['content'])
+
+    def iter_archive(self, owner, repo, ref='', extensions=DEFAULT_GITHUB['ARCHIVE_EXTENSIONS'],
+                     max_file_size=DEFAULT_GITHUB['ARCHIVE_MAX_FILE_SIZE']):
+        """
+        Stream (path, text, blob_sha) for every matching file in the repository tarball.
+
+        The archive is read straight off the socket with tarfile's streaming
+        mode, so nothing touches the disk and only one member is held in
+        memory at a time. Paths are relative to the repository root.
+        """
+        suffix = f'/tarball/{ref}' if ref else '/tarball'
+        extensions = tuple(extensions)
+        with self.session.get(self.repo_api_url(owner, repo, suffix), stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            with tarfile.open(fileobj=response.raw, mode='r|gz') as archive:
+                for member in archive:
+                    if not member.isfile() or member.size > max_file_size:
+                        continue
+                    # Members live under a single "<owner>-<repo>-<sha>/" directory.
+                    path = member.name.split('/', 1)[-1]
+                    if extensions and not path.endswith(extensions):
+                        continue
+                    data = archive.extractfile(member).read()
+                    yield path, data.decode('utf-8', errors='replace'), git_blob_sha(data)
+
+    def close(self):
+        self._download_executor.shutdown(wait=False)
+        self._task_executor.shutdown(wait=False)
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_github_client():
+    """
+    Return the process-wide GitHub client, configured from CODECHECKER_GITHUB.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                options = {**DEFAULT_GITHUB, **getattr(settings, 'CODECHECKER_GITHUB', {})}
+                http_cache = HttpCache(options['HTTP_CACHE_PATH']) if options['HTTP_CACHE_PATH'] else None
+                _client = GitHubClient(
+                    api_url=options['API_URL'],
+                    token=options['TOKEN'],
+                    max_workers=options['MAX_WORKERS'],
+                    timeout=options['TIMEOUT'],
+                    http_cache=http_cache,
+                )
+    return _client
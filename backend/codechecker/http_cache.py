@@ -0,0 +1,117 @@
+import json
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Headers replayed from the cache when the server answers 304 Not Modified.
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Link')
+
+
+class HttpCache:
+    """
+    SQLite-backed store of validators and bodies for conditional GET requests.
+
+    Each cached URL keeps its ETag and Last-Modified values. Requests for a
+    known URL are sent with If-None-Match/If-Modified-Since, and a 304
+    answer is turned back into a normal 200 response carrying the stored
+    body, so unchanged resources cost a round trip but no transfer (and no
+    GitHub rate limit).
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                ' url TEXT PRIMARY KEY,'
+                ' etag TEXT,'
+                ' last_modified TEXT,'
+                ' headers TEXT NOT NULL,'
+                ' body BLOB NOT NULL,'
+                ' stored_at REAL NOT NULL)'
+            )
+
+    def conditional_headers(self, url):
+        """
+        Validator headers to send for a URL, or an empty dict when it is not cached.
+        """
+        entry = self._load(url)
+        if entry is None:
+            return {}
+        etag, last_modified = entry[0], entry[1]
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def replay(self, url, response):
+        """
+        Rebuild a 200 response from the cache after the server answered 304.
+        """
+        entry = self.cached(url)
+        if entry is None:
+            return response
+        headers, body = entry
+
+        cached = requests.Response()
+        cached.status_code = 200
+        cached.url = url
+        cached.request = response.request
+        cached.headers = CaseInsensitiveDict(headers)
+        cached._content = body
+        cached.encoding = response.encoding or requests.utils.get_encoding_from_headers(cached.headers)
+        cached.from_cache = True
+        return cached
+
+    def cached(self, url):
+        """
+        The stored (headers, body) of a URL the server just confirmed unchanged, or None.
+        """
+        entry = self._load(url)
+        if entry is None:
+            return None
+        with self._lock:
+            self.hits += 1
+        return json.loads(entry[2]), entry[3]
+
+    def store(self, url, response):
+        """
+        Remember a 200 response that carries a validator.
+        """
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        with self._lock:
+            self.misses += 1
+        if not (etag or last_modified):
+            return
+        headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                (url, etag, last_modified, json.dumps(headers), response.content, time.time()),
+            )
+
+    def stats(self):
+        with self._lock:
+            entries = self._connection.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            return {'entries': entries, 'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _load(self, url):
+        with self._lock:
+            return self._connection.execute(
+                'SELECT etag, last_modified, headers, body FROM responses WHERE url = ?', (url,)
+            ).fetchone()
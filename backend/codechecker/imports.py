@@ -0,0 +1,563 @@
+import ast
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+
+DEFAULT_IMPORT_SCAN = {
+    # None means one worker per CPU.
+    'MAX_WORKERS': None,
+    'BATCH_SIZE': 64,
+}
+
+SCOPE_MODULE = 'module'
+SCOPE_CLASS = 'class'
+SCOPE_FUNCTION = 'function'
+
+
+class ImportRecord:
+    """
+    A single imported name together with the statement that bound it.
+    """
+
+    def __init__(self, node, alias):
+        self.node = node
+        self.alias = alias
+        self.is_from = isinstance(node, ast.ImportFrom)
+
+    @property
+    def bound_name(self):
+        """
+        Name the import binds in the importing namespace.
+        """
+        if self.alias.asname:
+            return self.alias.asname
+        if self.is_from:
+            return self.alias.name
+        return self.alias.name.split('.')[0]
+
+    @property
+    def display_name(self):
+        """
+        Name reported back to the user for this import.
+        """
+        return self.alias.asname or self.alias.name
+
+    @property
+    def root_module(self):
+        """
+        First dotted component of the imported name.
+        """
+        return self.alias.name.split('.')[0]
+
+
+class Scope:
+    """
+    One namespace of a module: the names it binds and the imports among them.
+    """
+
+    def __init__(self, kind, parent=None):
+        self.kind = kind
+        self.parent = parent
+        self.bindings = set()
+        self.imports = {}
+        self.global_names = set()
+
+    def bind(self, name):
+        if name in self.global_names:
+            self.module.bindings.add(name)
+        else:
+            self.bindings.add(name)
+
+    @property
+    def module(self):
+        scope = self
+        while scope.parent is not None:
+            scope = scope.parent
+        return scope
+
+
+class ScopeCollector(ast.NodeVisitor):
+    """
+    Collect every scope's bindings, its imports and every name use in one traversal.
+
+    Uses are only recorded here and resolved afterwards, because a name
+    assigned anywhere in a function is local to the whole function.
+    """
+
+    def __init__(self):
+        self.scope = Scope(SCOPE_MODULE)
+        self.records = []
+        self.uses = []
+        # Imports that count as used however the module uses them.
+        self.always_used = set()
+
+    def use(self, name, chain=None):
+        self.uses.append((self.scope, name, chain or name))
+
+    def _in_scope(self, kind, nodes):
+        outer = self.scope
+        self.scope = Scope(kind, parent=outer)
+        for node in nodes:
+            self.visit(node)
+        self.scope = outer
+
+    def _import(self, node):
+        for alias in node.names:
+            if alias.name == '*':
+                continue
+            record = ImportRecord(node, alias)
+            self.records.append(record)
+            self.scope.bind(record.bound_name)
+            self.scope.imports.setdefault(record.bound_name, []).append(record)
+            # "import a as a" is the explicit re-export idiom.
+            if (isinstance(node, ast.ImportFrom) and node.module == '__future__') or alias.asname == alias.name:
+                self.always_used.add(id(record))
+
+    visit_Import = _import
+    visit_ImportFrom = _import
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Store):
+            self.scope.bind(node.id)
+        else:
+            self.use(node.id)
+
+    def visit_Attribute(self, node):
+        parts = []
+        value = node
+        while isinstance(value, ast.Attribute):
+            parts.append(value.attr)
+            value = value.value
+        if isinstance(value, ast.Name) and isinstance(value.ctx, ast.Load):
+            self.use(value.id, '.'.join([value.id, *reversed(parts)]))
+        else:
+            self.generic_visit(node)
+
+    def visit_Global(self, node):
+        self.scope.global_names.update(node.names)
+
+    def visit_FunctionDef(self, node):
+        self.scope.bind(node.name)
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        for default in [*node.args.defaults, *node.args.kw_defaults]:
+            if default is not None:
+                self.visit(default)
+        arguments = [*node.args.posonlyargs, *node.args.args, *node.args.kwonlyargs, node.args.vararg, node.args.kwarg]
+        for argument in arguments:
+            if argument is not None and argument.annotation is not None:
+                self._visit_annotation(argument.annotation)
+        if node.returns is not None:
+            self._visit_annotation(node.returns)
+
+        outer = self.scope
+        self.scope = Scope(SCOPE_FUNCTION, parent=outer)
+        for argument in arguments:
+            if argument is not None:
+                self.scope.bind(argument.arg)
+        for statement in node.body:
+            self.visit(statement)
+        self.scope = outer
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node):
+        for default in [*node.args.defaults, *node.args.kw_defaults]:
+            if default is not None:
+                self.visit(default)
+        outer = self.scope
+        self.scope = Scope(SCOPE_FUNCTION, parent=outer)
+        for argument in [*node.args.posonlyargs, *node.args.args, *node.args.kwonlyargs,
+                         node.args.vararg, node.args.kwarg]:
+            if argument is not None:
+                self.scope.bind(argument.arg)
+        self.visit(node.body)
+        self.scope = outer
+
+    def visit_ClassDef(self, node):
+        self.scope.bind(node.name)
+        for child in [*node.decorator_list, *node.bases, *node.keywords]:
+            self.visit(child)
+        self._in_scope(SCOPE_CLASS, node.body)
+
+    def _comprehension(self, node):
+        # The first iterable is evaluated in the enclosing scope.
+        self.visit(node.generators[0].iter)
+        outer = self.scope
+        self.scope = Scope(SCOPE_FUNCTION, parent=outer)
+        for index, generator in enumerate(node.generators):
+            if index:
+                self.visit(generator.iter)
+            self.visit(generator.target)
+            for condition in generator.ifs:
+                self.visit(condition)
+        for field in ('elt', 'key', 'value'):
+            if getattr(node, field, None) is not None:
+                self.visit(getattr(node, field))
+        self.scope = outer
+
+    visit_ListComp = _comprehension
+    visit_SetComp = _comprehension
+    visit_GeneratorExp = _comprehension
+    visit_DictComp = _comprehension
+
+    def visit_ExceptHandler(self, node):
+        if node.name:
+            self.scope.bind(node.name)
+        self.generic_visit(node)
+
+    def visit_MatchAs(self, node):
+        if node.name:
+            self.scope.bind(node.name)
+        self.generic_visit(node)
+
+    def visit_MatchStar(self, node):
+        if node.name:
+            self.scope.bind(node.name)
+
+    def visit_AnnAssign(self, node):
+        self.visit(node.target)
+        self._visit_annotation(node.annotation)
+        if node.value is not None:
+            self.visit(node.value)
+        self._export(node.target, node.value)
+
+    def visit_Assign(self, node):
+        self.generic_visit(node)
+        for target in node.targets:
+            self._export(target, node.value)
+
+    def visit_AugAssign(self, node):
+        self.generic_visit(node)
+        self._export(node.target, node.value)
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        func = node.func
+        # __all__.append('name') / __all__.extend([...])
+        if (isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.value.id == '__all__'
+                and func.attr in ('append', 'extend') and node.args):
+            self._export(func.value, node.args[0])
+
+    def _export(self, target, value):
+        """
+        Names listed in the module's __all__ count as used.
+        """
+        if not (isinstance(target, ast.Name) and target.id == '__all__' and self.scope.kind == SCOPE_MODULE):
+            return
+        elements = value.elts if isinstance(value, (ast.List, ast.Tuple, ast.Set)) else [value]
+        for element in elements:
+            if isinstance(element, ast.Constant) and isinstance(element.value, str):
+                self.use(element.value)
+
+    def _visit_annotation(self, node):
+        """
+        Visit an annotation, including the names inside string (forward-reference) annotations.
+        """
+        self.visit(node)
+        for child in ast.walk(node):
+            if isinstance(child, ast.Constant) and isinstance(child.value, str):
+                try:
+                    expression = ast.parse(child.value.strip(), mode='eval')
+                except SyntaxError:
+                    continue
+                self._visit_annotation(expression.body)
+
+
+class ImportAnalysis:
+    """
+    Which of a module's imports are used, resolved from a finished ScopeCollector.
+
+    A use resolves to the nearest enclosing scope that binds the name, with
+    class bodies skipped for the functions nested in them, so a parameter
+    or local that shadows an import does not keep it alive. Attribute
+    chains decide between imports of the same root: "os.path.join" uses
+    "import os.path" but not "import os.environ" when both are present.
+    """
+
+    def __init__(self, collector):
+        self.imports = collector.records
+        self._used = set(collector.always_used)
+        for scope, name, chain in collector.uses:
+            self._resolve(scope, name, chain)
+
+    def _resolve(self, scope, name, chain):
+        current = scope
+        while current is not None:
+            if current is not scope and current.kind == SCOPE_CLASS:
+                current = current.parent
+                continue
+            if name in current.global_names:
+                current = current.module
+            if name in current.bindings:
+                for record in self._credited(current.imports.get(name, ()), chain):
+                    self._used.add(id(record))
+                return
+            current = current.parent
+
+    def _credited(self, records, chain):
+        dotted = [record for record in records if not record.is_from and not record.alias.asname
+                  and '.' in record.alias.name]
+        plain = [record for record in records if record not in dotted]
+        matched = [record for record in dotted
+                   if chain == record.alias.name or chain.startswith(record.alias.name + '.')]
+        if matched:
+            return matched + plain
+        return plain or dotted
+
+    def is_used(self, record):
+        return id(record) in self._used
+
+    @property
+    def unused(self):
+        return [record for record in self.imports if not self.is_used(record)]
+
+
+def analyze_imports(tree):
+    collector = ScopeCollector()
+    collector.visit(tree)
+    return ImportAnalysis(collector)
+
+
+class _SourceOffsets:
+    """
+    Convert the AST's (line, UTF-8 byte column) positions to offsets into the source string.
+    """
+
+    def __init__(self, code):
+        self.code = code
+        self.lines = code.splitlines(keepends=True)
+        self.starts = [0]
+        for line in self.lines:
+            self.starts.append(self.starts[-1] + len(line))
+
+    def offset(self, lineno, col_offset):
+        line = self.lines[lineno - 1] if lineno <= len(self.lines) else ''
+        if not line.isascii():
+            col_offset = len(line.encode('utf-8')[:col_offset].decode('utf-8', errors='ignore'))
+        return self.starts[lineno - 1] + col_offset
+
+    def start(self, node):
+        return self.offset(node.lineno, node.col_offset)
+
+    def end(self, node):
+        return self.offset(node.end_lineno, node.end_col_offset)
+
+    def line_bounds(self, lineno):
+        """
+        Offsets of the start of a line, the end of its text and the end of its line break.
+        """
+        line = self.lines[lineno - 1] if lineno <= len(self.lines) else ''
+        start = self.starts[lineno - 1] if lineno <= len(self.lines) else len(self.code)
+        text = line.rstrip('\r\n')
+        return start, start + len(text), start + len(line)
+
+
+def _statement_owners(tree):
+    """
+    Map each import statement inside a block to the statement list of that block.
+    """
+    owners = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Module):
+            continue
+        for field in ('body', 'orelse', 'finalbody'):
+            statements = getattr(node, field, None)
+            if isinstance(statements, list):
+                for statement in statements:
+                    if isinstance(statement, (ast.Import, ast.ImportFrom)):
+                        owners[id(statement)] = statements
+    return owners
+
+
+def _statement_removal(offsets, statement):
+    """
+    Span that deletes a whole statement, taking its line with it when it is alone there.
+    """
+    start, end = offsets.start(statement), offsets.end(statement)
+    line_start, _, _ = offsets.line_bounds(statement.lineno)
+    _, text_end, line_end = offsets.line_bounds(statement.end_lineno)
+    before = offsets.code[line_start:start]
+    after = offsets.code[end:text_end]
+    if not before.strip() and (not after.strip() or after.lstrip().startswith('#')):
+        return line_start, line_end
+    if after.lstrip().startswith(';'):
+        semicolon = end + after.index(';') + 1
+        return start, semicolon + len(offsets.code[semicolon:text_end]) - len(offsets.code[semicolon:text_end].lstrip(' \t'))
+    if before.rstrip().endswith(';'):
+        return line_start + before.rstrip().rindex(';'), end
+    return start, end
+
+
+def import_removal_edits(code, tree, records):
+    """
+    Source-span edits, as (start, end, replacement), that remove the given import records.
+
+    Statements losing every name are deleted (or become 'pass' when they
+    were the whole block); otherwise only the unused names are cut out of
+    the statement, which keeps parenthesised multi-line imports and their
+    comments intact.
+    """
+    offsets = _SourceOffsets(code)
+    removed_by_statement = {}
+    for record in records:
+        removed_by_statement.setdefault(id(record.node), (record.node, set()))[1].add(id(record.alias))
+
+    whole = {
+        statement_id for statement_id, (statement, aliases) in removed_by_statement.items()
+        if all(id(alias) in aliases for alias in statement.names)
+    }
+    owners = _statement_owners(tree)
+    edits = []
+    emptied = set()
+    for statement_id, (statement, aliases) in removed_by_statement.items():
+        if statement_id in whole:
+            siblings = owners.get(statement_id, ())
+            if siblings and all(id(sibling) in whole for sibling in siblings):
+                if id(siblings[0]) not in emptied:
+                    emptied.add(id(siblings[0]))
+                    first = siblings[0]
+                    edits.append((offsets.start(first), offsets.end(first), 'pass'))
+                if statement is not siblings[0]:
+                    edits.append((*_statement_removal(offsets, statement), ''))
+            else:
+                edits.append((*_statement_removal(offsets, statement), ''))
+            continue
+
+        names = statement.names
+        last_kept = max(index for index, alias in enumerate(names) if id(alias) not in aliases)
+        for index, alias in enumerate(names):
+            if id(alias) not in aliases or index > last_kept:
+                continue
+            edits.append((offsets.start(alias), offsets.start(names[index + 1]), ''))
+        edits.extend(_trailing_removal(offsets, statement, last_kept))
+    return edits
+
+
+def _trailing_removal(offsets, statement, last_kept):
+    """
+    Spans that cut the names after the last kept one out of a statement.
+
+    A name is cut together with the comma before it, except when it starts
+    its own line inside parentheses: then its line goes, and the comma and
+    comment after the kept name stay where they are.
+    """
+    code = offsets.code
+    names = statement.names
+    parenthesised = code[offsets.start(statement):offsets.start(names[0])].rstrip().endswith('(')
+    spans = []
+    for index in range(last_kept + 1, len(names)):
+        alias = names[index]
+        start, end = offsets.start(alias), offsets.end(alias)
+        line_start, _, _ = offsets.line_bounds(alias.lineno)
+        if spans and spans[-1][2] and alias.lineno == names[index - 1].end_lineno:
+            spans[-1][1], spans[-1][3] = end, alias.end_lineno
+        elif parenthesised and not code[line_start:start].strip():
+            spans.append([line_start, end, True, alias.end_lineno])
+        else:
+            spans.append([code.index(',', offsets.end(names[index - 1])), end, False, alias.end_lineno])
+
+    edits = []
+    for start, end, own_line, lineno in spans:
+        if own_line:
+            _, text_end, line_end = offsets.line_bounds(lineno)
+            rest = code[end:text_end].lstrip(' \t')
+            comma = rest.startswith(',')
+            if comma:
+                rest = rest[1:].lstrip(' \t')
+            if not rest or rest.startswith('#'):
+                end = line_end
+            elif comma:
+                end = code.index(',', end) + 1
+        edits.append((start, end, ''))
+    return edits
+
+
+def apply_span_edits(code, edits):
+    """
+    Apply non-overlapping (start, end, replacement) edits in one pass.
+    """
+    parts = []
+    position = 0
+    for start, end, replacement in sorted(edits):
+        parts.append(code[position:start])
+        parts.append(replacement)
+        position = max(position, end)
+    parts.append(code[position:])
+    return ''.join(parts)
+
+
+def remove_imports(code, tree, records):
+    if not records:
+        return code
+    return apply_span_edits(code, import_removal_edits(code, tree, records))
+
+
+def scan_imports(path, code, fix=False):
+    """
+    Unused imports of one file as a JSON-ready dict, optionally with the fixed source.
+    """
+    result = {'path': path, 'unused_imports': []}
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError) as e:
+        result['error'] = f'Syntax Error: {e}'
+        return result
+
+    unused = analyze_imports(tree).unused
+    result['unused_imports'] = [
+        {'name': record.display_name, 'line': record.alias.lineno, 'column': record.alias.col_offset + 1}
+        for record in unused
+    ]
+    if fix and unused:
+        result['fixed_code'] = remove_imports(code, tree, unused)
+    return result
+
+
+def _scan_batch(batch, fix):
+    return [scan_imports(path, code, fix=fix) for path, code in batch]
+
+
+def _batches(files, size):
+    batch = []
+    for item in files:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_import_scans(files, fix=False, max_workers=None, batch_size=None):
+    """
+    Scan (path, code) pairs across a process pool, yielding each file's result as it completes.
+
+    Files are consumed lazily and sent in batches, with at most two
+    batches per worker in flight, so a repository streamed from an archive
+    is never held in memory as a whole. Results arrive in completion
+    order, not input order. With a single worker everything runs inline.
+    """
+    options = {**DEFAULT_IMPORT_SCAN, **getattr(settings, 'CODECHECKER_IMPORT_SCAN', {})}
+    max_workers = max_workers or options['MAX_WORKERS'] or os.cpu_count() or 1
+    batches = _batches(files, batch_size or options['BATCH_SIZE'])
+
+    if max_workers <= 1:
+        for batch in batches:
+            yield from _scan_batch(batch, fix)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        pending = set()
+        for batch in batches:
+            pending.add(executor.submit(_scan_batch, batch, fix))
+            if len(pending) >= 2 * max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
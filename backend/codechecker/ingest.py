@@ -0,0 +1,237 @@
+import os
+import tempfile
+
+import numpy as np
+from django.conf import settings
+
+from .lazy import lazy_module
+
+pd = lazy_module('pandas')
+
+DEFAULT_INGEST = {
+    'CHUNK_ROWS': 100_000,
+    'SAMPLE_ROWS': 200_000,
+}
+
+# Rows read up front to decide which CSV columns are numeric.
+CSV_SNIFF_ROWS = 1000
+
+
+class DatasetError(ValueError):
+    """
+    Raised when an uploaded dataset cannot be analyzed.
+    """
+
+
+class DatasetSample:
+    """
+    Numeric rows kept from an upload for the detectors.
+
+    features holds at most SAMPLE_ROWS float32 rows; row_indices gives the
+    position of each of them in the original file so findings can be
+    reported against the rows the user uploaded.
+    """
+
+    def __init__(self, features, row_indices, columns, total_rows):
+        self.features = features
+        self.row_indices = row_indices
+        self.columns = columns
+        self.total_rows = total_rows
+
+    @property
+    def sampled(self):
+        return len(self.row_indices) < self.total_rows
+
+
+class ReservoirSampler:
+    """
+    Uniform fixed-size sample of a stream of row chunks (Algorithm R, vectorized per chunk).
+    """
+
+    def __init__(self, capacity, num_columns, seed=0):
+        self.capacity = capacity
+        self.rows = np.empty((capacity, num_columns), dtype=np.float32)
+        self.indices = np.empty(capacity, dtype=np.int64)
+        self.size = 0
+        self.seen = 0
+        self._rng = np.random.default_rng(seed)
+
+    def add(self, chunk, chunk_indices):
+        fill = min(self.capacity - self.size, len(chunk))
+        if fill:
+            self.rows[self.size:self.size + fill] = chunk[:fill]
+            self.indices[self.size:self.size + fill] = chunk_indices[:fill]
+            self.size += fill
+
+        rest, rest_indices = chunk[fill:], chunk_indices[fill:]
+        if len(rest):
+            # Row number t (0-based) of the stream replaces a random slot with probability capacity / (t + 1).
+            positions = np.arange(self.seen + fill, self.seen + fill + len(rest))
+            slots = self._rng.integers(0, positions + 1)
+            keep = slots < self.capacity
+            self.rows[slots[keep]] = rest[keep]
+            self.indices[slots[keep]] = rest_indices[keep]
+
+        self.seen += len(chunk)
+
+    def sample(self, columns, total_rows):
+        order = np.argsort(self.indices[:self.size], kind='stable')
+        return DatasetSample(self.rows[:self.size][order], self.indices[:self.size][order], columns, total_rows)
+
+
+def load_dataset(file, name=None):
+    """
+    Stream an uploaded CSV, Parquet, Arrow/Feather or .npy file into a bounded numeric sample.
+
+    Files are read chunk by chunk as float32 restricted to numeric columns,
+    so peak memory is one chunk plus the reservoir whatever the upload size.
+    Rows with missing values are skipped.
+    """
+    options = {**DEFAULT_INGEST, **getattr(settings, 'CODECHECKER_INGEST', {})}
+    name = name or getattr(file, 'name', None) or str(file)
+    extension = os.path.splitext(name)[1].lower()
+
+    if extension == '.npy':
+        columns, chunks = _npy_chunks(file, options['CHUNK_ROWS'])
+    elif extension in ('.parquet', '.pq'):
+        columns, chunks = _parquet_chunks(file, options['CHUNK_ROWS'])
+    elif extension in ('.arrow', '.feather', '.ipc'):
+        columns, chunks = _arrow_chunks(file)
+    else:
+        columns, chunks = _csv_chunks(file, options['CHUNK_ROWS'])
+
+    if not columns:
+        raise DatasetError('Dataset does not contain numeric features.')
+
+    sampler = ReservoirSampler(options['SAMPLE_ROWS'], len(columns))
+    total_rows = 0
+    for chunk in chunks:
+        chunk = np.asarray(chunk, dtype=np.float32)
+        chunk_indices = np.arange(total_rows, total_rows + len(chunk))
+        total_rows += len(chunk)
+
+        complete = ~np.isnan(chunk).any(axis=1)
+        sampler.add(chunk[complete], chunk_indices[complete])
+
+    if sampler.size == 0:
+        raise DatasetError('Uploaded file is empty. Please upload a non-empty CSV file.')
+
+    return sampler.sample(columns, total_rows)
+
+
+def _rewind(file):
+    if hasattr(file, 'seek'):
+        file.seek(0)
+
+
+def _csv_chunks(file, chunk_rows):
+    try:
+        head = pd.read_csv(file, nrows=CSV_SNIFF_ROWS)
+    except pd.errors.EmptyDataError:
+        raise DatasetError('Uploaded file is empty. Please upload a non-empty CSV file.')
+    except pd.errors.ParserError:
+        raise DatasetError('Error parsing the file. Ensure it is a valid CSV format.')
+
+    columns = list(head.select_dtypes(include=[np.number]).columns)
+    if not columns:
+        return columns, iter(())
+    _rewind(file)
+
+    def chunks():
+        try:
+            reader = pd.read_csv(
+                file,
+                usecols=columns,
+                dtype={column: np.float32 for column in columns},
+                chunksize=chunk_rows,
+            )
+            for frame in reader:
+                yield frame[columns].to_numpy()
+        except pd.errors.ParserError:
+            raise DatasetError('Error parsing the file. Ensure it is a valid CSV format.')
+        except ValueError as e:
+            raise DatasetError(f'Non-numeric value in a numeric column: {e}')
+
+    return columns, chunks()
+
+
+def _local_path(file):
+    """
+    Path of the upload on disk and whether it is a temporary copy.
+
+    In-memory uploads are spilled to a temporary file because memory
+    mapping needs a real file.
+    """
+    if isinstance(file, (str, os.PathLike)):
+        return str(file), False
+    if hasattr(file, 'temporary_file_path'):
+        return file.temporary_file_path(), False
+
+    _rewind(file)
+    with tempfile.NamedTemporaryFile(suffix='.npy', delete=False) as target:
+        for chunk in file.chunks():
+            target.write(chunk)
+    return target.name, True
+
+
+def _npy_chunks(file, chunk_rows):
+    path, is_temporary = _local_path(file)
+    try:
+        array = np.load(path, mmap_mode='r', allow_pickle=False)
+    except ValueError as e:
+        raise DatasetError(f'Error reading the .npy file: {e}')
+    finally:
+        if is_temporary:
+            # On POSIX the mapping stays valid after the spilled copy is unlinked.
+            os.unlink(path)
+
+    if array.ndim == 1:
+        array = array.reshape(-1, 1)
+    if array.ndim != 2 or not np.issubdtype(array.dtype, np.number):
+        raise DatasetError('A .npy upload must be a two-dimensional numeric array.')
+
+    columns = [f'column_{index}' for index in range(array.shape[1])]
+    return columns, (array[start:start + chunk_rows] for start in range(0, len(array), chunk_rows))
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise DatasetError('Parquet and Arrow uploads require the pyarrow package.')
+    return pyarrow
+
+
+def _numeric_columns(schema):
+    pyarrow = _import_pyarrow()
+    return [
+        field.name for field in schema
+        if pyarrow.types.is_integer(field.type) or pyarrow.types.is_floating(field.type)
+    ]
+
+
+def _batch_to_array(batch, columns):
+    return np.column_stack([
+        batch.column(column).to_numpy(zero_copy_only=False).astype(np.float32, copy=False)
+        for column in columns
+    ])
+
+
+def _parquet_chunks(file, chunk_rows):
+    _import_pyarrow()
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(file)
+    columns = _numeric_columns(parquet_file.schema_arrow)
+    batches = parquet_file.iter_batches(batch_size=chunk_rows, columns=columns) if columns else iter(())
+    return columns, (_batch_to_array(batch, columns) for batch in batches)
+
+
+def _arrow_chunks(file):
+    _import_pyarrow()
+    import pyarrow.ipc as ipc
+
+    reader = ipc.open_file(file)
+    columns = _numeric_columns(reader.schema)
+    batches = (reader.get_batch(index) for index in range(reader.num_record_batches)) if columns else iter(())
+    return columns, (_batch_to_array(batch, columns) for batch in batches)
@@ -0,0 +1,343 @@
+import contextvars
+import cProfile
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .flags import is_truthy
+
+DEFAULT_INSTRUMENTATION = {
+    # Trace allocations so every stage also reports its peak. tracemalloc
+    # slows allocation-heavy code down noticeably, so it is off by default.
+    'TRACEMALLOC': False,
+    # Where ?profile=1 requests leave their cProfile dumps; None disables profiling.
+    'PROFILE_DIR': None,
+    'SECONDS_BUCKETS': (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+    'BYTES_BUCKETS': tuple(2 ** power for power in range(14, 32, 2)),
+}
+
+
+def _options():
+    return {**DEFAULT_INSTRUMENTATION, **getattr(settings, 'CODECHECKER_INSTRUMENTATION', {})}
+
+
+class StageTiming:
+    """
+    What one run of a stage cost: wall seconds, CPU seconds of the calling
+    thread, and the allocation peak above its starting point (None unless
+    tracemalloc is tracing).
+    """
+    __slots__ = ('name', 'wall', 'cpu', 'peak_bytes')
+
+    def __init__(self, name, wall=0.0, cpu=0.0, peak_bytes=None):
+        self.name = name
+        self.wall = wall
+        self.cpu = cpu
+        self.peak_bytes = peak_bytes
+
+    def __repr__(self):
+        return f'<StageTiming {self.name} wall={self.wall:.6f} cpu={self.cpu:.6f} peak={self.peak_bytes}>'
+
+
+class Timings:
+    """
+    The stages run while collecting for one request.
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def add(self, timing):
+        self.records.append(timing)
+
+    def as_dict(self):
+        """
+        {stage: {'calls', 'wall', 'cpu', 'peak_bytes'}}, summing the calls of each stage.
+
+        Nested stages are included in their parent's figures as well as
+        listed on their own.
+        """
+        stages = {}
+        for timing in self.records:
+            entry = stages.setdefault(timing.name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'peak_bytes': None})
+            entry['calls'] += 1
+            entry['wall'] += timing.wall
+            entry['cpu'] += timing.cpu
+            if timing.peak_bytes is not None:
+                entry['peak_bytes'] = max(entry['peak_bytes'] or 0, timing.peak_bytes)
+        return {
+            name: {**entry, 'wall': round(entry['wall'], 6), 'cpu': round(entry['cpu'], 6)}
+            for name, entry in stages.items()
+        }
+
+
+_timings = contextvars.ContextVar('codechecker_timings', default=None)
+
+
+@contextmanager
+def collect_timings(timings=None):
+    """
+    Collect every stage run in the current context (and threads started
+    through sync_to_async) into timings, a fresh Timings by default.
+    """
+    timings = Timings() if timings is None else timings
+    previous = _timings.get()
+    _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        # Not reset(token): a streamed generator may be resumed in a copy of the context it started in.
+        _timings.set(previous)
+
+
+def iter_with_timings(events):
+    """
+    Pass (event, data) pairs through, collecting the stages they run, and end with a 'timings' event.
+    """
+    with collect_timings() as timings:
+        yield from events
+    yield 'timings', timings.as_dict()
+
+
+async def aiter_with_timings(events):
+    """
+    iter_with_timings for an async event generator.
+
+    Collection is switched on around every step rather than once, because
+    a streamed response resumes the generator from a different task than
+    the view that started it.
+    """
+    timings = Timings()
+    while True:
+        with collect_timings(timings):
+            try:
+                event = await anext(events)
+            except StopAsyncIteration:
+                break
+        yield event
+    yield 'timings', timings.as_dict()
+
+
+class Histogram:
+    """
+    A cumulative Prometheus histogram.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            index = len(self.buckets)
+        self.counts[index] += 1
+        self.sum += value
+
+    def samples(self):
+        """
+        (le, cumulative count) for every bucket including +Inf, then the sum and the count.
+        """
+        cumulative = 0
+        buckets = []
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            cumulative += count
+            buckets.append((bound, cumulative))
+        return buckets, self.sum, cumulative
+
+
+STAGE_METRICS = (
+    ('codechecker_stage_seconds', 'Wall-clock seconds spent in an instrumented stage.', 'wall'),
+    ('codechecker_stage_cpu_seconds', 'CPU seconds of the calling thread spent in an instrumented stage.', 'cpu'),
+    ('codechecker_stage_peak_bytes', 'Peak traced allocations of an instrumented stage.', 'peak_bytes'),
+)
+
+
+class StageMetrics:
+    """
+    Process-wide histograms of stage wall time, CPU time and allocation peak.
+
+    Every process (web workers, job and analysis pools) keeps its own; the
+    /metrics endpoint exposes those of the process that serves it.
+    """
+
+    def __init__(self, seconds_buckets, bytes_buckets):
+        self.seconds_buckets = seconds_buckets
+        self.bytes_buckets = bytes_buckets
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, timing):
+        with self._lock:
+            for metric, _, field in STAGE_METRICS:
+                value = getattr(timing, field)
+                if value is None:
+                    continue
+                histogram = self.histograms.get((metric, timing.name))
+                if histogram is None:
+                    buckets = self.bytes_buckets if field == 'peak_bytes' else self.seconds_buckets
+                    histogram = self.histograms[(metric, timing.name)] = Histogram(buckets)
+                histogram.observe(value)
+
+    def render(self):
+        """
+        The histograms in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            for metric, description, _ in STAGE_METRICS:
+                stages = sorted(stage for name, stage in self.histograms if name == metric)
+                if not stages:
+                    continue
+                lines.append(f'# HELP {metric} {description}')
+                lines.append(f'# TYPE {metric} histogram')
+                for stage_name in stages:
+                    buckets, total, count = self.histograms[(metric, stage_name)].samples()
+                    label = _escape_label(stage_name)
+                    for bound, cumulative in buckets:
+                        lines.append(f'{metric}_bucket{{stage="{label}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{metric}_sum{{stage="{label}"}} {total}')
+                    lines.append(f'{metric}_count{{stage="{label}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_stage_metrics():
+    """
+    Return the process-wide StageMetrics, creating it (and starting tracemalloc if configured) on first use.
+    """
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                options = _options()
+                if options['TRACEMALLOC'] and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                _metrics = StageMetrics(options['SECONDS_BUCKETS'], options['BYTES_BUCKETS'])
+    return _metrics
+
+
+def record_stage(timing):
+    """
+    Add a finished stage to the process metrics and to the timings being collected, if any.
+
+    Stages measured in another process come back as StageTiming objects
+    and are recorded here so they still count for the request.
+    """
+    get_stage_metrics().observe(timing)
+    timings = _timings.get()
+    if timings is not None:
+        timings.add(timing)
+
+
+# Per-thread stack of the allocation peaks seen by the stages still running.
+_peaks = threading.local()
+
+
+@contextmanager
+def stage(name):
+    """
+    Measure a block, or every call of a decorated function, as the named stage.
+
+    Yields the StageTiming, which is filled in when the stage ends. The
+    tracemalloc peak is process-wide, so stages that overlap in other
+    threads inflate each other's peaks.
+    """
+    get_stage_metrics()
+    timing = StageTiming(name)
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        stack = _peaks.__dict__.setdefault('stack', [])
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            # reset_peak() below would lose the peak the enclosing stage has reached so far.
+            stack[-1][1] = max(stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        frame = [current, current]
+        stack.append(frame)
+
+    wall_started = time.perf_counter()
+    cpu_started = time.thread_time()
+    try:
+        yield timing
+    finally:
+        timing.wall = time.perf_counter() - wall_started
+        timing.cpu = time.thread_time() - cpu_started
+        if tracing:
+            stack.pop()
+            if tracemalloc.is_tracing():
+                frame[1] = max(frame[1], tracemalloc.get_traced_memory()[1])
+            timing.peak_bytes = frame[1] - frame[0]
+            if stack:
+                stack[-1][1] = max(stack[-1][1], frame[1])
+        record_stage(timing)
+
+
+def render_metrics():
+    return get_stage_metrics().render()
+
+
+class ProfilingMiddleware:
+    """
+    Write a cProfile dump of each request sent with ?profile=1.
+
+    Only active when CODECHECKER_INSTRUMENTATION['PROFILE_DIR'] is set; the
+    dump's file name is returned in the X-Profile header. Streamed bodies
+    are produced after the view returns and are not part of the profile.
+    Under ASGI the profiler sees everything the event loop runs meanwhile.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.directory = _options()['PROFILE_DIR']
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.wants_profile(request):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        response = profiler.runcall(self.get_response, request)
+        return self.dump(profiler, request, response)
+
+    async def __acall__(self, request):
+        if not self.wants_profile(request):
+            return await self.get_response(request)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+        return self.dump(profiler, request, response)
+
+    def wants_profile(self, request):
+        return bool(self.directory) and is_truthy(request.GET.get('profile'))
+
+    def dump(self, profiler, request, response):
+        os.makedirs(self.directory, exist_ok=True)
+        view = request.path.strip('/').replace('/', '-') or 'root'
+        filename = f'{view}-{time.strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:8]}.prof'
+        profiler.dump_stats(os.path.join(self.directory, filename))
+        response['X-Profile'] = filename
+        return response
@@ -0,0 +1,149 @@
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import reverse
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import AnalysisJob
+from .workers import init_django_worker
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOBS = {
+    'MAX_WORKERS': 2,
+    'UPLOAD_DIR': None,
+}
+
+
+def _job_options():
+    return {**DEFAULT_JOBS, **getattr(settings, 'CODECHECKER_JOBS', {})}
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Return the process pool that runs analysis jobs, starting it on first use.
+
+    Workers are spawned rather than forked so they never inherit the web
+    process's database connections or threads.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=_job_options()['MAX_WORKERS'],
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=init_django_worker,
+                )
+    return _executor
+
+
+def save_upload(uploaded_file):
+    """
+    Copy an uploaded file to disk so a worker process can read it after the request ends.
+    """
+    suffix = os.path.splitext(uploaded_file.name)[1]
+    with tempfile.NamedTemporaryFile(dir=_job_options()['UPLOAD_DIR'], suffix=suffix, delete=False) as target:
+        for chunk in uploaded_file.chunks():
+            target.write(chunk)
+    return target.name
+
+
+def submit_job(kind, payload):
+    """
+    Record a pending job and hand it to the worker pool.
+    """
+    job = AnalysisJob.objects.create(kind=kind)
+    future = get_executor().submit(run_job, str(job.id), kind, payload)
+    future.add_done_callback(lambda future: _record_pool_failure(str(job.id), future))
+    return job
+
+
+def _record_pool_failure(job_id, future):
+    """
+    Mark a job failed when the pool itself could not run it (a worker died
+    or failed to start); run_job records every error raised by the job.
+    """
+    if future.cancelled():
+        error = 'Cancelled'
+    else:
+        error = future.exception()
+        if error is None:
+            return
+    logger.error("Job %s could not run: %s", job_id, error)
+    _update_job(job_id, status=AnalysisJob.STATUS_FAILED, progress='Failed', error=str(error))
+
+
+def job_payload(request, job, include_result=False):
+    """
+    JSON representation of a job for the submit and status endpoints.
+    """
+    payload = {
+        'job_id': str(job.id),
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'status_url': request.build_absolute_uri(reverse('job-status', args=[job.id])),
+    }
+    if include_result:
+        if job.status == AnalysisJob.STATUS_SUCCEEDED:
+            payload['result'] = json.loads(job.result)
+        elif job.status == AnalysisJob.STATUS_FAILED:
+            payload['error'] = job.error
+    return payload
+
+
+def _update_job(job_id, **fields):
+    AnalysisJob.objects.filter(pk=job_id).update(**fields)
+
+
+def _run_repository_job(payload, progress):
+    from .views import GithubRepoAnalysisView
+    return GithubRepoAnalysisView().analyze_repository(progress=progress, **payload)
+
+
+def _run_dataset_job(payload, progress):
+    from .views import DatasetCheckView
+    try:
+        return DatasetCheckView().analyze_dataset(payload['path'], progress=progress, name=payload['name'])
+    finally:
+        os.unlink(payload['path'])
+
+
+JOB_HANDLERS = {
+    AnalysisJob.KIND_REPOSITORY: _run_repository_job,
+    AnalysisJob.KIND_DATASET: _run_dataset_job,
+}
+
+
+def run_job(job_id, kind, payload):
+    """
+    Worker entry point: run one job and record its outcome on the AnalysisJob row.
+    """
+    close_old_connections()
+    _update_job(job_id, status=AnalysisJob.STATUS_RUNNING, progress='Started')
+    try:
+        result = JOB_HANDLERS[kind](payload, lambda message: _update_job(job_id, progress=message))
+    except Exception as e:
+        logger.exception("Job %s failed", job_id)
+        _update_job(job_id, status=AnalysisJob.STATUS_FAILED, progress='Failed', error=str(e))
+    else:
+        _update_job(
+            job_id,
+            status=AnalysisJob.STATUS_SUCCEEDED,
+            progress='Done',
+            result=json.dumps(result, cls=JSONEncoder),
+        )
+    finally:
+        close_old_connections()
@@ -0,0 +1,98 @@
+import builtins
+import heapq
+import io
+import keyword
+import tokenize
+from collections import Counter
+from operator import itemgetter
+
+from django.conf import settings
+
+DEFAULT_KEYWORDS = {
+    'TOP_K': 30,
+}
+
+KIND_KEYWORD = 'keyword'
+KIND_BUILTIN = 'builtin'
+KIND_IDENTIFIER = 'identifier'
+
+_BUILTIN_NAMES = frozenset(dir(builtins))
+
+
+def default_top_k():
+    return {**DEFAULT_KEYWORDS, **getattr(settings, 'CODECHECKER_KEYWORDS', {})}['TOP_K']
+
+
+def classify_name(name):
+    """
+    Whether a NAME token is a (soft) keyword, a builtin or a plain identifier.
+    """
+    if keyword.iskeyword(name) or keyword.issoftkeyword(name):
+        return KIND_KEYWORD
+    if name in _BUILTIN_NAMES:
+        return KIND_BUILTIN
+    return KIND_IDENTIFIER
+
+
+def iter_names(code):
+    """
+    NAME tokens of a piece of Python source, skipping strings, comments and numbers.
+
+    Tokenizing stops quietly at the first error (an unterminated string or
+    bracket), keeping every name seen up to that point.
+    """
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(code).readline):
+            if token.type == tokenize.NAME:
+                yield token.string
+    except (tokenize.TokenError, SyntaxError):
+        return
+
+
+class KeywordHistogram:
+    """
+    Mergeable count of the names used in one or more source files.
+
+    Histograms add up, so a repository-wide distribution is built by
+    merging per-file counts (fresh or stored) in a single pass.
+    """
+
+    def __init__(self, counts=None):
+        self.counts = Counter(counts or {})
+
+    @classmethod
+    def from_code(cls, code):
+        return cls(Counter(iter_names(code)))
+
+    def update(self, other):
+        """
+        Add another histogram or a plain {name: count} mapping to this one.
+        """
+        self.counts.update(other.counts if isinstance(other, KeywordHistogram) else other)
+        return self
+
+    def __iadd__(self, other):
+        return self.update(other)
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def top(self, k):
+        """
+        The k most frequent names, as (name, count) pairs, selected with a heap in O(n log k).
+        """
+        return heapq.nlargest(k, self.counts.items(), key=itemgetter(1))
+
+    def distribution(self, top_k=None):
+        """
+        Chart-ready top-k distribution, as returned by analyze_code.
+        """
+        top = self.top(top_k or default_top_k())
+        return {
+            'labels': [name for name, _ in top],
+            'data': [count for _, count in top],
+            'kinds': [classify_name(name) for name, _ in top],
+            'total_tokens': self.total,
+            'distinct_tokens': len(self.counts),
+        }
@@ -0,0 +1,40 @@
+import importlib
+import threading
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    Heavy scientific dependencies (pandas, scikit-learn, SciPy, matplotlib,
+    seaborn, SHAP) cost seconds and hundreds of MB to import, and most
+    requests never touch most of them. Binding them with lazy_module()
+    keeps ``module.attribute`` call sites unchanged while moving the import
+    cost to the first request that actually needs the module.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f'<lazy module {self._name!r} ({state})>'
+
+
+def lazy_module(name):
+    """
+    Return a LazyModule for the dotted module name.
+    """
+    return LazyModule(name)
@@ -0,0 +1,220 @@
+import asyncio
+import base64
+import hashlib
+import json
+import multiprocessing
+import statistics
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import reverse
+
+STUB_OWNER, STUB_REPO = 'bench', 'stub'
+STUB_COMMITS = [
+    {'sha': f'{index:040x}', 'commit': {'committer': {'date': f'2024-01-{1 + index % 28:02d}T12:00:00Z'}}}
+    for index in range(60)
+]
+
+
+def stub_files(count):
+    return {
+        f'pkg/module_{index}.py': (
+            f'import os\nimport sys\n\n\ndef handler_{index}(value):\n'
+            f'    return os.path.join(str(value), "{index}")\n'
+        )
+        for index in range(count)
+    }
+
+
+def git_blob_sha(text):
+    data = text.encode()
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+class StubGitHubHandler(BaseHTTPRequestHandler):
+    """
+    Answers the GitHub API calls a repository scan makes, for any owner/repo, after a fixed delay.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, body, headers=None, content_type='application/json'):
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.latency)
+        base = f'http://127.0.0.1:{server.server_port}'
+        path, _, query = self.path.partition('?')
+        parts = path.strip('/').split('/')
+
+        if parts[0] == 'raw':
+            return self.send_json(server.files['/'.join(parts[1:])].encode(), content_type='text/plain')
+        if parts[0] != 'repos' or len(parts) < 3:
+            return self.send_error(404)
+        owner, repo, rest = parts[1], parts[2], parts[3:]
+
+        if not rest:
+            return self.send_json({
+                'name': repo, 'owner': {'login': owner}, 'description': 'Benchmark stub',
+                'stargazers_count': 0, 'forks_count': 0,
+            })
+        if rest == ['commits']:
+            params = dict(param.split('=', 1) for param in query.split('&') if '=' in param)
+            page, per_page = int(params.get('page', 1)), int(params.get('per_page', 30))
+            headers = {}
+            if page * per_page < len(STUB_COMMITS):
+                headers['Link'] = f'<{base}{path}?per_page={per_page}&page={page + 1}>; rel="next"'
+            return self.send_json(STUB_COMMITS[(page - 1) * per_page:page * per_page], headers)
+        if rest == ['contents']:
+            return self.send_json([
+                {'name': name, 'path': name, 'type': 'file', 'sha': git_blob_sha(text),
+                 'download_url': f'{base}/raw/{name}'}
+                for name, text in server.files.items()
+            ])
+        if rest[:2] == ['git', 'trees']:
+            return self.send_json({'sha': 'stub-tree', 'truncated': False, 'tree': [
+                {'path': name, 'type': 'blob', 'sha': git_blob_sha(text), 'size': len(text)}
+                for name, text in server.files.items()
+            ]})
+        if rest[:2] == ['git', 'blobs']:
+            text = server.blobs[rest[2]]
+            return self.send_json({'sha': rest[2], 'content': base64.b64encode(text.encode()).decode()})
+        self.send_error(404)
+
+
+def serve_stub(files, latency, ports):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubGitHubHandler, bind_and_activate=False)
+    # Hundreds of scans connect at once; the default backlog of 5 would refuse most of them.
+    server.request_queue_size = 1024
+    server.daemon_threads = True
+    server.server_bind()
+    server.server_activate()
+    server.files = files
+    server.blobs = {git_blob_sha(text): text for text in files.values()}
+    server.latency = latency
+    ports.put(server.server_port)
+    server.serve_forever()
+
+
+def start_stub_server(files, latency):
+    """
+    Run the stub in a process of its own, so its threads do not compete with the event loop for the GIL.
+    """
+    context = multiprocessing.get_context('spawn')
+    ports = context.Queue()
+    process = context.Process(target=serve_stub, args=(files, latency, ports), daemon=True)
+    process.start()
+    return process, ports.get(timeout=30)
+
+
+async def asgi_post(application, path, body):
+    """
+    POST a JSON body straight to the ASGI application and return (status, seconds).
+    """
+    payload = json.dumps(body).encode()
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'POST',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'127.0.0.1'), (b'content-type', b'application/json'),
+                    (b'content-length', str(len(payload)).encode())],
+        'client': ('127.0.0.1', 0), 'server': ('127.0.0.1', 80),
+    }
+    received = False
+    finished = asyncio.Event()
+    response = {}
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {'type': 'http.request', 'body': payload, 'more_body': False}
+        await finished.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        elif message['type'] == 'http.response.body' and not message.get('more_body'):
+            finished.set()
+
+    started = time.perf_counter()
+    await application(scope, receive, send)
+    return response.get('status'), time.perf_counter() - started
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = ('Load-test the synchronous and async repository analysis views under ASGI against a local '
+            'stub GitHub server, reporting latency at increasing concurrency.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', default='1,10,50,100,200',
+                            help='Comma-separated numbers of simultaneous scans.')
+        parser.add_argument('--views', default='async,sync', help='Comma-separated views to load: async, sync.')
+        parser.add_argument('--latency', type=float, default=0.1, help='Seconds the stub waits per request.')
+        parser.add_argument('--files', type=int, default=20, help='Python files in the stub repository.')
+        # Tree mode also rewrites the stored index on every scan, which SQLite serializes.
+        parser.add_argument('--mode', default='contents', choices=('contents', 'tree'), help='Ingestion mode.')
+
+    def handle(self, *args, **options):
+        from codechecker.models import Repository
+
+        stub, port = start_stub_server(stub_files(options['files']), options['latency'])
+        github = {
+            **getattr(settings, 'CODECHECKER_GITHUB', {}),
+            'API_URL': f'http://127.0.0.1:{port}',
+            'TOKEN': None,
+            'HTTP_CACHE_PATH': None,
+            'COMMIT_MAX_PAGES': 1,
+        }
+        try:
+            with override_settings(CODECHECKER_GITHUB=github, ALLOWED_HOSTS=['127.0.0.1']):
+                asyncio.run(self.run(options))
+        finally:
+            stub.terminate()
+            Repository.objects.filter(owner=STUB_OWNER).delete()
+
+    async def run(self, options):
+        application = get_asgi_application()
+        paths = {'async': reverse('check-repo-async'), 'sync': reverse('check-repo')}
+        views = [view for view in options['views'].split(',') if view]
+        levels = [int(level) for level in options['concurrency'].split(',') if level]
+        body = {'repo_url': f'https://github.com/{STUB_OWNER}/{STUB_REPO}', 'mode': options['mode']}
+
+        # Warm up: spawn the analysis workers and store every file's analysis,
+        # so the measured scans are bound by the network as in steady state.
+        for view in views:
+            status, seconds = await asgi_post(application, paths[view], body)
+            self.stdout.write(f'warm-up {view}: HTTP {status} in {seconds:.2f}s')
+
+        self.stdout.write(f"{'view':>6} {'scans':>6} {'wall s':>8} {'scans/s':>8} "
+                          f"{'p50 s':>7} {'p95 s':>7} {'max s':>7} {'errors':>7}")
+        for view in views:
+            for level in levels:
+                started = time.perf_counter()
+                results = await asyncio.gather(*(asgi_post(application, paths[view], body) for _ in range(level)))
+                wall = time.perf_counter() - started
+                latencies = [seconds for _, seconds in results]
+                errors = sum(status != 200 for status, _ in results)
+                self.stdout.write(
+                    f'{view:>6} {level:>6} {wall:>8.2f} {level / wall:>8.1f} {statistics.median(latencies):>7.2f} '
+                    f'{percentile(latencies, 0.95):>7.2f} {max(latencies):>7.2f} {errors:>7}'
+                )
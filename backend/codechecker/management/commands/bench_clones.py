@@ -0,0 +1,84 @@
+import random
+import resource
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from codechecker.clones import similar_pairs
+from codechecker.ml_model import compute_code_embeddings
+
+
+def synthetic_corpus(size, clone_ratio=0.05, seed=0):
+    """
+    Build a corpus of random function bodies where a fraction are copies of earlier ones.
+    """
+    rng = random.Random(seed)
+    vocabulary = [f'name_{i}' for i in range(5000)]
+    corpus = []
+    for index in range(size):
+        if corpus and rng.random() < clone_ratio:
+            corpus.append(corpus[rng.randrange(len(corpus))])
+            continue
+        body = '\n'.join(
+            f'    {rng.choice(vocabulary)} = {rng.choice(vocabulary)}({rng.choice(vocabulary)})'
+            for _ in range(rng.randint(3, 12))
+        )
+        corpus.append(f'def func_{index}(arg):\n{body}\n    return arg\n')
+    return corpus
+
+
+class Command(BaseCommand):
+    help = 'Benchmark sparse thresholded clone detection on synthetic corpora.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000',
+                            help='Comma-separated corpus sizes to benchmark.')
+        parser.add_argument('--threshold', type=float, default=0.9)
+        parser.add_argument('--block-size', type=int, default=None,
+                            help='Rows per block; sized from the memory budget by default.')
+        parser.add_argument('--dense-limit', type=int, default=5000,
+                            help='Also time the dense cosine_similarity baseline up to this size.')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size]
+        self.stdout.write(f"{'snippets':>10} {'method':>8} {'embed_s':>9} {'pairs_s':>9} "
+                          f"{'peak_mb':>9} {'pairs':>9}")
+
+        for size in sizes:
+            corpus = synthetic_corpus(size)
+
+            started = time.perf_counter()
+            embeddings = compute_code_embeddings(corpus)
+            embed_seconds = time.perf_counter() - started
+
+            tracemalloc.start()
+            started = time.perf_counter()
+            rows, _, _ = similar_pairs(embeddings, options['threshold'], options['block_size'])
+            pair_seconds = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self._report(size, 'sparse', embed_seconds, pair_seconds, peak, len(rows))
+
+            if size <= options['dense_limit']:
+                self._run_dense(size, embeddings, embed_seconds, options['threshold'])
+
+        max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(f'max RSS: {max_rss_mb:.1f} MB')
+
+    def _run_dense(self, size, embeddings, embed_seconds, threshold):
+        import numpy as np
+        from sklearn.metrics.pairwise import cosine_similarity
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        similarity_matrix = cosine_similarity(embeddings)
+        rows, _ = np.nonzero(np.triu(similarity_matrix > threshold, k=1))
+        pair_seconds = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self._report(size, 'dense', embed_seconds, pair_seconds, peak, len(rows))
+
+    def _report(self, size, method, embed_seconds, pair_seconds, peak, pairs):
+        self.stdout.write(f'{size:>10} {method:>8} {embed_seconds:>9.2f} {pair_seconds:>9.2f} '
+                          f'{peak / 2 ** 20:>9.1f} {pairs:>9}')
@@ -0,0 +1,75 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from sklearn.datasets import make_blobs
+from sklearn.metrics import adjusted_rand_score
+
+from codechecker.dataset_models import DEFAULT_LARGE_DATA, make_iso_forest, make_kmeans, make_svm
+
+# Thresholds that force the exact or the large-data variant regardless of size.
+EXACT = {**DEFAULT_LARGE_DATA, 'ISO_FOREST_ROWS': float('inf'), 'SVM_ROWS': float('inf'), 'KMEANS_ROWS': float('inf')}
+LARGE = {**DEFAULT_LARGE_DATA, 'ISO_FOREST_ROWS': 0, 'SVM_ROWS': 0, 'KMEANS_ROWS': 0}
+
+
+def synthetic_dataset(rows, columns=4, outlier_ratio=0.05, seed=0):
+    """
+    Three Gaussian blobs plus uniformly scattered outliers, as float32.
+    """
+    rng = np.random.default_rng(seed)
+    inliers, _ = make_blobs(n_samples=rows - int(rows * outlier_ratio), n_features=columns, centers=3, random_state=seed)
+    outliers = rng.uniform(inliers.min() - 5, inliers.max() + 5, size=(int(rows * outlier_ratio), columns))
+    data = np.vstack([inliers, outliers]).astype(np.float32)
+    rng.shuffle(data)
+    return data
+
+
+def anomaly_jaccard(first, second):
+    first, second = set(np.flatnonzero(first == -1)), set(np.flatnonzero(second == -1))
+    union = first | second
+    return len(first & second) / len(union) if union else 1.0
+
+
+class Command(BaseCommand):
+    help = 'Compare fit time and agreement of the exact and large-data dataset models.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='5000,20000,100000',
+                            help='Comma-separated row counts to benchmark.')
+        parser.add_argument('--exact-svm-limit', type=int, default=20000,
+                            help='Skip the exact RBF One-Class SVM above this many rows.')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size]
+        self.stdout.write(f"{'rows':>8} {'detector':>12} {'exact_s':>9} {'large_s':>9} {'agreement':>10} {'jaccard/ari':>12}")
+
+        for rows in sizes:
+            features = synthetic_dataset(rows)
+
+            self._compare_anomalies(rows, 'iso_forest', make_iso_forest, features)
+            if rows <= options['exact_svm_limit']:
+                self._compare_anomalies(rows, 'svm', make_svm, features)
+            else:
+                seconds, _ = self._fit_predict(make_svm(rows, LARGE)[0], features)
+                self.stdout.write(f"{rows:>8} {'svm':>12} {'skipped':>9} {seconds:>9.2f} {'-':>10} {'-':>12}")
+
+            exact_seconds, exact_labels = self._fit_predict(make_kmeans(rows, EXACT)[0], features, clustering=True)
+            large_seconds, large_labels = self._fit_predict(make_kmeans(rows, LARGE)[0], features, clustering=True)
+            ari = adjusted_rand_score(exact_labels, large_labels)
+            self.stdout.write(f"{rows:>8} {'kmeans':>12} {exact_seconds:>9.2f} {large_seconds:>9.2f} {'-':>10} {ari:>12.3f}")
+
+    def _compare_anomalies(self, rows, name, factory, features):
+        exact_seconds, exact = self._fit_predict(factory(rows, EXACT)[0], features)
+        large_seconds, large = self._fit_predict(factory(rows, LARGE)[0], features)
+        agreement = float(np.mean(exact == large))
+        self.stdout.write(f'{rows:>8} {name:>12} {exact_seconds:>9.2f} {large_seconds:>9.2f} '
+                          f'{agreement:>10.3f} {anomaly_jaccard(exact, large):>12.3f}')
+
+    def _fit_predict(self, model, features, clustering=False):
+        started = time.perf_counter()
+        if clustering:
+            predictions = model.fit_predict(features)
+        else:
+            model.fit(features)
+            predictions = model.predict(features)
+        return time.perf_counter() - started, predictions
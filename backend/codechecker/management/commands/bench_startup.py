@@ -0,0 +1,78 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter so nothing imported by manage.py skews the numbers.
+CHILD_SCRIPT = """
+import json, resource, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+for name in sys.argv[1:]:
+    __import__(name)
+elapsed = time.perf_counter() - started
+heavy = ('pandas', 'sklearn', 'scipy', 'matplotlib', 'seaborn', 'shap', 'joblib')
+print(json.dumps({
+    'seconds': elapsed,
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'modules': len(sys.modules),
+    'heavy_loaded': [name for name in heavy if name in sys.modules],
+}))
+"""
+
+
+def parse_importtime(stderr):
+    """
+    Cumulative microseconds per top-level import from ``python -X importtime`` output.
+    """
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented under the module that triggered them.
+        if not name.startswith('  '):
+            timings[name.strip()] = int(cumulative)
+    return timings
+
+
+class Command(BaseCommand):
+    help = 'Measure Django boot latency, peak RSS and the heaviest imports of the codechecker app.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('modules', nargs='*',
+                            help='Modules to import after django.setup() (defaults to ROOT_URLCONF).')
+        parser.add_argument('--repeat', type=int, default=3, help='Number of fresh interpreters to time.')
+        parser.add_argument('--top', type=int, default=15, help='How many of the slowest imports to list.')
+
+    def handle(self, *args, **options):
+        modules = options['modules'] or [settings.ROOT_URLCONF]
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'CodeCheckerAI.settings')}
+
+        runs = []
+        importtimes = {}
+        for _ in range(options['repeat']):
+            completed = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', CHILD_SCRIPT, *modules],
+                capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+            )
+            if completed.returncode != 0:
+                raise CommandError(completed.stderr.strip().splitlines()[-1])
+            runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+            importtimes = parse_importtime(completed.stderr)
+
+        seconds = statistics.median(run['seconds'] for run in runs)
+        rss_mb = statistics.median(run['max_rss_kb'] for run in runs) / 1024
+        self.stdout.write(f"Imported {', '.join(modules)} in {seconds:.2f}s (median of {len(runs)}), "
+                          f"peak RSS {rss_mb:.0f} MB, {runs[-1]['modules']} modules loaded")
+        heavy = runs[-1]['heavy_loaded']
+        self.stdout.write(f"Heavy dependencies loaded at boot: {', '.join(heavy) if heavy else 'none'}")
+
+        self.stdout.write(f"\n{'cumulative_ms':>14}  module")
+        for name, microseconds in sorted(importtimes.items(), key=lambda item: item[1], reverse=True)[:options['top']]:
+            self.stdout.write(f'{microseconds / 1000:>14.1f}  {name}')
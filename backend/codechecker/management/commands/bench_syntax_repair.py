@@ -0,0 +1,59 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from codechecker.syntax_repair import correct_syntax_errors
+
+# (line to break, how to break it) for the four-line functions below.
+BREAKAGES = (
+    (0, lambda line: line.rstrip(':')),
+    (1, lambda line: line.rstrip(')')),
+    (1, lambda line: line.replace("')", ")")),
+    (2, lambda line: line.rstrip(']')),
+)
+
+
+def broken_source(functions, error_ratio, seed=0):
+    """
+    Build a module of small functions and break roughly error_ratio of them.
+    """
+    rng = random.Random(seed)
+    blocks = []
+    errors = 0
+    for index in range(functions):
+        lines = [
+            f'def func_{index}(arg):',
+            f"    value = compute(arg, 'key_{index}')",
+            f'    items = [value, arg + {index}]',
+            '    return items',
+        ]
+        if rng.random() < error_ratio:
+            position, breakage = rng.choice(BREAKAGES)
+            lines[position] = breakage(lines[position])
+            errors += 1
+        blocks.append('\n'.join(lines))
+    return '\n\n'.join(blocks) + '\n', errors
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the syntax repair engine on synthetic modules with many errors.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,10000',
+                            help='Comma-separated numbers of functions per module.')
+        parser.add_argument('--error-ratio', type=float, default=0.2,
+                            help='Fraction of functions to break.')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size]
+        self.stdout.write(f"{'lines':>8} {'errors':>8} {'seconds':>9} {'us/line':>9} {'parses':>7}")
+
+        for size in sizes:
+            code, errors = broken_source(size, options['error_ratio'])
+            started = time.perf_counter()
+            _, _, tree = correct_syntax_errors(code)
+            seconds = time.perf_counter() - started
+            lines = code.count('\n')
+            self.stdout.write(f"{lines:>8} {errors:>8} {seconds:>9.3f} {seconds / lines * 1e6:>9.1f} "
+                              f"{'yes' if tree is not None else 'no':>7}")
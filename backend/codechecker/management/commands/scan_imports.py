@@ -0,0 +1,73 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from codechecker.imports import iter_import_scans
+from codechecker.ml_model import iter_repo_archive
+
+SKIPPED_DIRECTORIES = frozenset({'__pycache__', 'node_modules', 'venv', 'env'})
+
+
+def iter_local_files(root):
+    """
+    (relative path, source) for every Python file under root, skipping hidden and tooling directories.
+    """
+    for directory, subdirectories, filenames in os.walk(root):
+        subdirectories[:] = sorted(
+            name for name in subdirectories if not name.startswith('.') and name not in SKIPPED_DIRECTORIES
+        )
+        for filename in sorted(filenames):
+            if filename.endswith('.py'):
+                path = os.path.join(directory, filename)
+                with open(path, encoding='utf-8', errors='replace') as source:
+                    yield os.path.relpath(path, root), source.read()
+
+
+class Command(BaseCommand):
+    help = ('Find unused imports across a local directory or a GitHub repository, '
+            'streaming one JSON line per file as results complete.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', help='A local directory or a GitHub repository URL.')
+        parser.add_argument('--fix', action='store_true',
+                            help='Rewrite local files with their unused imports removed.')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Worker processes (defaults to CODECHECKER_IMPORT_SCAN["MAX_WORKERS"]).')
+        parser.add_argument('--batch-size', type=int, default=None, help='Files sent to a worker at a time.')
+        parser.add_argument('--all', action='store_true', help='Also report files without unused imports.')
+
+    def handle(self, *args, **options):
+        target = options['target']
+        local = os.path.isdir(target)
+        if options['fix'] and not local:
+            raise CommandError('--fix only applies to local directories.')
+
+        if local:
+            files = iter_local_files(target)
+        else:
+            files = ((path, text) for path, text, _ in iter_repo_archive(target) if path.endswith('.py'))
+
+        started = time.perf_counter()
+        scanned = flagged = unused = 0
+        try:
+            for result in iter_import_scans(files, fix=options['fix'], max_workers=options['workers'],
+                                            batch_size=options['batch_size']):
+                scanned += 1
+                fixed_code = result.pop('fixed_code', None)
+                if fixed_code is not None:
+                    with open(os.path.join(target, result['path']), 'w', encoding='utf-8') as source:
+                        source.write(fixed_code)
+                    result['fixed'] = True
+                if result['unused_imports'] or 'error' in result:
+                    flagged += 1
+                    unused += len(result['unused_imports'])
+                elif not options['all']:
+                    continue
+                self.stdout.write(json.dumps(result))
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stderr.write(f'Scanned {scanned} files in {time.perf_counter() - started:.2f}s: '
+                          f'{unused} unused imports in {flagged} files')
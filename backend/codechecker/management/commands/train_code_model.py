@@ -0,0 +1,76 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from codechecker.analysis import build_context
+from codechecker.code_model import CodeAnomalyModel, code_model_options
+from codechecker.ml_model import extract_features_from_code
+from codechecker.models import CodeSnippet
+
+SKIPPED_DIRS = {'.git', '__pycache__', 'node_modules', 'venv', 'env', '.venv', '.tox'}
+
+
+def iter_corpus_files(paths):
+    """
+    Python files under the given files or directories.
+    """
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = [name for name in dirs if name not in SKIPPED_DIRS]
+            for name in files:
+                if name.endswith('.py'):
+                    yield os.path.join(root, name)
+
+
+class Command(BaseCommand):
+    help = 'Fit the code anomaly IsolationForest over a reference corpus and save it for the /check/ endpoint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help='Python files or directories making up the corpus.')
+        parser.add_argument('--from-db', action='store_true',
+                            help='Also train on the snippets stored in the CodeSnippet table.')
+        parser.add_argument('--output', help='Where to write the model (defaults to CODECHECKER_CODE_MODEL PATH).')
+        parser.add_argument('--contamination', type=float, help='Expected share of anomalous snippets.')
+        parser.add_argument('--n-estimators', type=int, help='Number of trees.')
+
+    def handle(self, *args, **options):
+        defaults = code_model_options()
+        output = options['output'] or defaults['PATH']
+        if not output:
+            raise CommandError('No output path: pass --output or set CODECHECKER_CODE_MODEL["PATH"].')
+
+        features = []
+        skipped = 0
+        for code in self._iter_corpus(options['paths'], options['from_db']):
+            context = build_context(code)
+            if context is None:
+                skipped += 1
+                continue
+            features.append(extract_features_from_code(code, context=context))
+
+        if len(features) < 2:
+            raise CommandError(f'Need at least two parseable samples to train, found {len(features)}.')
+
+        model = CodeAnomalyModel.fit(
+            features,
+            contamination=options['contamination'] or defaults['CONTAMINATION'],
+            n_estimators=options['n_estimators'] or defaults['N_ESTIMATORS'],
+        )
+        model.save(output)
+        self.stdout.write(self.style.SUCCESS(
+            f'Trained model {model.version} on {model.num_samples} samples '
+            f'({skipped} unparseable skipped) -> {output}'
+        ))
+
+    def _iter_corpus(self, paths, from_db):
+        for path in iter_corpus_files(paths):
+            try:
+                with open(path, encoding='utf-8') as source:
+                    yield source.read()
+            except (OSError, UnicodeDecodeError):
+                continue
+        if from_db:
+            yield from CodeSnippet.objects.values_list('code', flat=True).iterator()
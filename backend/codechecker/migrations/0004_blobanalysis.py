@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codechecker', '0003_codesnippet_code_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlobAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha', models.CharField(max_length=40)),
+                ('analyzer_version', models.CharField(max_length=20)),
+                ('analysis', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'unique_together': {('sha', 'analyzer_version')},
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codechecker', '0005_analysisjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Repository',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('owner', models.CharField(max_length=100)),
+                ('name', models.CharField(max_length=100)),
+                ('tree_sha', models.CharField(blank=True, default='', max_length=40)),
+                ('scanned_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'unique_together': {('owner', 'name')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RepositoryFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=1024)),
+                ('sha', models.CharField(max_length=40)),
+                ('repository', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='files', to='codechecker.repository')),
+            ],
+            options={
+                'unique_together': {('repository', 'path')},
+            },
+        ),
+    ]
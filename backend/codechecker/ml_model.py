@@ -1,21 +1,25 @@
-import random
 import requests
-import re
-from sklearn.ensemble import IsolationForest
+import tarfile
+from django.conf import settings
 import numpy as np
-from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.svm import OneClassSVM
-from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
 from collections import Counter
-from .utils import remove_unused_imports
-from datetime import datetime, timedelta
-from collections import defaultdict
-import matplotlib.pyplot as plt
-from io import BytesIO
-import base64
-import os
+from .utils import find_unused_imports, remove_unused_imports
+from .analysis import build_context
+from .charts import register_chart
+from .clones import similar_pairs
+from .code_model import get_code_model
+from .fingerprints import FingerprintIndex, fingerprint_code
+from .github import DEFAULT_GITHUB, get_github_client, parse_repo_url
+from .instrumentation import stage
+from .keywords import KeywordHistogram
+from .lazy import lazy_module
+from .security import security_engine
+from django.utils.dateparse import parse_date, parse_datetime
+
+sklearn_cluster = lazy_module('sklearn.cluster')
+sklearn_decomposition = lazy_module('sklearn.decomposition')
+sklearn_ensemble = lazy_module('sklearn.ensemble')
+sklearn_text = lazy_module('sklearn.feature_extraction.text')
 
 
 def preprocess_code_for_analysis(code):
@@ -34,7 +38,7 @@ def analyze_code_snippets(code_snippets):
     features = [extract_features_from_code(code) for code in cleaned_snippets]
     features = np.array(features)
     
-    model = IsolationForest(contamination=0.1)
+    model = sklearn_ensemble.IsolationForest(contamination=0.1)
     model.fit(features)
     
     anomalies = model.predict(features)
@@ -48,16 +52,19 @@ def reduce_features_with_pca(code_snippets, n_components=2):
     features = [extract_features_from_code(code) for code in code_snippets]
     features = np.array(features)
     
-    pca = PCA(n_components=n_components)
+    pca = sklearn_decomposition.PCA(n_components=n_components)
     reduced_features = pca.fit_transform(features)
     
     return reduced_features
 
-def detect_code_clusters(code_snippets, n_clusters=5):
+@stage('kmeans')
+def detect_code_clusters(code_snippets, n_clusters=5, contexts=None):
     """
     Detect clusters in code snippets using KMeans.
     """
-    features = [extract_features_from_code(code) for code in code_snippets]
+    if contexts is None:
+        contexts = [None] * len(code_snippets)
+    features = [extract_features_from_code(code, context=context) for code, context in zip(code_snippets, contexts)]
     features = np.array(features)
     
     n_clusters = min(n_clusters, len(code_snippets))
@@ -65,7 +72,7 @@ def detect_code_clusters(code_snippets, n_clusters=5):
     if n_clusters < 1:
         raise ValueError("Number of clusters must be at least 1.")
     
-    model = KMeans(n_clusters=n_clusters)
+    model = sklearn_cluster.KMeans(n_clusters=n_clusters)
     model.fit(features)
     
     labels = model.labels_
@@ -77,51 +84,98 @@ def detect_code_clusters(code_snippets, n_clusters=5):
     }
 
 
+@stage('tfidf')
 def compute_code_embeddings(code_snippets):
     """
     Compute TF-IDF embeddings for a list of code snippets.
     """
-    vectorizer = TfidfVectorizer()
+    vectorizer = sklearn_text.TfidfVectorizer()
     X = vectorizer.fit_transform(code_snippets)
     return X
 
+@stage('code_clones')
 def detect_code_clones(code_snippets, threshold=0.9):
     """
     Detect code clones by comparing the similarity of code snippets.
     """
     embeddings = compute_code_embeddings(code_snippets)
-    similarity_matrix = cosine_similarity(embeddings)
-
-    clones = []
-    num_snippets = len(code_snippets)
-    for i in range(num_snippets):
-        for j in range(i + 1, num_snippets):
-            if similarity_matrix[i, j] > threshold:
-                clones.append({
-                    'snippet1': code_snippets[i],
-                    'snippet2': code_snippets[j],
-                    'similarity': similarity_matrix[i, j]
-                })
-    return clones
+    rows, cols, similarities = similar_pairs(embeddings, threshold)
+
+    return [
+        {
+            'snippet1': code_snippets[i],
+            'snippet2': code_snippets[j],
+            'similarity': float(similarity),
+        }
+        for i, j, similarity in zip(rows.tolist(), cols.tolist(), similarities.tolist())
+    ]
+
+def find_clone_pairs(embeddings, threshold=0.9):
+    """
+    Return (i, j, similarity) for every snippet pair whose similarity exceeds the threshold.
+    """
+    rows, cols, similarities = similar_pairs(embeddings, threshold)
+    return list(zip(rows.tolist(), cols.tolist(), similarities.tolist()))
+
+def analyze_snippet_batch(code_snippets, threshold=0.9, n_clusters=5, contexts=None):
+    """
+    Fit the TF-IDF, similarity and KMeans models once over a batch of snippets.
+    """
+    try:
+        embeddings = compute_code_embeddings(code_snippets)
+        clone_pairs = find_clone_pairs(embeddings, threshold)
+    except ValueError:
+        # TfidfVectorizer refuses a batch without a single token.
+        clone_pairs = []
+
+    clusters = detect_code_clusters(code_snippets, n_clusters=n_clusters, contexts=contexts)
+
+    structural_index = FingerprintIndex()
+    for position, context in enumerate(contexts or []):
+        if context is not None:
+            structural_index.add(position, code_snippets[position], context=context)
+
+    return {
+        'clone_pairs': clone_pairs,
+        'structural_index': structural_index,
+        'labels': clusters['labels'].tolist(),
+        'cluster_centers': clusters['cluster_centers'].tolist(),
+    }
 
+@stage('keywords')
 def extract_keywords_from_code(code):
     """
     Extract keywords from a single code snippet.
     """
-    vectorizer = CountVectorizer(stop_words='english')
-    X = vectorizer.fit_transform([code])
+    vectorizer = sklearn_text.CountVectorizer(stop_words='english')
+    try:
+        vectorizer.fit_transform([code])
+    except ValueError:
+        # Nothing but stop words or one-character tokens.
+        return []
     return vectorizer.get_feature_names_out()
 
-def detect_code_smells(code):
+@stage('code_smells')
+def detect_code_smells(code, context=None):
     """
     Detect code smells in a single code snippet.
     """
-    lines = code.splitlines()
-    metrics = {
-        'line_count': len(lines),
-        'method_count': code.count('def '),
-        'complexity': sum(line.count('if ') + line.count('else') for line in lines)
-    }
+    if context is None:
+        context = build_context(code)
+
+    if context is not None:
+        metrics = {
+            'line_count': context.line_count,
+            'method_count': context.function_count,
+            'complexity': context.branch_count,
+        }
+    else:
+        lines = code.splitlines()
+        metrics = {
+            'line_count': len(lines),
+            'method_count': code.count('def '),
+            'complexity': sum(line.count('if ') + line.count('else') for line in lines)
+        }
     
     smells = []
     if metrics['line_count'] > 100:
@@ -135,6 +189,7 @@ def detect_code_smells(code):
 
 DEPRECATED_LIBRARIES = {'oldlib': '1.0.0'}
 
+@stage('deprecated_libraries')
 def detect_deprecated_libraries(code):
     """
     Detect deprecated libraries used in the code.
@@ -149,99 +204,163 @@ def detect_deprecated_libraries(code):
             })
     return deprecated
 
+@stage('keyword_distribution')
 def analyze_code(code, visualization_type):
     """
     Analyze a single code snippet and prepare data for visualization.
     """
-    keywords = re.findall(r'\b\w+\b', code)
-    keyword_counts = Counter(keywords)
-    
-    labels = list(keyword_counts.keys())
-    data = list(keyword_counts.values())
-    
-    return {
-        'labels': labels,
-        'data': data,
-    }
+    return KeywordHistogram.from_code(code).distribution()
 
-def analyze_github_repo(repo_url):
+@stage('github.repository')
+def analyze_github_repo(repo_url, client=None):
     """
     Analyze a GitHub repository by fetching and returning relevant data.
     """
-    pattern = re.compile(r'^https://github\.com/([^/]+)/([^/]+)(?:\.git)?$', re.IGNORECASE)
-    match = pattern.match(repo_url)
-    
-    if not match:
-        raise ValueError("Invalid GitHub URL. URL should be in the format 'https://github.com/owner/repo'.")
-    
-    owner, repo = match.groups()
-    
-    api_url = f'https://api.github.com/repos/{owner}/{repo}'
+    owner, repo = parse_repo_url(repo_url)
+    client = client or get_github_client()
     
     try:
-        response = requests.get(api_url)
-        response.raise_for_status()
-        repo_data = response.json()
-        
-        analysis_result = {
-            'repository': repo_url,
-            'name': repo_data.get('name', 'No name available'),
-            'owner': repo_data.get('owner', {}).get('login', 'No owner available'),
-            'description': repo_data.get('description', 'No description available'),
-            'stars': repo_data.get('stargazers_count', 0),
-            'forks': repo_data.get('forks_count', 0),
-        }
-        
-        return analysis_result
-    
+        return summarize_repo_data(repo_url, client.get_json(client.repo_api_url(owner, repo)))
     except requests.RequestException as e:
         raise ValueError(f"Error fetching repository data: {e}")
 
-def fetch_repo_contents(repo_url):
+def summarize_repo_data(repo_url, repo_data):
+    """
+    The repository metadata reported to the client, from the GitHub API's repository object.
+    """
+    return {
+        'repository': repo_url,
+        'name': repo_data.get('name', 'No name available'),
+        'owner': repo_data.get('owner', {}).get('login', 'No owner available'),
+        'description': repo_data.get('description', 'No description available'),
+        'stars': repo_data.get('stargazers_count', 0),
+        'forks': repo_data.get('forks_count', 0),
+    }
+
+@stage('github.contents')
+def list_repo_files(repo_url, client=None):
+    """
+    List the top-level files of a GitHub repository with their blob SHAs and download URLs.
+    """
+    owner, repo = parse_repo_url(repo_url)
+    client = client or get_github_client()
+
+    try:
+        contents = client.get_json(client.repo_api_url(owner, repo, '/contents'))
+    except requests.RequestException as e:
+        raise ValueError(f"Error fetching repository contents: {e}")
+
+    return [item for item in contents if item['type'] == 'file']
+
+def fetch_repo_contents(repo_url, client=None):
     """
     Fetch the contents of a GitHub repository.
     """
-    pattern = re.compile(r'https://github\.com/([^/]+)/([^/]+)', re.IGNORECASE)
-    match = pattern.match(repo_url)
-    
-    if not match:
-        raise ValueError("Invalid GitHub URL.")
-    
-    owner, repo = match.groups()
-    
-    api_url = f'https://api.github.com/repos/{owner}/{repo}/contents'
+    client = client or get_github_client()
+    files = list_repo_files(repo_url, client)
     
     try:
-        response = requests.get(api_url)
-        response.raise_for_status()
-        contents = response.json()
-        
-        files = [item for item in contents if item['type'] == 'file']
-        file_contents = {}
-        
-        for file in files:
-            file_url = file['download_url']
-            file_response = requests.get(file_url)
-            file_contents[file['name']] = file_response.text
-        
-        return file_contents
-    
+        texts = client.download_all([file['download_url'] for file in files])
     except requests.RequestException as e:
         raise ValueError(f"Error fetching repository contents: {e}")
+        
+    return {file['name']: text for file, text in zip(files, texts)}
+
+def iter_repo_archive(repo_url, client=None, ref=''):
+    """
+    Stream the files of a GitHub repository from its tarball as (path, text, blob_sha).
+    """
+    owner, repo = parse_repo_url(repo_url)
+    client = client or get_github_client()
+    options = {**DEFAULT_GITHUB, **getattr(settings, 'CODECHECKER_GITHUB', {})}
+
+    try:
+        yield from client.iter_archive(
+            owner, repo, ref=ref,
+            extensions=options['ARCHIVE_EXTENSIONS'],
+            max_file_size=options['ARCHIVE_MAX_FILE_SIZE'],
+        )
+    except (requests.RequestException, tarfile.TarError) as e:
+        raise ValueError(f"Error fetching repository archive: {e}")
+
+@stage('github.tree')
+def list_repo_tree(repo_url, client=None, ref='HEAD'):
+    """
+    The repository's recursive git tree as (tree_sha, {path: blob_sha}, truncated),
+    keeping only files matching the configured extensions and size limit.
+    """
+    owner, repo = parse_repo_url(repo_url)
+    client = client or get_github_client()
+
+    try:
+        tree = client.get_tree(owner, repo, ref)
+    except requests.RequestException as e:
+        raise ValueError(f"Error fetching repository tree: {e}")
+    return filter_repo_tree(tree)
+
+def filter_repo_tree(tree):
+    """
+    Reduce a git tree API response to (tree_sha, {path: blob_sha}, truncated) for the files worth analyzing.
+    """
+    options = {**DEFAULT_GITHUB, **getattr(settings, 'CODECHECKER_GITHUB', {})}
+    extensions = tuple(options['ARCHIVE_EXTENSIONS'])
+    files = {
+        entry['path']: entry['sha'] for entry in tree['tree']
+        if entry['type'] == 'blob'
+        and entry.get('size', 0) <= options['ARCHIVE_MAX_FILE_SIZE']
+        and (not extensions or entry['path'].endswith(extensions))
+    }
+    return tree['sha'], files, tree.get('truncated', False)
+
+def analyze_code_file(filename, content):
+    """
+    Analyze a single code file from a repository.
+    """
+    if 'import' in content:
+        return "Contains import statements. Check for unused imports."
+    return "No issues detected."
+
+@stage('repo_file')
+def analyze_repo_file(filename, content):
+    """
+    Everything the repository scan reports for one file.
+    """
+    result = {
+        'analysis': analyze_code_file(filename, content),
+        'vulnerabilities': [],
+        'keywords': {},
+        'code_smells': [],
+        'unused_imports': [],
+        'fingerprints': [],
+    }
+    if not filename.endswith('.py'):
+        return result
+
+    result['keywords'] = dict(KeywordHistogram.from_code(content).counts)
+    context = build_context(content)
+    if context is not None:
+        result['vulnerabilities'] = detect_file_vulnerabilities(filename, content, context=context)
+        result['code_smells'] = detect_code_smells(content, context=context)
+        result['unused_imports'] = find_unused_imports(content, context=context)
+        # Stored without a source: the same blob can live at several paths.
+        result['fingerprints'] = [
+            [fingerprint.digest, fingerprint.name, fingerprint.lineno, fingerprint.size]
+            for fingerprint in fingerprint_code(content, context=context)
+        ]
+    return result
 
 def analyze_code_contents(code_contents):
     """
     Analyze the contents of code files from a repository.
     """
-    analysis_results = {}
-    
-    for filename, content in code_contents.items():
-        if 'import' in content:
-            analysis_results[filename] = "Contains import statements. Check for unused imports."
-        else:
-            analysis_results[filename] = "No issues detected."
-    
-    return analysis_results
+    return {filename: analyze_code_file(filename, content) for filename, content in code_contents.items()}
+
+@stage('security_scan')
+def detect_file_vulnerabilities(filename, code, context=None):
+    """
+    Detect security vulnerabilities in a single file with the AST rule engine.
+    """
+    return security_engine.scan(code, filename, context=context)
 
 def detect_security_vulnerabilities(code_contents):
     """
@@ -249,20 +368,21 @@ def detect_security_vulnerabilities(code_contents):
     """
     vulnerabilities = []
     for filename, code in code_contents.items():
-        if "eval(" in code:
-            vulnerabilities.append({
-                'issue': 'Use of eval()',
-                'description': 'The use of eval() is dangerous as it can execute arbitrary code.',
-                'severity': 'High'
-            })
+        vulnerabilities.extend(detect_file_vulnerabilities(filename, code))
     return vulnerabilities
 
-def extract_features_from_code(code: str) -> dict:
+def extract_features_from_code(code: str, context=None) -> dict:
     """
     Extract features from the code snippet.
     """
     if not isinstance(code, str):
         raise TypeError("Expected code to be a string.")
+
+    if context is None:
+        context = build_context(code)
+
+    if context is not None:
+        return [context.line_count, context.avg_line_length, context.import_count, context.function_count]
     
     num_lines = len(code.split('\n'))
     line_lengths = [len(line) for line in code.split('\n')]
@@ -272,9 +392,10 @@ def extract_features_from_code(code: str) -> dict:
     
     return [num_lines, avg_line_length, num_imports, num_functions]
 
-def detect_anomalies(user_code):
+@stage('anomaly_detection')
+def detect_anomalies(user_code, context=None):
     """
-    Detect anomalies in code using Isolation Forest.
+    Detect anomalies in code using the Isolation Forest trained by manage.py train_code_model.
     """
     if isinstance(user_code, list):
         user_code = '\n'.join(user_code)
@@ -282,86 +403,76 @@ def detect_anomalies(user_code):
     if not isinstance(user_code, str):
         raise TypeError("user_code should be a string or a list of strings.")
     
-    features = extract_features_from_code(user_code)
-    features = np.array([features])
-    
-    model = IsolationForest(contamination=0.1)
-    model.fit(features)
-    
-    anomaly = model.predict(features)
-    
-    return anomaly[0] == -1
+    model = get_code_model()
+    if model is None:
+        return False
+
+    features = extract_features_from_code(user_code, context=context)
+    return bool(model.score([features])[0] < 0)
 
-def detect_code_clones(code_snippets):
+def iter_commits(repo_url, client=None, since=None, until=None, max_pages=None, per_page=100):
     """
-    Detect code clones by comparing the similarity of code snippets.
+    Lazily iterate over the commits of a GitHub repository, page by page.
     """
-    embeddings = compute_code_embeddings(code_snippets)
-    similarity_matrix = cosine_similarity(embeddings)
-
-    clones = []
-    num_snippets = len(code_snippets)
-    for i in range(num_snippets):
-        for j in range(i + 1, num_snippets):
-            if similarity_matrix[i, j] > 0.9:
-                clones.append({
-                    'snippet1': code_snippets[i],
-                    'snippet2': code_snippets[j],
-                    'similarity': similarity_matrix[i, j]
-                })
-    return clones
-
-def fetch_commits(repo_url):
+    owner, repo, params, max_pages = commits_request(repo_url, since, until, max_pages, per_page)
+    client = client or get_github_client()
+
+    try:
+        yield from client.iter_pages(client.repo_api_url(owner, repo, '/commits'), params=params, max_pages=max_pages)
+    except requests.HTTPError as e:
+        raise ValueError(f"Error fetching commits: {e.response.status_code} Client Error")
+    except requests.RequestException as e:
+        raise ValueError(f"Error fetching commits: {e}")
+
+def commits_request(repo_url, since=None, until=None, max_pages=None, per_page=100):
     """
-    Fetch commits from the provided GitHub repository URL.
+    Validate a commit listing request and return its (owner, repo, query params, max pages).
     """
-    if repo_url.startswith('https://github.com/'):
-        repo_path = repo_url[len('https://github.com/'):]
-    else:
+    if not repo_url.startswith('https://github.com/'):
         raise ValueError('Invalid GitHub repository URL')
 
-    api_url = f'https://api.github.com/repos/{repo_path}/commits'
-    
-    response = requests.get(api_url)
-    
-    if response.status_code == 200:
-        return response.json()
-    else:
-        raise ValueError(f"Error fetching commits: {response.status_code} Client Error")
+    owner, repo = parse_repo_url(repo_url)
+    if max_pages is None:
+        max_pages = {**DEFAULT_GITHUB, **getattr(settings, 'CODECHECKER_GITHUB', {})}['COMMIT_MAX_PAGES']
+    max_pages = int(max_pages)
 
+    params = {'per_page': per_page}
+    for name, value in (('since', since), ('until', until)):
+        if value:
+            if parse_datetime(value) is None and parse_date(value) is None:
+                raise ValueError(f"Invalid '{name}' date: {value}")
+            params[name] = value
+    return owner, repo, params, max_pages
+
+def fetch_commits(repo_url, client=None, since=None, until=None, max_pages=None):
+    """
+    Fetch commits from the provided GitHub repository URL.
+    """
+    return list(iter_commits(repo_url, client, since=since, until=until, max_pages=max_pages))
+
+@stage('github.commits')
 def count_commits_per_day(commits):
     """
-    Count the number of commits per day from a list of commit data.
+    Count the number of commits per day from an iterable of commit data.
+
+    Commits are consumed one at a time, so a lazy iterator such as
+    iter_commits is summarized without ever being materialised.
     """
-    commit_dates = [commit['commit']['committer']['date'][:10] for commit in commits]
-    date_counts = defaultdict(int)
+    date_counts = Counter()
     
-    for date in commit_dates:
-        date_counts[date] += 1
+    for commit in commits:
+        date_counts[commit['commit']['committer']['date'][:10]] += 1
     
     return dict(date_counts)
 
 def visualize_commit_counts(commit_counts):
     """
-    Visualize the number of commits per day.
+    Register a chart of the number of commits per day and return its URL.
     """
     if not commit_counts:
         return None
     
-    dates = list(commit_counts.keys())
-    counts = list(commit_counts.values())
-    
-    plt.figure(figsize=(10, 6))
-    plt.bar(dates, counts)
-    plt.xlabel('Date')
-    plt.ylabel('Number of Commits')
-    plt.title('Number of Commits per Day')
-    plt.xticks(rotation=45)
-    
-    buffer = BytesIO()
-    plt.savefig(buffer, format='png')
-    plt.close()
-    buffer.seek(0)
-    plot_data = base64.b64encode(buffer.getvalue()).decode('utf-8')
-    
-    return plot_data
\ No newline at end of file
+    return register_chart('commit_counts', {
+        'dates': list(commit_counts.keys()),
+        'counts': list(commit_counts.values()),
+    })
\ No newline at end of file
@@ -1,8 +1,11 @@
+import uuid
+
 from django.db import models
 
 class CodeSnippet(models.Model):
     code = models.TextField()
     result = models.TextField()
+    code_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
 
 class AnalysisResult(models.Model):
     snippet = models.ForeignKey(CodeSnippet, on_delete=models.CASCADE, related_name='analysis_results')
@@ -11,3 +14,73 @@ class AnalysisResult(models.Model):
 
     def __str__(self):
         return f"Analysis for CodeSnippet {self.snippet.id}"
+
+
+class BlobAnalysis(models.Model):
+    sha = models.CharField(max_length=40)
+    analyzer_version = models.CharField(max_length=20)
+    analysis = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('sha', 'analyzer_version')
+
+    def __str__(self):
+        return f"Analysis for blob {self.sha}"
+
+
+class Repository(models.Model):
+    owner = models.CharField(max_length=100)
+    name = models.CharField(max_length=100)
+    tree_sha = models.CharField(max_length=40, blank=True, default='')
+    scanned_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('owner', 'name')
+
+    def __str__(self):
+        return f"{self.owner}/{self.name}"
+
+
+class RepositoryFile(models.Model):
+    repository = models.ForeignKey(Repository, on_delete=models.CASCADE, related_name='files')
+    path = models.CharField(max_length=1024)
+    sha = models.CharField(max_length=40)
+
+    class Meta:
+        unique_together = ('repository', 'path')
+
+    def __str__(self):
+        return f"{self.repository}:{self.path} @ {self.sha}"
+
+
+class AnalysisJob(models.Model):
+    KIND_REPOSITORY = 'repository'
+    KIND_DATASET = 'dataset'
+    KIND_CHOICES = [
+        (KIND_REPOSITORY, 'Repository'),
+        (KIND_DATASET, 'Dataset'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    progress = models.CharField(max_length=200, blank=True, default='')
+    result = models.TextField(blank=True, default='')
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} job {self.id} ({self.status})"
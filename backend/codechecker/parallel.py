@@ -0,0 +1,162 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from django.conf import settings
+
+from . import instrumentation
+from .workers import init_django_worker
+
+DEFAULT_DATASET_PARALLEL = {
+    # None means one worker per stage, capped at the number of CPUs.
+    'MAX_WORKERS': None,
+    'MIN_ROWS': 5000,
+}
+
+DEFAULT_FILE_ANALYSIS = {
+    # None means one worker per CPU.
+    'MAX_WORKERS': None,
+}
+
+# Stage name -> (DatasetCheckView method, whether it takes the original row indices).
+DATASET_STAGES = {
+    'iso_forest': ('detect_anomalies_with_iso_forest', True),
+    'svm': ('detect_anomalies_with_svm', True),
+    'clustering': ('perform_clustering', False),
+}
+
+
+def _options():
+    return {**DEFAULT_DATASET_PARALLEL, **getattr(settings, 'CODECHECKER_DATASET_PARALLEL', {})}
+
+
+def _max_workers():
+    return _options()['MAX_WORKERS'] or min(len(DATASET_STAGES), os.cpu_count() or 1)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_stage_executor():
+    """
+    Return the process pool that runs dataset detector stages, starting it on first use.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=_max_workers(),
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=init_django_worker,
+                )
+    return _executor
+
+
+_file_executor = None
+_file_executor_lock = threading.Lock()
+
+
+def get_file_analysis_executor():
+    """
+    Return the process pool async views hand per-file analysis to, starting it on first use.
+
+    Analysis is CPU-bound; running it on the event loop would stall every
+    other request the process is serving, and a thread would still hold
+    the GIL against them.
+    """
+    global _file_executor
+    if _file_executor is None:
+        with _file_executor_lock:
+            if _file_executor is None:
+                options = {**DEFAULT_FILE_ANALYSIS, **getattr(settings, 'CODECHECKER_FILE_ANALYSIS', {})}
+                _file_executor = ProcessPoolExecutor(
+                    max_workers=options['MAX_WORKERS'] or os.cpu_count() or 1,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=init_django_worker,
+                )
+    return _file_executor
+
+
+def _call_stage(view, stage, features, row_indices):
+    method, takes_indices = DATASET_STAGES[stage]
+    with instrumentation.stage(f'dataset.{stage}') as timing:
+        if takes_indices:
+            result = getattr(view, method)(features, row_indices)
+        else:
+            result = getattr(view, method)(features)
+    return result, timing
+
+
+def _run_stage_in_worker(stage, features_path, indices_path):
+    """
+    Worker entry point: map the shared arrays read-only and run one stage.
+
+    Returns the stage's result, its timing and every stage timed inside
+    the worker, for the web process to record.
+    """
+    from .views import DatasetCheckView
+
+    features = np.load(features_path, mmap_mode='r')
+    row_indices = np.load(indices_path, mmap_mode='r')
+    with instrumentation.collect_timings() as timings:
+        result, timing = _call_stage(DatasetCheckView(), stage, features, row_indices)
+    return result, timing, timings.records
+
+
+def run_dataset_stages(view, features, row_indices, progress=None):
+    """
+    Run every dataset detector stage and return (merged results, per-stage seconds).
+
+    Large inputs are written once to memory-mapped .npy files that every
+    worker maps read-only, so the feature matrix is shared through the page
+    cache instead of being pickled to each process; the stages (including
+    their chart rendering) then run side by side and wall-clock time tracks
+    the slowest one. Small inputs run inline, where process overhead would
+    dominate, as do single-CPU hosts.
+    """
+    progress = progress or (lambda message: None)
+    options = _options()
+    results = {}
+    timings = {}
+    started = time.perf_counter()
+
+    if _max_workers() <= 1 or len(features) < options['MIN_ROWS']:
+        for stage in DATASET_STAGES:
+            progress(f'Running {stage}')
+            result, timing = _call_stage(view, stage, features, row_indices)
+            timings[stage] = timing.wall
+            results.update(result)
+    else:
+        progress('Running detectors in parallel')
+        shared_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+        directory = tempfile.mkdtemp(prefix='codechecker-dataset-', dir=shared_dir)
+        try:
+            features_path = os.path.join(directory, 'features.npy')
+            indices_path = os.path.join(directory, 'row_indices.npy')
+            np.save(features_path, np.ascontiguousarray(features))
+            np.save(indices_path, np.ascontiguousarray(row_indices))
+
+            executor = get_stage_executor()
+            futures = {
+                stage: executor.submit(_run_stage_in_worker, stage, features_path, indices_path)
+                for stage in DATASET_STAGES
+            }
+            for stage, future in futures.items():
+                result, timing, records = future.result()
+                for record in records:
+                    instrumentation.record_stage(record)
+                timings[stage] = timing.wall
+                results.update(result)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    timings = {stage: round(seconds, 3) for stage, seconds in timings.items()}
+    timings['wall'] = round(time.perf_counter() - started, 3)
+    return results, timings
@@ -0,0 +1,78 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import SHA_LOOKUP_BATCH
+from .instrumentation import stage
+from .models import Repository, RepositoryFile
+
+
+class TreeDiff:
+    """
+    Difference between a repository's current tree and its stored index.
+
+    Each attribute maps path -> blob SHA; removed holds the SHAs the index
+    had for paths that no longer exist.
+    """
+
+    def __init__(self, added, changed, removed, unchanged):
+        self.added = added
+        self.changed = changed
+        self.removed = removed
+        self.unchanged = unchanged
+
+    def stats(self):
+        return {
+            'added': len(self.added),
+            'changed': len(self.changed),
+            'removed': len(self.removed),
+            'unchanged': len(self.unchanged),
+        }
+
+
+def get_repository(owner, name):
+    repository, _ = Repository.objects.get_or_create(owner=owner, name=name)
+    return repository
+
+
+@stage('repo_index.diff')
+def diff_tree(repository, files):
+    """
+    Compare {path: sha} from the latest tree with the paths indexed for the repository.
+    """
+    indexed = dict(repository.files.values_list('path', 'sha'))
+    added, changed, unchanged = {}, {}, {}
+    for path, sha in files.items():
+        if path not in indexed:
+            added[path] = sha
+        elif indexed[path] != sha:
+            changed[path] = sha
+        else:
+            unchanged[path] = sha
+    removed = {path: sha for path, sha in indexed.items() if path not in files}
+    return TreeDiff(added, changed, removed, unchanged)
+
+
+@stage('repo_index.update')
+def update_index(repository, diff, tree_sha):
+    """
+    Apply a diff to the stored index, touching only the rows that changed.
+    """
+    with transaction.atomic():
+        removed = list(diff.removed)
+        for start in range(0, len(removed), SHA_LOOKUP_BATCH):
+            repository.files.filter(path__in=removed[start:start + SHA_LOOKUP_BATCH]).delete()
+        # One upsert covers added and changed paths; it also tolerates a
+        # concurrent scan of the same repository having indexed them first.
+        RepositoryFile.objects.bulk_create(
+            [
+                RepositoryFile(repository=repository, path=path, sha=sha)
+                for path, sha in {**diff.added, **diff.changed}.items()
+            ],
+            batch_size=SHA_LOOKUP_BATCH,
+            update_conflicts=True,
+            unique_fields=['repository', 'path'],
+            update_fields=['sha'],
+        )
+        repository.tree_sha = tree_sha
+        repository.scanned_at = timezone.now()
+        repository.save(update_fields=['tree_sha', 'scanned_at'])
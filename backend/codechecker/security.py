@@ -0,0 +1,273 @@
+import ast
+import re
+from collections import defaultdict
+
+from .analysis import build_context
+
+SEVERITY_HIGH = 'High'
+SEVERITY_MEDIUM = 'Medium'
+
+SECRET_NAME_PATTERN = re.compile(
+    r'(passw(or)?d|passwd|pwd|secret|token|api_?key|access_?key|private_?key|auth_?key|credentials?)$',
+    re.IGNORECASE,
+)
+# Values that are obviously placeholders rather than real secrets.
+PLACEHOLDER_PATTERN = re.compile(r'^(|x+|\*+|changeme|change_me|password|secret|none|null|todo|<.*>|\$\{.*\})$', re.IGNORECASE)
+SQL_PATTERN = re.compile(
+    r'^\s*(select\s.*\sfrom\s|insert\s+into\s|update\s.*\sset\s|delete\s+from\s|(create|drop|alter)\s+table\s)',
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+class FileScan:
+    """
+    State of one file's traversal: resolved import aliases and the findings so far.
+    """
+
+    def __init__(self, filename, context):
+        self.filename = filename
+        self.findings = []
+        # Nodes already covered by a finding on an enclosing node.
+        self.covered = set()
+        self.aliases = {}
+        for record in context.imports:
+            if record.is_from:
+                if record.node.module and not record.node.level:
+                    self.aliases[record.bound_name] = f'{record.node.module}.{record.alias.name}'
+            elif record.alias.asname:
+                self.aliases[record.bound_name] = record.alias.name
+
+    def qualified_name(self, node):
+        """
+        Dotted name a Name/Attribute expression refers to, with import aliases resolved.
+        """
+        if isinstance(node, ast.Name):
+            return self.aliases.get(node.id, node.id)
+        if isinstance(node, ast.Attribute):
+            base = self.qualified_name(node.value)
+            return f'{base}.{node.attr}' if base else None
+        return None
+
+    def report(self, rule, node):
+        self.findings.append({
+            'rule': rule.id,
+            'issue': rule.issue,
+            'description': rule.description,
+            'severity': rule.severity,
+            'file': self.filename,
+            'line': node.lineno,
+            'column': node.col_offset + 1,
+        })
+
+
+class Rule:
+    """
+    A security check run against every AST node of the types it declares.
+    """
+    id = ''
+    issue = ''
+    description = ''
+    severity = SEVERITY_MEDIUM
+    node_types = ()
+
+    def matches(self, node, scan):
+        raise NotImplementedError
+
+
+class CallRule(Rule):
+    """
+    Flags calls to any of a set of fully qualified functions.
+    """
+    node_types = (ast.Call,)
+    functions = frozenset()
+
+    def matches(self, node, scan):
+        return scan.qualified_name(node.func) in self.functions
+
+
+class EvalExecRule(CallRule):
+    id = 'eval-exec'
+    issue = 'Use of eval() or exec()'
+    description = 'eval() and exec() run arbitrary code; never pass them data an attacker can influence.'
+    severity = SEVERITY_HIGH
+    functions = frozenset({'eval', 'exec', 'builtins.eval', 'builtins.exec'})
+
+
+class PickleLoadsRule(CallRule):
+    id = 'pickle-loads'
+    issue = 'Deserialization with pickle'
+    description = 'Unpickling untrusted data can execute arbitrary code; use a data-only format such as JSON.'
+    severity = SEVERITY_HIGH
+    functions = frozenset({
+        'pickle.load', 'pickle.loads', 'cPickle.load', 'cPickle.loads',
+        'dill.load', 'dill.loads', 'pandas.read_pickle',
+    })
+
+
+class SubprocessShellRule(Rule):
+    id = 'subprocess-shell'
+    issue = 'subprocess call with shell=True'
+    description = 'Running commands through the shell enables shell injection; pass an argument list instead.'
+    severity = SEVERITY_HIGH
+    node_types = (ast.Call,)
+    functions = frozenset({
+        'subprocess.call', 'subprocess.run', 'subprocess.Popen', 'subprocess.check_call', 'subprocess.check_output',
+    })
+    # These always go through the shell.
+    shell_functions = frozenset({'subprocess.getoutput', 'subprocess.getstatusoutput'})
+
+    def matches(self, node, scan):
+        name = scan.qualified_name(node.func)
+        if name in self.shell_functions:
+            return True
+        if name not in self.functions:
+            return False
+        for keyword in node.keywords:
+            if keyword.arg == 'shell':
+                return not (isinstance(keyword.value, ast.Constant) and not keyword.value.value)
+        return False
+
+
+class YamlLoadRule(Rule):
+    id = 'yaml-load'
+    issue = 'yaml.load without a safe loader'
+    description = 'yaml.load can construct arbitrary Python objects; use yaml.safe_load or Loader=yaml.SafeLoader.'
+    severity = SEVERITY_MEDIUM
+    node_types = (ast.Call,)
+    functions = frozenset({'yaml.load', 'yaml.load_all', 'yaml.unsafe_load', 'yaml.unsafe_load_all'})
+    safe_loaders = frozenset({'yaml.SafeLoader', 'yaml.CSafeLoader', 'yaml.BaseLoader', 'yaml.CBaseLoader'})
+
+    def matches(self, node, scan):
+        name = scan.qualified_name(node.func)
+        if name not in self.functions:
+            return False
+        if name.startswith('yaml.unsafe_'):
+            return True
+        loader = next((keyword.value for keyword in node.keywords if keyword.arg == 'Loader'), None)
+        if loader is None and len(node.args) > 1:
+            loader = node.args[1]
+        return loader is None or scan.qualified_name(loader) not in self.safe_loaders
+
+
+class HardcodedSecretRule(Rule):
+    id = 'hardcoded-secret'
+    issue = 'Hard-coded secret'
+    description = 'Credentials in source code leak through version control; load them from the environment or a vault.'
+    severity = SEVERITY_MEDIUM
+    node_types = (ast.Assign, ast.AnnAssign, ast.keyword, ast.Dict)
+
+    def matches(self, node, scan):
+        if isinstance(node, ast.Dict):
+            return any(
+                isinstance(key, ast.Constant) and isinstance(key.value, str)
+                and self._is_secret(key.value, value)
+                for key, value in zip(node.keys, node.values)
+            )
+        if isinstance(node, ast.keyword):
+            return node.arg is not None and self._is_secret(node.arg, node.value)
+        targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+        return any(self._is_secret(self._target_name(target), node.value) for target in targets)
+
+    def _target_name(self, target):
+        if isinstance(target, ast.Name):
+            return target.id
+        if isinstance(target, ast.Attribute):
+            return target.attr
+        return None
+
+    def _is_secret(self, name, value):
+        return (
+            name is not None
+            and SECRET_NAME_PATTERN.search(name) is not None
+            and isinstance(value, ast.Constant) and isinstance(value.value, str)
+            and not PLACEHOLDER_PATTERN.match(value.value)
+        )
+
+
+class SqlFormattingRule(Rule):
+    id = 'sql-string-formatting'
+    issue = 'SQL built with string formatting'
+    description = 'Formatting values into SQL text enables SQL injection; use parameterized queries.'
+    severity = SEVERITY_MEDIUM
+    node_types = (ast.JoinedStr, ast.BinOp, ast.Call)
+
+    def matches(self, node, scan):
+        if id(node) in scan.covered:
+            return False
+        if isinstance(node, ast.JoinedStr):
+            text = ''.join(part.value for part in node.values if isinstance(part, ast.Constant))
+            dynamic = any(isinstance(part, ast.FormattedValue) for part in node.values)
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Mod, ast.Add)):
+            text = ''.join(self._string_parts(node))
+            dynamic = True
+        elif (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == 'format'
+              and isinstance(node.func.value, ast.Constant) and isinstance(node.func.value.value, str)):
+            text = node.func.value.value
+            dynamic = bool(node.args or node.keywords)
+        else:
+            return False
+
+        if not dynamic or not SQL_PATTERN.match(text):
+            return False
+        # ast.walk is breadth-first, so nested pieces of the same query come later; report it once.
+        scan.covered.update(id(child) for child in ast.walk(node))
+        return True
+
+    def _string_parts(self, node):
+        if isinstance(node, ast.BinOp):
+            yield from self._string_parts(node.left)
+            if isinstance(node.op, ast.Add):
+                yield from self._string_parts(node.right)
+        elif isinstance(node, ast.Constant) and isinstance(node.value, str):
+            yield node.value
+        elif isinstance(node, ast.JoinedStr):
+            yield ''.join(part.value for part in node.values if isinstance(part, ast.Constant))
+
+
+class RuleEngine:
+    """
+    Runs a set of rules over a file in a single AST traversal.
+
+    Rules are compiled once into a table from node type to the rules that
+    inspect it, so each node costs one dict lookup plus only the rules
+    interested in it, and scanning stays one pass per file however many
+    rules are loaded.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        dispatch = defaultdict(list)
+        for rule in self.rules:
+            for node_type in rule.node_types:
+                dispatch[node_type].append(rule)
+        self._dispatch = {node_type: tuple(rules) for node_type, rules in dispatch.items()}
+
+    def scan(self, code, filename='<snippet>', context=None):
+        """
+        Findings for one file, ordered by position; unparseable code yields none.
+        """
+        context = context or build_context(code)
+        if context is None:
+            return []
+
+        scan = FileScan(filename, context)
+        dispatch = self._dispatch
+        for node in ast.walk(context.tree):
+            for rule in dispatch.get(type(node), ()):
+                if rule.matches(node, scan):
+                    scan.report(rule, node)
+
+        scan.findings.sort(key=lambda finding: (finding['line'], finding['column']))
+        return scan.findings
+
+
+DEFAULT_RULES = (
+    EvalExecRule(),
+    PickleLoadsRule(),
+    SubprocessShellRule(),
+    YamlLoadRule(),
+    HardcodedSecretRule(),
+    SqlFormattingRule(),
+)
+
+security_engine = RuleEngine(DEFAULT_RULES)
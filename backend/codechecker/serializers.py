@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import CodeSnippet, AnalysisResult
 
@@ -9,4 +10,13 @@ class AnalysisResultSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class CodeSnippetSerializer(serializers.Serializer):
-    code = serializers.CharField()
\ No newline at end of file
+    code = serializers.CharField()
+
+class CodeBatchSerializer(serializers.Serializer):
+    snippets = serializers.ListField(
+        child=serializers.CharField(),
+        allow_empty=False,
+        max_length=getattr(settings, 'CODECHECKER_BATCH_MAX_SNIPPETS', 1000),
+    )
+    threshold = serializers.FloatField(default=0.9, min_value=0.0, max_value=1.0)
+    n_clusters = serializers.IntegerField(default=5, min_value=1)
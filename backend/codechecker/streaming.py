@@ -0,0 +1,182 @@
+import itertools
+import json
+import logging
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from .flags import is_truthy
+
+logger = logging.getLogger(__name__)
+
+STREAM_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream',
+}
+
+
+class _StreamRenderer(BaseRenderer):
+    """
+    Lets content negotiation accept a streaming media type.
+
+    Streamed responses bypass renderers entirely; this only renders the
+    plain responses (validation errors, 400s) such a request can still get.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=JSONEncoder).encode(self.charset)
+
+
+class NDJSONRenderer(_StreamRenderer):
+    media_type = STREAM_CONTENT_TYPES['ndjson']
+    format = 'ndjson'
+
+
+class EventStreamRenderer(_StreamRenderer):
+    media_type = STREAM_CONTENT_TYPES['sse']
+    format = 'sse'
+
+
+def streaming_renderer_classes():
+    """
+    Renderer classes for views that can stream: the defaults plus the streaming media types.
+    """
+    return [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer, EventStreamRenderer]
+
+
+def ndjson_lines(items):
+    """
+    Encode an iterable of JSON-serializable objects as newline-delimited JSON.
+    """
+    for item in items:
+        yield json.dumps(item, cls=JSONEncoder) + '\n'
+
+
+def sse_messages(events):
+    """
+    Encode (event, data) pairs as server-sent events.
+    """
+    for event, data in events:
+        yield f'event: {event}\ndata: {json.dumps(data, cls=JSONEncoder)}\n\n'
+
+
+def stream_format(request, data=None):
+    """
+    The streaming format a request asked for, or None for a single JSON response.
+
+    Clients opt in with a ``stream`` field or query parameter ("ndjson",
+    "sse" or any true value for NDJSON), or by accepting one of the
+    streaming content types. Plain Django requests pass their parsed body
+    as data; DRF requests default to request.data.
+    """
+    requested = getattr(request, 'query_params', request.GET).get('stream')
+    if data is None:
+        data = getattr(request, 'data', None)
+    if requested is None and hasattr(data, 'get'):
+        requested = data.get('stream')
+    if isinstance(requested, str) and requested.lower() in STREAM_CONTENT_TYPES:
+        return requested.lower()
+    if is_truthy(requested):
+        return 'ndjson'
+
+    accept = request.headers.get('Accept', '')
+    for fmt, content_type in STREAM_CONTENT_TYPES.items():
+        if content_type in accept:
+            return fmt
+    return None
+
+
+def start_events(events):
+    """
+    Run an event generator up to its first event.
+
+    Errors raised while setting up (a bad URL, a failed listing) then
+    surface before the response starts and can still become a 400.
+    """
+    events = iter(events)
+    try:
+        first = next(events)
+    except StopIteration:
+        return iter(())
+    return itertools.chain([first], events)
+
+
+async def astart_events(events):
+    """
+    start_events for an async event generator.
+    """
+    try:
+        first = await anext(events)
+    except StopAsyncIteration:
+        first = None
+
+    async def chained():
+        if first is None:
+            return
+        yield first
+        async for event in events:
+            yield event
+
+    return chained()
+
+
+def _terminated(events):
+    """
+    Pass events through and end the stream with 'done', or with 'error' if producing them failed.
+
+    The status line is long gone by the time a later event fails, so the
+    error has to travel in-band.
+    """
+    try:
+        yield from events
+    except Exception as e:
+        logger.exception('Streaming response failed')
+        yield 'error', {'error': str(e)}
+        return
+    yield 'done', {}
+
+
+async def _aterminated(events):
+    try:
+        async for event in events:
+            yield event
+    except Exception as e:
+        logger.exception('Streaming response failed')
+        yield 'error', {'error': str(e)}
+        return
+    yield 'done', {}
+
+
+async def _aencoded(events, encode):
+    async for event in events:
+        for chunk in encode([event]):
+            yield chunk
+
+
+def _encoder(fmt):
+    if fmt == 'sse':
+        return sse_messages
+    return lambda events: ndjson_lines({'event': event, 'data': data} for event, data in events)
+
+
+def stream_response(events, fmt, headers=None):
+    """
+    A StreamingHttpResponse sending (event, data) pairs as NDJSON or server-sent events.
+
+    Each pair is written as soon as the generator produces it, so clients
+    see the first results while later ones are still being computed.
+    Async generators are streamed as such, for async views under ASGI.
+    """
+    if hasattr(events, '__aiter__'):
+        body = _aencoded(_aterminated(events), _encoder(fmt))
+    else:
+        body = _encoder(fmt)(_terminated(events))
+    return StreamingHttpResponse(body, content_type=STREAM_CONTENT_TYPES[fmt], headers={
+        'Cache-Control': 'no-cache',
+        # Stop nginx and similar proxies from buffering the stream.
+        'X-Accel-Buffering': 'no',
+        **(headers or {}),
+    })
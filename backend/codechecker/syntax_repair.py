@@ -0,0 +1,355 @@
+import ast
+import re
+from collections import defaultdict
+
+from .instrumentation import stage
+
+INDENT_UNIT = 4
+
+CLOSERS = {'(': ')', '[': ']', '{': '}'}
+OPENERS = {closer: opener for opener, closer in CLOSERS.items()}
+BRACKET_NAMES = {'(': 'parenthesis', '[': 'bracket', '{': 'brace'}
+
+# Statements that open a block and so must end with a colon.
+COMPOUND_KEYWORDS = frozenset({'if', 'elif', 'else', 'for', 'while', 'def', 'class', 'try', 'except', 'finally', 'with'})
+# Keywords that can only start a statement, so seeing one inside brackets means a closer is missing.
+STATEMENT_KEYWORDS = frozenset({
+    'def', 'class', 'return', 'import', 'from', 'pass', 'raise', 'break', 'continue', 'while', 'try',
+    'except', 'finally', 'with', 'elif', 'del', 'global', 'nonlocal', 'assert',
+})
+# Keywords that also continue expressions (comprehensions, conditional expressions).
+EXPRESSION_KEYWORDS = frozenset({'if', 'for', 'else', 'async'})
+# Characters that turn a trailing '=' into a comparison or augmented assignment.
+OPERATOR_CHARS = frozenset('=!<>+-*/%&|^@:')
+
+WORD_PATTERN = re.compile(r'[A-Za-z_]\w*')
+ASSIGNMENT_PATTERN = re.compile(r'[A-Za-z_][\w.]*\s*=(?!=)')
+
+REPAIR_MESSAGES = {
+    'close-parenthesis': 'Added missing closing parenthesis',
+    'close-bracket': 'Added missing closing bracket',
+    'close-brace': 'Added missing closing brace',
+    'unmatched-parenthesis': 'Removed unmatched closing parenthesis',
+    'unmatched-bracket': 'Removed unmatched closing bracket',
+    'unmatched-brace': 'Removed unmatched closing brace',
+    'colon': 'Added missing colon at the end of the statement',
+    'double-quote': 'Added missing double quotation mark',
+    'single-quote': 'Added missing single quotation mark',
+    'triple-quote': 'Added missing closing triple quotes',
+    'pass': "Added 'pass' statement to fix indentation",
+    'indent': 'Fixed inconsistent indentation',
+    'none': "Added 'None' to complete the assignment",
+}
+
+
+def indent_width(text):
+    stripped = text.lstrip(' \t\f')
+    return len(text[:len(text) - len(stripped)].expandtabs(8))
+
+
+def find_string_end(text, start, quote):
+    """
+    Offset just past the closing quote, or None when the string runs past the line.
+    """
+    position = start
+    while position < len(text):
+        if text[position] == '\\':
+            position += 2
+        elif text.startswith(quote, position):
+            return position + len(quote)
+        else:
+            position += 1
+    return None
+
+
+class _LogicalLine:
+    """
+    The statement being scanned: where it starts, what introduces it and where its code ends.
+    """
+
+    def __init__(self, line, raw_indent, indent, text):
+        self.line = line
+        self.raw_indent = raw_indent
+        self.indent = indent
+        stripped = text.lstrip()
+        match = WORD_PATTERN.match(stripped)
+        if match and match.group() == 'async':
+            match = WORD_PATTERN.match(stripped[match.end():].lstrip())
+        self.keyword = match.group() if match else ''
+        self.top_level_colon = False
+        self.last = None
+        self.end = None
+
+
+class _Scanner:
+    """
+    Single left-to-right pass over the source that records every repair as an edit.
+
+    The stdlib tokenizer gives up at the first unclosed bracket or string,
+    so this is a small purpose-built lexer: it tracks the bracket stack,
+    open strings and the indentation stack across lines, and decides on
+    each repair locally from that state, without re-parsing anything.
+    """
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.edits = []
+        self.repairs = []
+        self.stack = []
+        self.indents = [0]
+        self.logical = None
+        self.pending_block = None
+        self.string = None
+        self.continued = False
+        self.last_code = (0, 0)
+
+    def run(self):
+        for number, text in enumerate(self.lines):
+            self._scan_line(number, text)
+        self._finish()
+        return self.edits, self.repairs
+
+    def _edit(self, line, start, end, replacement, kind):
+        self.edits.append((line, start, end, replacement))
+        self.repairs.append((kind, line))
+
+    def _significant(self, line, end, token):
+        self.last_code = (line, end)
+        if self.logical is not None:
+            self.logical.last = token
+            self.logical.end = (line, end)
+
+    def _scan_line(self, number, text):
+        position = 0
+        continued, self.continued = self.continued, False
+        if self.string is not None:
+            quote = self.string
+            end = find_string_end(text, 0, quote)
+            if end is not None:
+                self.string = None
+                self._significant(number, end, quote)
+                position = end
+            elif len(quote) == 1 and not text.rstrip().endswith('\\'):
+                self._close_string(number, text, quote)
+                position = len(text)
+            else:
+                return
+        elif not text.strip() or text.lstrip().startswith('#'):
+            if continued:
+                self.continued = True
+            return
+        elif not self.stack and not continued:
+            position = self._start_logical(number, text)
+        elif self.stack and not continued and self._is_statement_boundary(text):
+            self._close_brackets(*self.last_code)
+            self._end_logical()
+            position = self._start_logical(number, text)
+
+        self._scan(number, text, position)
+        if self.string is None and not self.stack and not self.continued:
+            self._end_logical()
+
+    def _scan(self, number, text, position):
+        stack = self.stack
+        while position < len(text):
+            char = text[position]
+            if char == '#':
+                return
+            if char in '"\'':
+                quote = char * 3 if text.startswith(char * 3, position) else char
+                end = find_string_end(text, position + len(quote), quote)
+                if end is None:
+                    if len(quote) == 3 or text.rstrip().endswith('\\'):
+                        self.string = quote
+                    else:
+                        self._close_string(number, text, quote)
+                    return
+                self._significant(number, end, quote)
+                position = end
+                continue
+            if char in CLOSERS:
+                stack.append(char)
+            elif char in OPENERS:
+                opener = OPENERS[char]
+                if opener not in stack:
+                    self._edit(number, position, position + 1, '', f'unmatched-{BRACKET_NAMES[opener]}')
+                    position += 1
+                    continue
+                # Brackets opened inside this pair were never closed.
+                while stack[-1] != opener:
+                    inner = stack.pop()
+                    self._edit(number, position, position, CLOSERS[inner], f'close-{BRACKET_NAMES[inner]}')
+                stack.pop()
+            elif char == '\\' and not text[position + 1:].strip():
+                self.continued = True
+                return
+            elif char == ':' and not stack and not text.startswith(':=', position):
+                self.logical.top_level_colon = True
+            elif char.isspace():
+                position += 1
+                continue
+
+            token = char
+            if char == '=':
+                following = text[position + 1:position + 2]
+                preceding = text[position - 1] if position else ''
+                if following == '=' or preceding in OPERATOR_CHARS:
+                    token = '=='
+            self._significant(number, position + 1, token)
+            position += 1
+
+    def _close_string(self, number, text, quote):
+        column = len(text.rstrip())
+        self._edit(number, column, column, quote, 'double-quote' if quote == '"' else 'single-quote')
+        self.string = None
+        self._significant(number, column, quote)
+
+    def _close_brackets(self, line, column):
+        while self.stack:
+            opener = self.stack.pop()
+            self._edit(line, column, column, CLOSERS[opener], f'close-{BRACKET_NAMES[opener]}')
+
+    def _is_statement_boundary(self, text):
+        """
+        Whether a line inside open brackets is really the next statement.
+        """
+        stripped = text.lstrip()
+        if stripped[0] in OPENERS:
+            return False
+        match = WORD_PATTERN.match(stripped)
+        word = match.group() if match else ''
+        if word in STATEMENT_KEYWORDS:
+            return True
+        indent = indent_width(text)
+        if word in EXPRESSION_KEYWORDS or ASSIGNMENT_PATTERN.match(stripped):
+            return indent <= self.logical.raw_indent
+        return indent < self.logical.raw_indent
+
+    def _start_logical(self, number, text):
+        raw_indent = indent_width(text)
+        indent = raw_indent
+        if self.pending_block is not None:
+            header_line, header_indent = self.pending_block
+            self.pending_block = None
+            if indent > header_indent:
+                self.indents.append(indent)
+            else:
+                self._insert_pass(header_line, header_indent)
+        elif indent > self.indents[-1]:
+            indent = self.indents[-1]
+        if indent < self.indents[-1]:
+            while self.indents[-1] > indent:
+                self.indents.pop()
+            indent = self.indents[-1]
+
+        leading = len(text) - len(text.lstrip(' \t\f'))
+        if indent != raw_indent:
+            self._edit(number, 0, leading, ' ' * indent, 'indent')
+        self.logical = _LogicalLine(number, raw_indent, indent, text)
+        return leading
+
+    def _end_logical(self):
+        logical, self.logical = self.logical, None
+        if logical is None or logical.end is None:
+            return
+        line, column = logical.end
+        if logical.keyword in COMPOUND_KEYWORDS and not logical.top_level_colon:
+            self._edit(line, column, column, ':', 'colon')
+            logical.last = ':'
+        if logical.last == ':':
+            self.pending_block = (line, logical.indent)
+        elif logical.last == '=':
+            self._edit(line, column, column, ' None', 'none')
+
+    def _insert_pass(self, line, indent):
+        text = self.lines[line]
+        column = len(text) - 1 if text.endswith('\r') else len(text)
+        self._edit(line, column, column, '\n' + ' ' * (indent + INDENT_UNIT) + 'pass', 'pass')
+
+    def _finish(self):
+        if self.string is not None:
+            line = len(self.lines) - 1
+            column = len(self.lines[line].rstrip())
+            self._edit(line, column, column, self.string,
+                       'triple-quote' if len(self.string) == 3 else
+                       'double-quote' if self.string == '"' else 'single-quote')
+            self.string = None
+            self._significant(line, column, '"')
+        self._close_brackets(*self.last_code)
+        self._end_logical()
+        if self.pending_block is not None:
+            self._insert_pass(*self.pending_block)
+            self.pending_block = None
+
+
+def apply_edits(lines, edits):
+    """
+    Apply (line, start, end, replacement) edits in one batch, in a single pass per touched line.
+
+    Edits at the same position are applied in the order they were recorded.
+    """
+    by_line = defaultdict(list)
+    for order, (line, start, end, replacement) in enumerate(edits):
+        by_line[line].append((start, order, end, replacement))
+
+    lines = list(lines)
+    for line, line_edits in by_line.items():
+        source = lines[line]
+        parts = []
+        position = 0
+        for start, _, end, replacement in sorted(line_edits):
+            parts.append(source[position:start])
+            parts.append(replacement)
+            position = max(position, end)
+        parts.append(source[position:])
+        lines[line] = ''.join(parts)
+    return lines
+
+
+def repair_syntax(code):
+    """
+    Repair the common syntax errors in Python source in one linear pass.
+
+    Returns the repaired code and the repairs made, as (kind, line index)
+    pairs in source order.
+    """
+    lines = code.split('\n')
+    edits, repairs = _Scanner(lines).run()
+    if not edits:
+        return code, []
+    return '\n'.join(apply_edits(lines, edits)), repairs
+
+
+def describe_repairs(repairs):
+    """
+    One sentence per kind of repair, listing the (1-based) lines it was made on.
+    """
+    lines_by_kind = {}
+    for kind, line in repairs:
+        lines_by_kind.setdefault(kind, set()).add(line + 1)
+    messages = []
+    for kind, lines in lines_by_kind.items():
+        label = 'line' if len(lines) == 1 else 'lines'
+        messages.append(f"{REPAIR_MESSAGES[kind]} ({label} {', '.join(map(str, sorted(lines)))}).")
+    return ' '.join(messages)
+
+
+@stage('syntax_repair')
+def correct_syntax_errors(code):
+    """
+    Parse code, repairing its syntax errors first when it does not parse as is.
+
+    Returns the (possibly corrected) code, a correction message and the
+    parsed tree, which is None when the code still does not parse.
+    """
+    try:
+        return code, None, ast.parse(code)
+    except SyntaxError:
+        pass
+
+    repaired, repairs = repair_syntax(code)
+    try:
+        tree = ast.parse(repaired)
+    except SyntaxError as e:
+        return repaired, f"Syntax Error: {e}", None
+    return repaired, describe_repairs(repairs), tree
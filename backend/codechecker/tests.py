@@ -1,3 +1,654 @@
-from django.test import TestCase
+import ast
+import asyncio
+import io
+import json
+import random
+import sqlite3
+import tarfile
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Create your tests here.
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from . import async_github
+from .clones import similar_pairs
+from .fingerprints import DEFAULT_MIN_NODES, FingerprintIndex, StructuralHasher, fingerprint_code
+from .github import GitHubClient, git_blob_sha
+from .http_cache import HttpCache
+from .imports import analyze_imports, remove_imports
+from .ingest import ReservoirSampler
+from .instrumentation import aiter_with_timings, stage
+from .security import DEFAULT_RULES, EvalExecRule, RuleEngine, security_engine
+from .syntax_repair import correct_syntax_errors, describe_repairs, repair_syntax
+
+from .repo_index import diff_tree, get_repository, update_index
+from .views import fetches_blobs
+
+
+class RepositoryIndexTests(TestCase):
+    def test_update_index_applies_added_changed_and_removed_paths(self):
+        repository = get_repository('octo', 'repo')
+        update_index(repository, diff_tree(repository, {'a.py': '1', 'b.py': '2', 'c.py': '3'}), 'tree1')
+
+        diff = diff_tree(repository, {'a.py': '1', 'b.py': '20', 'd.py': '4'})
+        self.assertEqual(diff.stats(), {'added': 1, 'changed': 1, 'removed': 1, 'unchanged': 1})
+        update_index(repository, diff, 'tree2')
+
+        repository.refresh_from_db()
+        self.assertEqual(repository.tree_sha, 'tree2')
+        self.assertEqual(
+            dict(repository.files.values_list('path', 'sha')),
+            {'a.py': '1', 'b.py': '20', 'd.py': '4'},
+        )
+
+    def test_overlapping_scans_do_not_conflict(self):
+        repository = get_repository('octo', 'repo')
+        first = diff_tree(repository, {'a.py': '1'})
+        second = diff_tree(repository, {'a.py': '2'})
+
+        update_index(repository, first, 'tree1')
+        update_index(repository, second, 'tree2')
+
+        self.assertEqual(dict(repository.files.values_list('path', 'sha')), {'a.py': '2'})
+
+    def test_first_scans_and_large_deltas_read_the_tarball(self):
+        repository = get_repository('octo', 'repo')
+        self.assertFalse(fetches_blobs(repository, {'1': ['a.py']}))
+
+        update_index(repository, diff_tree(repository, {'a.py': '1'}), 'tree1')
+        with self.settings(CODECHECKER_GITHUB={'TREE_MAX_BLOBS': 2}):
+            self.assertTrue(fetches_blobs(repository, {'2': ['a.py'], '3': ['b.py']}))
+            self.assertFalse(fetches_blobs(repository, {'2': ['a.py'], '3': ['b.py'], '4': ['c.py']}))
+
+
+def unused_names(code):
+    return [record.display_name for record in analyze_imports(ast.parse(code)).unused]
+
+
+def without_unused_imports(code):
+    tree = ast.parse(code)
+    fixed = remove_imports(code, tree, analyze_imports(tree).unused)
+    ast.parse(fixed)
+    return fixed
+
+
+class ImportAnalysisTests(SimpleTestCase):
+    def test_name_and_attribute_uses_keep_imports(self):
+        self.assertEqual(unused_names('import os\nimport sys\nos.getcwd()\n'), ['sys'])
+
+    def test_shadowing_parameter_does_not_keep_import(self):
+        code = 'import json\ndef load(json):\n    return json.loads("1")\n'
+        self.assertEqual(unused_names(code), ['json'])
+
+    def test_local_assigned_after_use_still_shadows(self):
+        code = 'import path\ndef f():\n    print(path)\n    path = 1\n'
+        self.assertEqual(unused_names(code), ['path'])
+
+    def test_class_body_binding_is_not_visible_in_methods(self):
+        code = 'import value\nclass A:\n    value = 1\n    def f(self):\n        return value\n'
+        self.assertEqual(unused_names(code), [])
+
+    def test_global_declaration_resolves_to_module(self):
+        code = 'import cache\ndef f():\n    cache = 1\n    def g():\n        global cache\n        return cache\n'
+        self.assertEqual(unused_names(code), [])
+
+    def test_dunder_all_keeps_exports(self):
+        code = 'from a import b, c, d\n__all__ = ["b"]\n__all__ += ["c"]\n'
+        self.assertEqual(unused_names(code), ['d'])
+        self.assertEqual(unused_names('from a import b\n__all__ = []\n__all__.append("b")\n'), [])
+
+    def test_dotted_imports_are_credited_by_attribute_chain(self):
+        code = 'import os.path\nimport os.environ\nos.path.join("a")\n'
+        self.assertEqual(unused_names(code), ['os.environ'])
+
+    def test_string_annotations_count_as_uses(self):
+        self.assertEqual(unused_names('from typing import List\nx: "List[int]" = []\n'), [])
+
+    def test_future_reexport_and_star_imports_are_never_reported(self):
+        code = 'from __future__ import annotations\nimport a as a\nfrom b import *\n'
+        self.assertEqual(unused_names(code), [])
+
+
+class ImportRemovalTests(SimpleTestCase):
+    def test_whole_statement_is_removed_with_its_line(self):
+        self.assertEqual(without_unused_imports('import os\nimport sys\nsys.exit()\n'), 'import sys\nsys.exit()\n')
+
+    def test_emptied_block_becomes_pass(self):
+        self.assertEqual(without_unused_imports('try:\n    import a\nexcept ImportError:\n    pass\n'),
+                         'try:\n    pass\nexcept ImportError:\n    pass\n')
+
+    def test_unused_names_are_cut_from_single_line_import(self):
+        self.assertEqual(without_unused_imports('from typing import Dict, List, Set  # types\nx: List\n'),
+                         'from typing import List  # types\nx: List\n')
+
+    def test_partial_removal_keeps_comments_of_kept_names(self):
+        code = 'from typing import (\n    List,  # keep\n    Dict,\n)\nx: List\n'
+        self.assertEqual(without_unused_imports(code), 'from typing import (\n    List,  # keep\n)\nx: List\n')
+
+    def test_partial_removal_in_parenthesised_import(self):
+        code = (
+            'from typing import (\n'
+            '    Dict,  # unused\n'
+            '    List,  # keep\n'
+            '    Set, Tuple,  # unused too\n'
+            ')\n'
+            'x: List\n'
+        )
+        self.assertEqual(without_unused_imports(code), 'from typing import (\n    List,  # keep\n)\nx: List\n')
+
+    def test_partial_removal_before_closing_parenthesis(self):
+        code = 'from typing import (List,  # keep\n    Dict)\nx: List\n'
+        self.assertEqual(without_unused_imports(code), 'from typing import (List,  # keep\n)\nx: List\n')
+
+    def test_partial_removal_across_backslash_continuation(self):
+        self.assertEqual(without_unused_imports('from typing import List, \\\n    Dict\nx: List\n'),
+                         'from typing import List\nx: List\n')
+
+    def test_statements_sharing_a_line(self):
+        self.assertEqual(without_unused_imports('import os; import sys\nsys.exit()\n'), 'import sys\nsys.exit()\n')
+
+
+def rule_ids(code):
+    return [finding['rule'] for finding in security_engine.scan(code)]
+
+
+class SecurityRuleTests(SimpleTestCase):
+    def test_eval_and_exec(self):
+        self.assertEqual(rule_ids('eval(data)\nexec(data)\n'), ['eval-exec', 'eval-exec'])
+        self.assertEqual(rule_ids('import builtins\nbuiltins.eval(data)\n'), ['eval-exec'])
+        self.assertEqual(rule_ids('ast.literal_eval(data)\nmodel.eval()\n'), [])
+
+    def test_pickle_loads_through_aliases(self):
+        self.assertEqual(rule_ids('import pickle as p\np.loads(blob)\n'), ['pickle-loads'])
+        self.assertEqual(rule_ids('from pickle import load\nload(f)\n'), ['pickle-loads'])
+        self.assertEqual(rule_ids('import pickle\npickle.dumps(obj)\n'), [])
+
+    def test_subprocess_shell(self):
+        self.assertEqual(rule_ids('import subprocess\nsubprocess.run(cmd, shell=True)\n'), ['subprocess-shell'])
+        self.assertEqual(rule_ids('import subprocess\nsubprocess.getoutput(cmd)\n'), ['subprocess-shell'])
+        self.assertEqual(rule_ids('import subprocess\nsubprocess.run(cmd, shell=False)\n'), [])
+        self.assertEqual(rule_ids('import subprocess\nsubprocess.run(["ls"])\n'), [])
+
+    def test_yaml_load(self):
+        self.assertEqual(rule_ids('import yaml\nyaml.load(text)\n'), ['yaml-load'])
+        self.assertEqual(rule_ids('import yaml\nyaml.unsafe_load(text)\n'), ['yaml-load'])
+        self.assertEqual(rule_ids('import yaml\nyaml.load(text, Loader=yaml.SafeLoader)\n'), [])
+        self.assertEqual(rule_ids('import yaml\nyaml.safe_load(text)\n'), [])
+
+    def test_hardcoded_secrets(self):
+        self.assertEqual(rule_ids('API_KEY = "sk-live-123"\n'), ['hardcoded-secret'])
+        self.assertEqual(rule_ids('connect(password="hunter2")\n'), ['hardcoded-secret'])
+        self.assertEqual(rule_ids('config = {"secret": "abc123"}\n'), ['hardcoded-secret'])
+        self.assertEqual(rule_ids('self.token: str = "abc123"\n'), ['hardcoded-secret'])
+        self.assertEqual(rule_ids('password = "changeme"\npassword = os.environ["PW"]\n'), [])
+        self.assertEqual(rule_ids('username = "admin"\n'), [])
+
+    def test_sql_string_formatting_is_reported_once(self):
+        self.assertEqual(rule_ids('q = f"SELECT * FROM users WHERE id = {uid}"\n'), ['sql-string-formatting'])
+        self.assertEqual(rule_ids('q = "SELECT * FROM t WHERE a = %s" % a\n'), ['sql-string-formatting'])
+        self.assertEqual(rule_ids('q = "DELETE FROM t WHERE a = " + a + " AND b = " + b\n'),
+                         ['sql-string-formatting'])
+        self.assertEqual(rule_ids('q = "UPDATE t SET a = {}".format(a)\n'), ['sql-string-formatting'])
+        self.assertEqual(rule_ids('cursor.execute("SELECT * FROM t WHERE a = %s", (a,))\n'), [])
+        self.assertEqual(rule_ids('message = f"selected {count} items"\n'), [])
+
+    def test_findings_are_ordered_and_located(self):
+        findings = security_engine.scan('x = 1\nexec(a); eval(b)\n', filename='app.py')
+        self.assertEqual([(f['file'], f['line'], f['column']) for f in findings], [('app.py', 2, 1), ('app.py', 2, 10)])
+
+    def test_unparseable_code_has_no_findings(self):
+        self.assertEqual(security_engine.scan('def broken(:\n'), [])
+
+    def test_rules_only_see_their_node_types(self):
+        seen = []
+
+        class RecordingRule(EvalExecRule):
+            def matches(self, node, scan):
+                seen.append(type(node).__name__)
+                return super().matches(node, scan)
+
+        RuleEngine([RecordingRule()]).scan('x = f(1)\ny = [g()]\n')
+        self.assertEqual(seen, ['Call', 'Call'])
+
+    def test_every_default_rule_has_an_id_and_node_types(self):
+        self.assertEqual(len({rule.id for rule in DEFAULT_RULES}), len(DEFAULT_RULES))
+        for rule in DEFAULT_RULES:
+            self.assertTrue(rule.node_types)
+
+
+class SyntaxRepairTests(SimpleTestCase):
+    def assertRepaired(self, code, expected, kinds):
+        repaired, repairs = repair_syntax(code)
+        self.assertEqual(repaired, expected)
+        self.assertEqual([kind for kind, _ in repairs], kinds)
+        ast.parse(repaired)
+
+    def test_missing_closers(self):
+        self.assertRepaired('print("a"\nx = 1\n', 'print("a")\nx = 1\n', ['close-parenthesis'])
+        self.assertRepaired('x = [1, 2\ny = 3\n', 'x = [1, 2]\ny = 3\n', ['close-bracket'])
+        self.assertRepaired('d = {"a": 1\n', 'd = {"a": 1}\n', ['close-brace'])
+        self.assertRepaired('f(g(1, [2, 3)\n', 'f(g(1, [2, 3]))\n', ['close-bracket', 'close-parenthesis'])
+
+    def test_closer_goes_after_the_last_code_of_a_multi_line_call(self):
+        self.assertRepaired('foo(1,\n    2\nbar = 3\n', 'foo(1,\n    2)\nbar = 3\n', ['close-parenthesis'])
+
+    def test_unmatched_closers_are_removed(self):
+        self.assertRepaired('x = 1)\n', 'x = 1\n', ['unmatched-parenthesis'])
+        self.assertRepaired('x = [1]]\n', 'x = [1]\n', ['unmatched-bracket'])
+        self.assertRepaired('x = 1}\n', 'x = 1\n', ['unmatched-brace'])
+
+    def test_missing_colons(self):
+        self.assertRepaired('if x > 1\n    y = 2\n', 'if x > 1:\n    y = 2\n', ['colon'])
+        self.assertRepaired('def f(a, b)\n    return a\n', 'def f(a, b):\n    return a\n', ['colon'])
+        self.assertRepaired('if a:\n    b = 1\nelse\n    b = 2\n', 'if a:\n    b = 1\nelse:\n    b = 2\n', ['colon'])
+        self.assertRepaired('if (n := 10) > 5\n    pass\n', 'if (n := 10) > 5:\n    pass\n', ['colon'])
+
+    def test_unterminated_strings(self):
+        self.assertRepaired('print("hello)\n', 'print("hello)")\n', ['double-quote', 'close-parenthesis'])
+        self.assertRepaired("x = 'abc\n", "x = 'abc'\n", ['single-quote'])
+        self.assertRepaired('x = """abc\ny = 1\n', 'x = """abc\ny = 1\n"""', ['triple-quote'])
+
+    def test_empty_blocks_get_pass(self):
+        self.assertRepaired('def f():\nx = 1\n', 'def f():\n    pass\nx = 1\n', ['pass'])
+        self.assertRepaired('for i in range(3):\n', 'for i in range(3):\n    pass\n', ['pass'])
+
+    def test_unexpected_indent_is_dedented(self):
+        self.assertRepaired('x = 1\n    y = 2\n', 'x = 1\ny = 2\n', ['indent'])
+
+    def test_dangling_assignment_gets_none(self):
+        self.assertRepaired('x =\n', 'x = None\n', ['none'])
+
+    def test_valid_constructs_are_left_alone(self):
+        for code in ('x = {k: v for k, v in items if k}\n', 'f = lambda x: x\n', 'y = x[1:2]\n',
+                     'x += 1\nif a == b:\n    pass\n', 's = "a # b"  # c\n', 'x = (1 +\n     2)\n'):
+            self.assertEqual(repair_syntax(code), (code, []))
+
+    def test_several_repairs_in_one_pass(self):
+        repaired, message, tree = correct_syntax_errors('def f(x)\n    if x > 1\n    return (x\n')
+        self.assertIsNotNone(tree)
+        self.assertEqual(repaired, 'def f(x):\n    if x > 1:\n        pass\n    return (x)\n')
+        self.assertIn('Added missing colon at the end of the statement (lines 1, 2).', message)
+
+    def test_correct_code_is_parsed_without_a_message(self):
+        code, message, tree = correct_syntax_errors('x = 1\n')
+        self.assertEqual((code, message), ('x = 1\n', None))
+        self.assertIsInstance(tree, ast.Module)
+
+    def test_describe_repairs_groups_lines_by_kind(self):
+        self.assertEqual(describe_repairs([('colon', 0), ('colon', 3), ('none', 1)]),
+                         'Added missing colon at the end of the statement (lines 1, 4). '
+                         "Added 'None' to complete the assignment (line 2).")
+
+
+class SimilarPairsTests(SimpleTestCase):
+    def brute_force_pairs(self, embeddings, threshold):
+        normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        similarities = normalized @ normalized.T
+        return {
+            (i, j): similarities[i, j]
+            for i in range(len(embeddings)) for j in range(i + 1, len(embeddings))
+            if similarities[i, j] > threshold
+        }
+
+    def test_matches_dense_cosine_similarity_across_blocks(self):
+        rng = np.random.default_rng(0)
+        base = rng.random((8, 30))
+        # Noisy copies of a few base rows give pairs on both sides of the threshold.
+        embeddings = np.vstack([base, base[:5] + rng.normal(0, 0.05, (5, 30)), rng.random((12, 30))])
+        embeddings[embeddings < 0.3] = 0
+        expected = self.brute_force_pairs(embeddings, 0.9)
+        self.assertTrue(expected)
+
+        for block_size in (1, 4, 7, None):
+            rows, cols, similarities = similar_pairs(embeddings, threshold=0.9, block_size=block_size)
+            found = dict(zip(zip(rows.tolist(), cols.tolist()), similarities.tolist()))
+            self.assertEqual(set(found), set(expected))
+            for pair, similarity in found.items():
+                self.assertAlmostEqual(similarity, expected[pair], places=5)
+            self.assertEqual(list(zip(rows, cols)), sorted(zip(rows, cols)))
+
+    def test_small_max_products_gives_the_same_pairs(self):
+        embeddings = np.random.default_rng(1).random((25, 6))
+        expected = similar_pairs(embeddings, threshold=0.8, block_size=25)
+        actual = similar_pairs(embeddings, threshold=0.8, max_products=30)
+        for expected_part, actual_part in zip(expected, actual):
+            np.testing.assert_allclose(actual_part, expected_part, rtol=1e-6)
+
+
+def erased_structure(node):
+    """
+    Reference shape of an AST: types and nesting only, identifiers erased and literals reduced to their type.
+    """
+    if isinstance(node, list):
+        return [erased_structure(item) for item in node]
+    if not isinstance(node, ast.AST):
+        return None if node is None else '_'
+    fields = []
+    for field, value in ast.iter_fields(node):
+        if field in ('ctx', 'type_comment', 'kind'):
+            continue
+        if isinstance(node, ast.Constant) and field == 'value':
+            value = type(value).__name__
+        else:
+            value = erased_structure(value)
+        fields.append((field, value))
+    return type(node).__name__, fields
+
+
+def node_count(node):
+    return sum(1 for child in ast.walk(node) if not isinstance(child, ast.expr_context))
+
+
+class FingerprintTests(SimpleTestCase):
+    SOURCES = {
+        'a.py': (
+            'def total(items):\n'
+            '    result = 0\n'
+            '    for item in items:\n'
+            '        result += item.price * 2\n'
+            '    return result\n'
+        ),
+        'b.py': (
+            'def summed(rows):\n'
+            '    acc = 0\n'
+            '    for row in rows:\n'
+            '        acc += row.cost * 3\n'
+            '    return acc\n'
+        ),
+        'c.py': (
+            'def total(items):\n'
+            '    result = 0\n'
+            '    for item in items:\n'
+            '        result -= item.price * 2\n'
+            '    return result\n'
+        ),
+        'd.py': (
+            'class Box:\n'
+            '    def __init__(self, size):\n'
+            '        self.size = size\n'
+            '        self.items = []\n'
+            '\n'
+            'class Crate:\n'
+            '    def __init__(self, weight):\n'
+            '        self.weight = weight\n'
+            '        self.items = []\n'
+        ),
+    }
+
+    def brute_force_groups(self):
+        definitions = []
+        for source, code in self.SOURCES.items():
+            for node in ast.walk(ast.parse(code)):
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    if node_count(node) >= DEFAULT_MIN_NODES:
+                        definitions.append(((source, node.name, node.lineno), erased_structure(node)))
+        groups = []
+        for key, shape in definitions:
+            members = {other for other, other_shape in definitions if other_shape == shape}
+            if len(members) > 1 and members not in groups:
+                groups.append(members)
+        return groups
+
+    def index_groups(self, index):
+        return [
+            {(member.source, member.name, member.lineno) for member in members}
+            for members in index.clone_groups().values()
+        ]
+
+    def test_clone_groups_match_pairwise_structural_comparison(self):
+        index = FingerprintIndex()
+        for source, code in self.SOURCES.items():
+            index.add(source, code)
+        expected = self.brute_force_groups()
+        self.assertIn({('a.py', 'total', 1), ('b.py', 'summed', 1)}, expected)
+        self.assertCountEqual(self.index_groups(index), expected)
+
+    def test_sizes_count_every_node_but_contexts(self):
+        tree = ast.parse(self.SOURCES['d.py'])
+        hasher = StructuralHasher()
+        for node in tree.body:
+            self.assertEqual(hasher.size(node), node_count(node))
+
+    def test_literal_types_are_kept(self):
+        digests = {
+            fingerprint_code(code, min_nodes=1)[0].digest
+            for code in ('def f(x):\n    return x + 1\n', 'def g(y):\n    return y + 2\n',
+                         'def h(z):\n    return z + "1"\n')
+        }
+        self.assertEqual(len(digests), 2)
+
+    def test_sources_can_be_replaced_and_removed(self):
+        index = FingerprintIndex()
+        index.add('a.py', self.SOURCES['a.py'])
+        index.add('b.py', self.SOURCES['b.py'])
+        self.assertEqual(len(index.clone_groups()), 1)
+
+        index.add('b.py', self.SOURCES['c.py'])
+        self.assertEqual(index.clone_groups(), {})
+        index.remove('a.py')
+        self.assertNotIn('a.py', index)
+        self.assertEqual(len(index), 1)
+
+
+class ReservoirSamplerTests(SimpleTestCase):
+    def test_keeps_everything_below_capacity(self):
+        sampler = ReservoirSampler(10, 2)
+        rows = np.arange(12, dtype=np.float32).reshape(6, 2)
+        sampler.add(rows[:4], np.arange(4))
+        sampler.add(rows[4:], np.arange(4, 6))
+        sample = sampler.sample(['a', 'b'], 6)
+        np.testing.assert_array_equal(sample.features, rows)
+        np.testing.assert_array_equal(sample.row_indices, np.arange(6))
+        self.assertFalse(sample.sampled)
+
+    def test_rows_stay_paired_with_their_indices(self):
+        sampler = ReservoirSampler(5, 1, seed=3)
+        for start in range(0, 100, 7):
+            indices = np.arange(start, min(start + 7, 100))
+            sampler.add(indices[:, None].astype(np.float32), indices)
+        sample = sampler.sample(['a'], 100)
+        self.assertTrue(sample.sampled)
+        np.testing.assert_array_equal(sample.features[:, 0], sample.row_indices)
+        self.assertEqual(list(sample.row_indices), sorted(set(sample.row_indices)))
+
+    def test_every_row_is_equally_likely_like_algorithm_r(self):
+        # Reference: sequential Algorithm R keeps each of n rows with probability k / n.
+        capacity, total, trials = 4, 20, 4000
+        reference = np.zeros(total)
+        generator = random.Random(0)
+        for _ in range(trials):
+            reservoir = []
+            for row in range(total):
+                if len(reservoir) < capacity:
+                    reservoir.append(row)
+                else:
+                    slot = generator.randint(0, row)
+                    if slot < capacity:
+                        reservoir[slot] = row
+            reference[reservoir] += 1
+
+        counts = np.zeros(total)
+        for seed in range(trials):
+            sampler = ReservoirSampler(capacity, 1, seed=seed)
+            for start in range(0, total, 3):
+                indices = np.arange(start, min(start + 3, total))
+                sampler.add(indices[:, None].astype(np.float32), indices)
+            counts[sampler.indices[:sampler.size]] += 1
+
+        expected = trials * capacity / total
+        np.testing.assert_allclose(counts, expected, rtol=0.15)
+        np.testing.assert_allclose(reference, expected, rtol=0.15)
+
+
+class AsyncTimingsTests(SimpleTestCase):
+    def test_async_events_end_with_the_stages_they_ran(self):
+        async def events():
+            with stage('test.first'):
+                yield 'a', 1
+            with stage('test.second'):
+                pass
+            yield 'b', 2
+
+        async def consume():
+            timed = aiter_with_timings(events())
+            # A streamed response resumes the generator from another task than the one that started it.
+            first = await asyncio.ensure_future(anext(timed))
+            return [first] + [event async for event in timed]
+
+        received = asyncio.run(consume())
+        self.assertEqual(received[:2], [('a', 1), ('b', 2)])
+        event, timings = received[2]
+        self.assertEqual(event, 'timings')
+        self.assertEqual(set(timings), {'test.first', 'test.second'})
+        self.assertEqual(timings['test.second']['calls'], 1)
+
+
+class AsyncGitHubClientTests(SimpleTestCase):
+    def test_client_is_shared_within_a_loop_and_closed_with_it(self):
+        async def clients():
+            return await async_github.get_async_github_client(), await async_github.get_async_github_client()
+
+        first, second = asyncio.run(clients())
+        self.assertIs(first, second)
+        self.assertTrue(all(client.is_closed for client, _ in first.pools))
+
+        other, _ = asyncio.run(clients())
+        self.assertIsNot(other, first)
+
+    def test_http_cache_is_closed_with_the_loop(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with self.settings(CODECHECKER_GITHUB={'HTTP_CACHE_PATH': f'{directory}/http_cache.sqlite3'}):
+                client = asyncio.run(async_github.get_async_github_client())
+            with self.assertRaises(sqlite3.ProgrammingError):
+                client.http_cache.stats()
+
+    def test_at_most_max_workers_fetches_are_in_flight(self):
+        client = async_github.AsyncGitHubClient(max_workers=3)
+        started = []
+
+        async def fetch(item):
+            started.append(item)
+            await asyncio.sleep(0.001 * (item % 4))
+            return item
+
+        async def run():
+            results = []
+            async for item in client._as_completed(fetch, range(20)):
+                self.assertLessEqual(len(started) - len(results), 3)
+                results.append(item)
+            await client.aclose()
+            return results
+
+        self.assertEqual(sorted(asyncio.run(run())), list(range(20)))
+
+
+def tarball(files):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as archive:
+        directory = tarfile.TarInfo('octo-repo-abc123/pkg')
+        directory.type = tarfile.DIRTYPE
+        archive.addfile(directory)
+        for path, data in files.items():
+            member = tarfile.TarInfo(f'octo-repo-abc123/{path}')
+            member.size = len(data)
+            archive.addfile(member, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+class StubGitHubHandler(BaseHTTPRequestHandler):
+    """
+    Serves a repository tarball, a resource with an ETag and numbered text files.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send(self, status, body=b'', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.path == '/repos/octo/repo/tarball':
+            return self.send(200, server.tarball, {'Content-Type': 'application/gzip'})
+        if self.path == '/repos/octo/repo':
+            if self.headers.get('If-None-Match') == '"v1"':
+                return self.send(304, headers={'ETag': '"v1"'})
+            return self.send(200, json.dumps({'name': 'repo'}).encode(),
+                             {'Content-Type': 'application/json', 'ETag': '"v1"'})
+        if self.path.startswith('/raw/'):
+            return self.send(200, self.path[len('/raw/'):].encode(), {'Content-Type': 'text/plain'})
+        self.send(404)
+
+
+class GitHubClientTests(SimpleTestCase):
+    FILES = {
+        'pkg/app.py': b'print("hi")\n',
+        'pkg/notes.txt': b'not python\n',
+        'pkg/big.py': b'x = 1\n' * 100,
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubGitHubHandler)
+        cls.server.daemon_threads = True
+        cls.server.lock = threading.Lock()
+        cls.server.tarball = tarball(cls.FILES)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests = []
+        self.base = f'http://127.0.0.1:{self.server.server_port}'
+
+    def github(self, **kwargs):
+        client = GitHubClient(api_url=self.base, **kwargs)
+        self.addCleanup(client.close)
+        return client
+
+    def test_archive_keeps_matching_files_under_the_size_limit(self):
+        entries = list(self.github().iter_archive('octo', 'repo', extensions=('.py',), max_file_size=100))
+        self.assertEqual(entries, [('pkg/app.py', 'print("hi")\n', git_blob_sha(self.FILES['pkg/app.py']))])
+
+        entries = self.github().iter_archive('octo', 'repo', extensions=(), max_file_size=10_000)
+        self.assertEqual({path for path, _, _ in entries}, set(self.FILES))
+
+    def test_not_modified_answer_is_replayed_from_the_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = HttpCache(f'{directory}/http_cache.sqlite3')
+            client = self.github(http_cache=cache)
+            url = f'{self.base}/repos/octo/repo'
+
+            first = client.get(url)
+            second = client.get(url)
+
+            self.assertEqual(second.status_code, 200)
+            self.assertTrue(second.from_cache)
+            self.assertEqual(second.json(), first.json())
+            self.assertEqual(self.server.requests, [('/repos/octo/repo', None), ('/repos/octo/repo', '"v1"')])
+            self.assertEqual(cache.stats(), {'entries': 1, 'hits': 1, 'misses': 1})
+
+    def test_downloads_are_bounded_and_all_delivered(self):
+        client = self.github(max_workers=2)
+        urls = [f'{self.base}/raw/{index}' for index in range(20)]
+        received = {}
+        for url, text in client.iter_downloads(urls):
+            # Never more than 2 * max_workers requests ahead of the consumer.
+            self.assertLessEqual(len(self.server.requests), len(received) + 4)
+            received[url] = text
+        self.assertEqual(received, {url: url.rsplit('/', 1)[1] for url in urls})
@@ -1,10 +1,16 @@
 from django.urls import path
-from .views import CodeCheckView , GithubRepoAnalysisView , DatasetCheckView
+from .views import CodeCheckView , GithubRepoAnalysisView , AsyncGithubRepoAnalysisView, DatasetCheckView, CacheStatsView, CodeBatchCheckView, JobStatusView, ChartView, MetricsView
 
 urlpatterns = [
     path('check/', CodeCheckView.as_view(), name='code-check'),
+    path('check/cache-stats/', CacheStatsView.as_view(), name='check-cache-stats'),
+    path('check-batch/', CodeBatchCheckView.as_view(), name='code-check-batch'),
     path('check-repo/', GithubRepoAnalysisView.as_view(), name='check-repo'),
+    path('check-repo-async/', AsyncGithubRepoAnalysisView.as_view(), name='check-repo-async'),
     path('check-dataset/', DatasetCheckView.as_view(), name='check-dataset'),
+    path('jobs/<uuid:job_id>/', JobStatusView.as_view(), name='job-status'),
+    path('charts/<slug:chart_id>.<slug:fmt>', ChartView.as_view(), name='chart'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 
 
 ]
\ No newline at end of file
@@ -1,142 +1,124 @@
-import ast
-from rest_framework.views import APIView
-from rest_framework import serializers, status
-from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
-import pandas as pd
-from sklearn.ensemble import IsolationForest
-import pandas as pd
-from sklearn.ensemble import IsolationForest
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+
 import numpy as np
-from rest_framework.views import APIView
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status
+from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-import pandas as pd
-from sklearn.ensemble import IsolationForest
-import matplotlib.pyplot as plt
-from io import BytesIO 
-import logging
-import seaborn as sns
-from sklearn.svm import OneClassSVM
-from sklearn.cluster import KMeans
-import shap 
-import io
-import base64
-import numpy as np
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.views import APIView
+
 from .ml_model import (
     analyze_code,
     analyze_github_repo,
-    fetch_repo_contents,
-    analyze_code_contents,
-    detect_security_vulnerabilities,
+    list_repo_files,
+    list_repo_tree,
+    iter_repo_archive,
+    analyze_repo_file,
     detect_code_clones,
     detect_code_clusters,
     extract_keywords_from_code,
     detect_code_smells,
     detect_deprecated_libraries,
     detect_anomalies,
-    fetch_commits,
+    analyze_snippet_batch,
+    iter_commits,
     count_commits_per_day,visualize_commit_counts
 )
 from .utils import find_unused_imports, remove_unused_imports  
-from .serializers import CodeSnippetSerializer
-
-class CodeCheckView(APIView):
-    permission_classes = [AllowAny]
-
-    def correct_syntax_errors(self, code):
-        """
-        Attempts to correct common syntax errors in the provided code.
-        """
-        correction_message = None
-        max_iterations = 10
-
-        for _ in range(max_iterations):
-            try:
-                ast.parse(code)
-                return code, correction_message
-            except SyntaxError as e:
-                lines = code.split('\n')
-                error_line_number = e.lineno - 1
-                error_line = lines[error_line_number]
-
-                new_correction_message = None
+from .analysis import AnalysisContext, build_context
+from .cache import ANALYZER_VERSION, code_digest, get_result_cache, load_blob_analyses, store_blob_analysis
+from .code_model import code_model_version
+from .fingerprints import Fingerprint, FingerprintIndex
+from .github import DEFAULT_GITHUB, get_github_client, parse_repo_url
+from .flags import is_truthy
+from .jobs import job_payload, save_upload, submit_job
+from .models import AnalysisJob
+from .serializers import CodeSnippetSerializer, CodeBatchSerializer
+from .ingest import DatasetError, load_dataset
+from .instrumentation import aiter_with_timings, collect_timings, iter_with_timings, render_metrics, stage
+from .dataset_models import make_iso_forest, make_kmeans, make_svm
+from .keywords import KeywordHistogram
+from .lazy import lazy_module
+from .parallel import get_file_analysis_executor, run_dataset_stages
+from .repo_index import diff_tree, get_repository, update_index
+from .streaming import (
+    astart_events, ndjson_lines, start_events, stream_format, stream_response, streaming_renderer_classes,
+)
+from .syntax_repair import correct_syntax_errors
+from .charts import (
+    CHART_FORMATS, anomaly_chart_data, chart_spec, cluster_chart_data, register_chart, register_spec, render_chart,
+)
 
-                if error_line.count('(') > error_line.count(')'):
-                    lines[error_line_number] = error_line + ')'
-                    new_correction_message = "Added missing closing parenthesis."
+shap = lazy_module('shap')
+httpx = lazy_module('httpx')
+async_github = lazy_module('codechecker.async_github')
 
-                elif error_line.count('[') > error_line.count(']'):
-                    lines[error_line_number] = error_line + ']'
-                    new_correction_message = "Added missing closing bracket."
+logger = logging.getLogger(__name__)
 
-                elif error_line.count('{') > error_line.count('}'):
-                    lines[error_line_number] = error_line + '}'
-                    new_correction_message = "Added missing closing brace."
+# Cached /check/ results carry the specs behind their chart URLs under this key.
+CHART_SPECS_KEY = '_chart_specs'
 
-                elif any(error_line.strip().startswith(keyword) for keyword in ('if', 'elif', 'else', 'for', 'while', 'def', 'class')):
-                    if not error_line.strip().endswith(':'):
-                        lines[error_line_number] = error_line + ':'
-                        new_correction_message = "Added missing colon at the end of the statement."
+DEFAULT_SHAP = {
+    'MAX_ANOMALIES': 500,
+    'SAMPLE_ROWS': 200,
+    'BACKGROUND_CLUSTERS': 10,
+    'CHUNK_ROWS': 100,
+    'TIME_BUDGET': 10.0,
+}
 
-                elif error_line.count('"') % 2 != 0:
-                    lines[error_line_number] = error_line + '"'
-                    new_correction_message = "Added missing double quotation mark."
-                elif error_line.count("'") % 2 != 0:
-                    lines[error_line_number] = error_line + "'"
-                    new_correction_message = "Added missing single quotation mark."
 
-                elif 'expected an indented block' in str(e):
-                    indentation_level = len(error_line) - len(error_line.lstrip())
-                    lines.insert(error_line_number + 1, ' ' * (indentation_level + 4) + 'pass')
-                    new_correction_message = "Added 'pass' statement to fix indentation."
+def timings_requested(request, data=None):
+    """
+    Whether the client opted into per-stage timings with a ``timings`` query parameter or field.
 
-                elif 'unexpected EOF while parsing' in str(e):
-                    lines[error_line_number] = error_line + '\npass'
-                    new_correction_message = "Added 'pass' to complete the statement."
+    Plain Django requests pass their parsed body as data; DRF requests
+    default to request.data.
+    """
+    requested = getattr(request, 'query_params', request.GET).get('timings')
+    if data is None:
+        data = getattr(request, 'data', None)
+    if requested is None and hasattr(data, 'get'):
+        requested = data.get('timings')
+    return is_truthy(requested)
 
-                elif 'cannot assign to' in str(e) and error_line.strip().endswith('='):
-                    lines[error_line_number] = error_line + ' None'
-                    new_correction_message = "Added 'None' to complete the assignment."
 
-                else:
-                    return code, f"Syntax Error: {e}"
+class CodeCheckView(APIView):
+    permission_classes = [AllowAny]
+    renderer_classes = streaming_renderer_classes()
 
-                code = '\n'.join(lines)
-                correction_message = (correction_message or "") + " " + (new_correction_message or "")
+    def correct_syntax_errors(self, code):
+        """
+        Attempts to correct common syntax errors in the provided code.
 
-        return code, correction_message or "Reached maximum iterations, some errors might still be present."
+        Returns the (possibly corrected) code, a correction message and the
+        parsed tree, which is None when the code still does not parse.
+        """
+        return correct_syntax_errors(code)
 
-    def visualize_keyword_distribution(self, keyword_data):
+    def keyword_chart_spec(self, keyword_data):
         """
-        Generate a bar chart visualization of keyword distribution with increased spacing between bars.
+        Spec of a bar chart of the keyword distribution.
         """
-        labels = keyword_data['labels']
-        data = keyword_data['data']
-
-        fig, ax = plt.subplots(figsize=(14, 8)) 
-        bars = ax.bar(labels, data, width=0.6)  
-
-        ax.set_xlabel('Keywords')
-        ax.set_ylabel('Frequency')
-        ax.set_title('Keyword Distribution')
-
-        ax.set_xticks(range(len(labels)))
-        ax.set_xticklabels(labels, rotation=45, ha='right') 
-
-        buffer = BytesIO()
-        plt.tight_layout()  
-        plt.savefig(buffer, format='png')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode()
-        buffer.close()
-        plt.close(fig)
+        return chart_spec('keyword_distribution', {
+            'labels': keyword_data['labels'],
+            'data': keyword_data['data'],
+        })
 
-        return image_base64
-
-    def visualize_code_clones_heatmap(self, code_clones):
+    @stage('clone_heatmap')
+    def clone_heatmap_spec(self, code_clones):
         """
-        Generate a heatmap visualization of code clone similarities.
+        Spec of a heatmap of code clone similarities.
         """
         snippets = [clone['snippet1'] for clone in code_clones] + [clone['snippet2'] for clone in code_clones]
         similarity_matrix = np.zeros((len(snippets), len(snippets)))
@@ -145,66 +127,240 @@ class CodeCheckView(APIView):
             for j, clone2 in enumerate(code_clones):
                 similarity_matrix[i, j] = clone1['similarity'] if i == j else clone2['similarity']
 
-        fig, ax = plt.subplots(figsize=(10, 8))
-        sns.heatmap(similarity_matrix, annot=True, cmap='YlGnBu', fmt='.2f', ax=ax)
-        plt.title('Code Clones Similarity Heatmap')
-        plt.xlabel('Code Snippets')
-        plt.ylabel('Code Snippets')
-        plt.tight_layout()
+        return chart_spec('clone_heatmap', {'matrix': similarity_matrix.tolist()})
+
+    def prepare_code(self, code):
+        """
+        Correct syntax errors and strip unused imports from a submission.
+
+        Returns the cleaned code, the correction message, the unused imports
+        and the shared analysis context, or None as the context when the code
+        still does not parse.
+        """
+        corrected_code, correction_message, tree = self.correct_syntax_errors(code)
+
+        if tree is None:
+            return corrected_code, correction_message, [], None
+
+        context = AnalysisContext(corrected_code, tree=tree)
+        unused_imports = find_unused_imports(corrected_code, context=context)
+        cleaned_code = remove_unused_imports(corrected_code, context=context)
+        if cleaned_code != corrected_code:
+            corrected_code = cleaned_code
+            context = build_context(corrected_code)
 
-        buffer = BytesIO()
-        plt.savefig(buffer, format='png')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode()
-        buffer.close()
-        plt.close(fig)
+        result = correction_message if correction_message else "No syntax errors detected."
+        return corrected_code, result, unused_imports, context
+
+    def snippet_detectors(self, code, context):
+        """
+        (response key, detector) for every detector that only looks at a single prepared snippet, cheapest first.
+        """
+        return [
+            ("keywords", lambda: extract_keywords_from_code(code)),
+            ("code_smells", lambda: detect_code_smells(code, context=context)),
+            ("deprecated_libraries", lambda: detect_deprecated_libraries(code)),
+            ("anomaly_detection_result", lambda: detect_anomalies([code], context=context)),
+        ]
+
+    def analyze_snippet(self, code, context):
+        """
+        Run the detectors that only look at a single prepared snippet.
+        """
+        return {key: detector() for key, detector in self.snippet_detectors(code, context)}
 
-        return image_base64
+    def iter_check_events(self, code, response_data, chart_specs=None):
+        """
+        Run the /check/ pipeline, yielding each (key, value) of the response as soon as it is ready.
+
+        Values are also collected into response_data, and the spec behind
+        every chart URL into chart_specs. Returns True when the code parsed
+        and every detector ran, i.e. when the response may be cached.
+        """
+        chart_specs = {} if chart_specs is None else chart_specs
+
+        def ready(key, value):
+            response_data[key] = value
+            return key, value
+
+        corrected_code, result, unused_imports, context = self.prepare_code(code)
+        yield ready("result", result)
+        if context is None:
+            return False
+
+        yield ready("unused_imports", unused_imports)
+        yield ready("corrected_code", corrected_code)
+        for key, detector in self.snippet_detectors(corrected_code, context):
+            yield ready(key, detector())
+
+        code_clones = detect_code_clones([corrected_code, corrected_code])
+        yield ready("code_clones", code_clones)
+        yield ready("clusters", detect_code_clusters([corrected_code, corrected_code]))
+
+        keyword_distribution = analyze_code(corrected_code, 'keyword_distribution')
+        chart_specs["keyword_chart"] = self.keyword_chart_spec(keyword_distribution)
+        yield ready("keyword_chart", register_spec(chart_specs["keyword_chart"]))
+        chart_specs["code_clone_heatmap"] = self.clone_heatmap_spec(code_clones)
+        yield ready("code_clone_heatmap", register_spec(chart_specs["code_clone_heatmap"]))
+        return True
+
+    def iter_cached_check_events(self, code, cache_key, response_data):
+        chart_specs = {}
+        if (yield from self.iter_check_events(code, response_data, chart_specs)):
+            # The specs are cached with the result so its chart URLs never outlive them.
+            get_result_cache().set(cache_key, code, {**response_data, CHART_SPECS_KEY: chart_specs})
+
+    def iter_cache_hit_events(self, cached):
+        """
+        Replay a cached response, registering its charts again first so their URLs resolve.
+        """
+        for spec in cached.get(CHART_SPECS_KEY, {}).values():
+            register_spec(spec)
+        return ((key, value) for key, value in cached.items() if key != CHART_SPECS_KEY)
 
     def post(self, request, *args, **kwargs):
         serializer = CodeSnippetSerializer(data=request.data)
         if serializer.is_valid():
             code = serializer.validated_data.get("code")
+            stream = stream_format(request)
+
+            result_cache = get_result_cache()
+            # Results depend on the anomaly model too, so a retrained model never serves stale entries.
+            cache_key = code_digest(code, f'{ANALYZER_VERSION}:{code_model_version()}')
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                events, headers = self.iter_cache_hit_events(cached), {'X-Cache': 'HIT'}
+            else:
+                events, headers = self.iter_cached_check_events(code, cache_key, {}), {'X-Cache': 'MISS'}
+            if timings_requested(request):
+                events = iter_with_timings(events)
+
+            if stream:
+                return stream_response(events, stream, headers=headers)
+            return Response(dict(events), status=status.HTTP_200_OK, headers=headers)
 
-            corrected_code, correction_message = self.correct_syntax_errors(code)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-            try:
-                ast.parse(corrected_code)
-            except SyntaxError as e:
-                return Response({"result": f"Syntax Error: {e}"}, status=status.HTTP_200_OK)
-
-            unused_imports = find_unused_imports(corrected_code)
-            corrected_code = remove_unused_imports(corrected_code)
-
-            anomaly_detection_result = detect_anomalies([corrected_code])
-            code_clones = detect_code_clones([corrected_code, corrected_code])
-            keywords = extract_keywords_from_code(corrected_code)
-            code_smells = detect_code_smells(corrected_code)
-            deprecated_libraries = detect_deprecated_libraries(corrected_code)
-            clusters = detect_code_clusters([corrected_code, corrected_code])
-
-            keyword_distribution = analyze_code(corrected_code, 'keyword_distribution')
-            keyword_chart = self.visualize_keyword_distribution(keyword_distribution)
-            code_clone_heatmap = self.visualize_code_clones_heatmap(code_clones)
-
-            response_data = {
-                "result": correction_message if correction_message else "No syntax errors detected.",
+
+class CodeBatchCheckView(CodeCheckView):
+    """
+    Analyze many snippets at once, fitting the clone and cluster models a
+    single time over the whole batch and streaming one NDJSON line per snippet.
+    """
+
+    def post(self, request, *args, **kwargs):
+        serializer = CodeBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        snippets = serializer.validated_data['snippets']
+        prepared = [self.prepare_code(code) for code in snippets]
+        batch = analyze_snippet_batch(
+            [code for code, _, _, _ in prepared],
+            threshold=serializer.validated_data['threshold'],
+            n_clusters=serializer.validated_data['n_clusters'],
+            contexts=[context for _, _, _, context in prepared],
+        )
+
+        return StreamingHttpResponse(
+            ndjson_lines(self.iter_batch_results(prepared, batch)),
+            content_type='application/x-ndjson',
+        )
+
+    def iter_batch_results(self, prepared, batch):
+        clones_by_index = defaultdict(list)
+        for i, j, similarity in batch['clone_pairs']:
+            clones_by_index[i].append({'index': j, 'similarity': similarity})
+            clones_by_index[j].append({'index': i, 'similarity': similarity})
+
+        for index, (code, result, unused_imports, context) in enumerate(prepared):
+            snippet_result = {
+                "index": index,
+                "result": result,
                 "unused_imports": unused_imports,
-                "corrected_code": corrected_code,
-                "anomaly_detection_result": anomaly_detection_result,
-                "keywords": keywords,
-                "code_smells": code_smells,
-                "deprecated_libraries": deprecated_libraries,
-                "code_clones": code_clones,
-                "clusters": clusters,
-                "keyword_chart": keyword_chart,  
-                "code_clone_heatmap": code_clone_heatmap,  
+                "corrected_code": code,
+            }
+            if context is not None:
+                snippet_result.update(self.analyze_snippet(code, context))
+            snippet_result["code_clones"] = clones_by_index.get(index, [])
+            snippet_result["structural_clones"] = [
+                {
+                    "name": fingerprint.name,
+                    "lineno": fingerprint.lineno,
+                    "matches": [
+                        {"index": other.source, "name": other.name, "lineno": other.lineno}
+                        for other in others
+                    ],
+                }
+                for fingerprint, others in batch['structural_index'].matches_for(index).items()
+            ]
+            snippet_result["cluster"] = batch['labels'][index]
+            yield snippet_result
+
+        yield {
+            "summary": {
+                "snippets": len(prepared),
+                "clone_pairs": len(batch['clone_pairs']),
+                "structural_clone_groups": len(batch['structural_index'].clone_groups()),
+                "cluster_centers": batch['cluster_centers'],
             }
+        }
 
-            return Response(response_data, status=status.HTTP_200_OK)
 
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
+class JobStatusView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request, job_id):
+        try:
+            job = AnalysisJob.objects.get(pk=job_id)
+        except AnalysisJob.DoesNotExist:
+            return Response({'error': 'Job not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job_payload(request, job, include_result=True), status=status.HTTP_200_OK)
+
+
+class CacheStatsView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return Response(get_result_cache().stats(), status=status.HTTP_200_OK)
+
+
+class MetricsView(APIView):
+    """
+    Stage timing histograms of this process in the Prometheus text format.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class ChartView(APIView):
+    """
+    Serve a registered chart as PNG or SVG, rendering it on first request.
+
+    Chart ids are content hashes, so responses are immutable and can be
+    cached by browsers and proxies indefinitely.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, chart_id, fmt):
+        if fmt not in CHART_FORMATS:
+            return Response({'error': f'Unsupported chart format: {fmt}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        etag = f'"{chart_id}.{fmt}"'
+        if request.headers.get('If-None-Match') == etag:
+            return HttpResponse(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        image = render_chart(chart_id, fmt)
+        if image is None:
+            return Response({'error': 'Chart not found or expired.'}, status=status.HTTP_404_NOT_FOUND)
+
+        return HttpResponse(image, content_type=CHART_FORMATS[fmt], headers={
+            'ETag': etag,
+            'Cache-Control': 'public, max-age=31536000, immutable',
+        })
+
 
 class CodeAnalysisView(APIView):
     permission_classes = [AllowAny]
@@ -217,33 +373,442 @@ class CodeAnalysisView(APIView):
 
 
 
+INGESTION_MODES = ('tree', 'archive', 'contents')
+
+
+def ingestion_mode(mode):
+    """
+    The repository ingestion mode to use: the requested one, else CODECHECKER_GITHUB['INGESTION'].
+    """
+    mode = mode or {**DEFAULT_GITHUB, **getattr(settings, 'CODECHECKER_GITHUB', {})}['INGESTION']
+    if mode not in INGESTION_MODES:
+        raise ValueError("Unknown ingestion mode. Use 'tree', 'archive' or 'contents'.")
+    return mode
+
+
+def fetches_blobs(repository, missing):
+    """
+    Whether a tree scan should fetch its missing blobs one by one rather than read the tarball.
+
+    Every blob costs its own API request, so a repository that was never
+    indexed, or a delta above CODECHECKER_GITHUB['TREE_MAX_BLOBS'], is
+    cheaper as a single tarball download.
+    """
+    limit = {**DEFAULT_GITHUB, **getattr(settings, 'CODECHECKER_GITHUB', {})}['TREE_MAX_BLOBS']
+    return bool(repository.tree_sha) and len(missing) <= limit
+
+
+def repository_options(data):
+    """
+    The repository scan options of a /check-repo/ request body.
+    """
+    return {
+        'repo_url': data.get('repo_url', ''),
+        'mode': data.get('mode'),
+        'since': data.get('since'),
+        'until': data.get('until'),
+        'max_commit_pages': data.get('max_commit_pages'),
+    }
+
+
+class RepositorySummary:
+    """
+    The repository-wide results of a scan, merged one file at a time.
+
+    Only the keyword histogram and the structural fingerprints are kept,
+    so a scan never holds every file's analysis at once.
+    """
+
+    def __init__(self):
+        self.keyword_histogram = KeywordHistogram()
+        self.fingerprint_index = FingerprintIndex()
+
+    def add(self, filename, result):
+        """
+        Merge a file's analysis and return the payload of its 'file' event.
+        """
+        self.keyword_histogram.update(result['keywords'])
+        self.fingerprint_index.add(filename, fingerprints=[
+            Fingerprint(digest, filename, name, lineno, size)
+            for digest, name, lineno, size in result['fingerprints']
+        ])
+        return {
+            'path': filename,
+            'analysis': result['analysis'],
+            # Stored analyses are per blob, and one blob can sit at several paths.
+            'security_vulnerabilities': [
+                {**vulnerability, 'file': filename} for vulnerability in result['vulnerabilities']
+            ],
+            'code_smells': result['code_smells'],
+            'unused_imports': result['unused_imports'],
+        }
+
+    def events(self):
+        yield 'structural_clones', [
+            [{'path': member.source, 'name': member.name, 'lineno': member.lineno} for member in members]
+            for members in self.fingerprint_index.clone_groups().values()
+        ]
+        keyword_distribution = self.keyword_histogram.distribution()
+        yield 'keyword_distribution', keyword_distribution
+        yield 'keyword_chart', register_chart('keyword_distribution', {
+            'labels': keyword_distribution['labels'],
+            'data': keyword_distribution['data'],
+        })
+
+
+class RepositoryResponse:
+    """
+    Assembles repository scan events into the single JSON response of a non-streaming request.
+    """
+
+    def __init__(self):
+        self.data = {
+            'analysis_results': {},
+            'security_vulnerabilities': [],
+            'code_smells': {},
+            'unused_imports': {},
+        }
+
+    def add(self, event, data):
+        if event != 'file':
+            self.data[event] = data
+            return
+        path = data['path']
+        self.data['analysis_results'][path] = data['analysis']
+        self.data['security_vulnerabilities'].extend(data['security_vulnerabilities'])
+        if data['code_smells']:
+            self.data['code_smells'][path] = data['code_smells']
+        if data['unused_imports']:
+            self.data['unused_imports'][path] = data['unused_imports']
+
+
 class GithubRepoAnalysisView(APIView):
     permission_classes = [AllowAny]
+    renderer_classes = streaming_renderer_classes()
 
     def post(self, request):
-        repo_url = request.data.get('repo_url', '')
+        options = repository_options(request.data)
+        if is_truthy(request.data.get('async')):
+            job = submit_job(AnalysisJob.KIND_REPOSITORY, options)
+            return Response(job_payload(request, job), status=status.HTTP_202_ACCEPTED)
+
+        stream = stream_format(request)
+        events = self.iter_repository_events(**options)
+        if timings_requested(request):
+            events = iter_with_timings(events)
         try:
-            repo_info = analyze_github_repo(repo_url)  
-            code_contents = fetch_repo_contents(repo_url)  
-            analysis_results = analyze_code_contents(code_contents) 
-            security_vulnerabilities = detect_security_vulnerabilities(code_contents) 
-            
-            commits = fetch_commits(repo_url)
-            commit_counts = count_commits_per_day(commits)
-            commit_chart = visualize_commit_counts(commit_counts)
-            
-            return Response({
-                'repository': repo_info,
-                'analysis_results': analysis_results,
-                'security_vulnerabilities': security_vulnerabilities,
-                'commit_chart': commit_chart,  
-            }, status=status.HTTP_200_OK)
-            
+            if stream:
+                return stream_response(start_events(events), stream)
+            response = RepositoryResponse()
+            for event, data in events:
+                response.add(event, data)
+            return Response(response.data, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        
-    
 
+    def analyze_repository(self, repo_url, mode=None, since=None, until=None, max_commit_pages=None, progress=None):
+        """
+        Fetch and analyze a repository, its metadata and its commit activity.
+        """
+        response = RepositoryResponse()
+        for event, data in self.iter_repository_events(repo_url, mode, since, until, max_commit_pages, progress):
+            response.add(event, data)
+        return response.data
+
+    def iter_repository_events(self, repo_url, mode=None, since=None, until=None, max_commit_pages=None,
+                               progress=None):
+        """
+        Analyze a repository, yielding a 'file' event with each file's findings as soon as they are ready.
+
+        The repository-wide results (metadata, commit chart, structural
+        clones, keyword distribution and the scan summary) follow once every
+        file is in. Per-file results are not retained; only the keyword
+        histogram and the structural fingerprints are merged as files arrive.
+        """
+        progress = progress or (lambda message: None)
+        mode = ingestion_mode(mode)
+
+        client = get_github_client()
+        repo_future = client.submit(analyze_github_repo, repo_url, client)
+        commits_future = client.submit(
+            lambda: count_commits_per_day(iter_commits(
+                repo_url, client, since=since, until=until, max_pages=max_commit_pages,
+            ))
+        )
+
+        progress('Analyzing repository files')
+        scan = {'mode': mode}
+        if mode == 'tree':
+            file_results = self.iter_tree(repo_url, client, scan)
+        elif mode == 'archive':
+            file_results = self.iter_archive(repo_url, client, scan)
+        else:
+            file_results = self.iter_listing(repo_url, client, scan)
+
+        summary = RepositorySummary()
+        for filename, result in file_results:
+            yield 'file', summary.add(filename, result)
+        yield from summary.events()
+
+        progress('Summarizing commit activity')
+        yield 'repository', repo_future.result()
+        yield 'commit_chart', visualize_commit_counts(commits_future.result())
+        yield 'scan', scan
+
+    def iter_tree(self, repo_url, client, scan):
+        """
+        Incrementally analyze the repository against its stored path -> blob SHA index.
+
+        The recursive tree is diffed with the index and only blobs without a
+        stored analysis are downloaded and analyzed, so a rescan costs one
+        (usually conditional) tree request plus work proportional to the
+        change. Stored results are yielded first, then each downloaded blob
+        as it arrives. Truncated trees, first scans and deltas too large to
+        fetch blob by blob (see fetches_blobs) read the tarball instead and
+        still update the index.
+        """
+        tree_sha, files, truncated = list_repo_tree(repo_url, client)
+        if truncated:
+            scan['mode'] = 'archive'
+            yield from self.iter_archive(repo_url, client, scan)
+            return
+
+        owner, repo = parse_repo_url(repo_url)
+        repository = get_repository(owner, repo)
+        diff = diff_tree(repository, files)
+        known = load_blob_analyses(files.values())
+
+        missing = defaultdict(list)
+        for path, sha in files.items():
+            if sha not in known:
+                missing[sha].append(path)
+        if not fetches_blobs(repository, missing):
+            scan['mode'] = 'archive'
+            yield from self.iter_archive(repo_url, client, scan)
+            update_index(repository, diff, tree_sha)
+            scan.update(**diff.stats())
+            return
+
+        for path, sha in files.items():
+            if sha in known:
+                yield path, known[sha]
+        try:
+            for sha, data in client.iter_blobs(owner, repo, list(missing)):
+                result = analyze_repo_file(missing[sha][0], data.decode('utf-8', errors='replace'))
+                store_blob_analysis(sha, result)
+                for path in missing[sha]:
+                    yield path, result
+        except requests.RequestException as e:
+            raise ValueError(f"Error fetching repository blobs: {e}")
+
+        update_index(repository, diff, tree_sha)
+        scan.update(files=len(files), analyzed=len(missing), **diff.stats())
+
+    def iter_archive(self, repo_url, client, scan):
+        """
+        Analyze every file of the repository tarball as it streams in,
+        reusing stored results for blobs that were analyzed before.
+        """
+        files = analyzed = 0
+        for filename, content, sha in iter_repo_archive(repo_url, client):
+            result = load_blob_analyses([sha]).get(sha)
+            if result is None:
+                result = analyze_repo_file(filename, content)
+                store_blob_analysis(sha, result)
+                analyzed += 1
+            files += 1
+            yield filename, result
+        scan.update(files=files, analyzed=analyzed)
+
+    def iter_listing(self, repo_url, client, scan):
+        """
+        Analyze the top-level files of the repository, downloading only
+        blobs whose analysis is not stored yet.
+        """
+        files = list_repo_files(repo_url, client)
+        known = load_blob_analyses(file['sha'] for file in files)
+
+        missing = {}
+        for file in files:
+            if file['sha'] in known:
+                yield file['name'], known[file['sha']]
+            else:
+                missing[file['download_url']] = file
+        for url, text in client.iter_downloads(list(missing)):
+            file = missing[url]
+            result = analyze_repo_file(file['name'], text)
+            store_blob_analysis(file['sha'], result)
+            yield file['name'], result
+
+        scan.update(files=len(files), analyzed=len(missing))
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncGithubRepoAnalysisView(View):
+    """
+    GithubRepoAnalysisView for ASGI deployments: the same requests and responses, without a thread per scan.
+
+    GitHub traffic goes through the event loop's AsyncGitHubClient, file
+    analysis runs in the file analysis process pool and ORM calls in
+    sync_to_async, so a scan waiting on the network costs the process a
+    suspended coroutine. DRF views are synchronous, so this is a plain
+    Django view speaking the same JSON.
+    """
+    http_method_names = ['post']
+
+    async def post(self, request):
+        if request.content_type == 'application/json':
+            try:
+                data = json.loads(request.body or b'{}')
+            except ValueError:
+                return JsonResponse({'error': 'Request body is not valid JSON.'}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            data = request.POST
+        options = repository_options(data)
+        if is_truthy(data.get('async')):
+            job = await sync_to_async(submit_job)(AnalysisJob.KIND_REPOSITORY, options)
+            return JsonResponse(job_payload(request, job), status=status.HTTP_202_ACCEPTED)
+
+        stream = stream_format(request, data)
+        events = self.aiter_repository_events(**options)
+        if timings_requested(request, data):
+            events = aiter_with_timings(events)
+        try:
+            if stream:
+                return stream_response(await astart_events(events), stream)
+            response = RepositoryResponse()
+            async for event, payload in events:
+                response.add(event, payload)
+            return JsonResponse(response.data, encoder=JSONEncoder)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    async def aiter_repository_events(self, repo_url, mode=None, since=None, until=None, max_commit_pages=None):
+        """
+        The events of GithubRepoAnalysisView.iter_repository_events, produced without blocking the event loop.
+        """
+        mode = ingestion_mode(mode)
+        client = await async_github.get_async_github_client()
+        repo_task = asyncio.ensure_future(async_github.fetch_repo_summary(repo_url, client))
+        commits_task = asyncio.ensure_future(
+            async_github.count_commits(repo_url, client, since=since, until=until, max_pages=max_commit_pages)
+        )
+        try:
+            scan = {'mode': mode}
+            if mode == 'tree':
+                file_results = self.aiter_tree(repo_url, client, scan)
+            elif mode == 'archive':
+                file_results = self.aiter_archive(repo_url, scan)
+            else:
+                file_results = self.aiter_listing(repo_url, client, scan)
+
+            summary = RepositorySummary()
+            async for filename, result in file_results:
+                yield 'file', summary.add(filename, result)
+            for event in await sync_to_async(list)(summary.events()):
+                yield event
+
+            yield 'repository', await repo_task
+            yield 'commit_chart', await sync_to_async(visualize_commit_counts)(await commits_task)
+            yield 'scan', scan
+        finally:
+            repo_task.cancel()
+            commits_task.cancel()
+
+    async def analyze_file(self, filename, content):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_file_analysis_executor(), analyze_repo_file, filename, content)
+
+    async def aiter_tree(self, repo_url, client, scan):
+        """
+        GithubRepoAnalysisView.iter_tree over the async client: only blobs without a stored analysis are fetched,
+        unless fetches_blobs sends the scan to the tarball.
+        """
+        tree_sha, files, truncated = await async_github.fetch_repo_tree(repo_url, client)
+        if truncated:
+            scan['mode'] = 'archive'
+            async for item in self.aiter_archive(repo_url, scan):
+                yield item
+            return
+
+        owner, repo = parse_repo_url(repo_url)
+        repository, diff, known = await sync_to_async(self.load_index)(owner, repo, files)
+
+        missing = defaultdict(list)
+        for path, sha in files.items():
+            if sha not in known:
+                missing[sha].append(path)
+        if not fetches_blobs(repository, missing):
+            scan['mode'] = 'archive'
+            async for item in self.aiter_archive(repo_url, scan):
+                yield item
+            await sync_to_async(update_index)(repository, diff, tree_sha)
+            scan.update(**diff.stats())
+            return
+
+        for path, sha in files.items():
+            if sha in known:
+                yield path, known[sha]
+        try:
+            async for sha, data in client.iter_blobs(owner, repo, list(missing)):
+                result = await self.analyze_file(missing[sha][0], data.decode('utf-8', errors='replace'))
+                await sync_to_async(store_blob_analysis)(sha, result)
+                for path in missing[sha]:
+                    yield path, result
+        except httpx.HTTPError as e:
+            raise ValueError(f"Error fetching repository blobs: {e}")
+
+        await sync_to_async(update_index)(repository, diff, tree_sha)
+        scan.update(files=len(files), analyzed=len(missing), **diff.stats())
+
+    def load_index(self, owner, repo, files):
+        repository = get_repository(owner, repo)
+        return repository, diff_tree(repository, files), load_blob_analyses(files.values())
+
+    async def aiter_archive(self, repo_url, scan):
+        """
+        GithubRepoAnalysisView.iter_archive with the tarball read in a worker thread.
+
+        The streaming tar reader is synchronous, so each member is pulled
+        off the socket by the synchronous client outside the event loop.
+        """
+        entries = iter_repo_archive(repo_url, get_github_client())
+        next_entry = sync_to_async(next, thread_sensitive=False)
+        files = analyzed = 0
+        while (entry := await next_entry(entries, None)) is not None:
+            filename, content, sha = entry
+            result = (await sync_to_async(load_blob_analyses)([sha])).get(sha)
+            if result is None:
+                result = await self.analyze_file(filename, content)
+                await sync_to_async(store_blob_analysis)(sha, result)
+                analyzed += 1
+            files += 1
+            yield filename, result
+        scan.update(files=files, analyzed=analyzed)
+
+    async def aiter_listing(self, repo_url, client, scan):
+        """
+        GithubRepoAnalysisView.iter_listing over the async client.
+        """
+        files = await async_github.fetch_repo_files(repo_url, client)
+        known = await sync_to_async(load_blob_analyses)([file['sha'] for file in files])
+
+        missing = {}
+        for file in files:
+            if file['sha'] in known:
+                yield file['name'], known[file['sha']]
+            else:
+                missing[file['download_url']] = file
+        try:
+            async for url, text in client.iter_downloads(list(missing)):
+                file = missing[url]
+                result = await self.analyze_file(file['name'], text)
+                await sync_to_async(store_blob_analysis)(file['sha'], result)
+                yield file['name'], result
+        except httpx.HTTPError as e:
+            raise ValueError(f"Error fetching repository contents: {e}")
+
+        scan.update(files=len(files), analyzed=len(missing))
 
 
 class DatasetCheckView(APIView):
@@ -252,115 +817,151 @@ class DatasetCheckView(APIView):
         if not file:
             return Response({'error': 'No file uploaded.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        if is_truthy(request.data.get('async')):
+            job = submit_job(AnalysisJob.KIND_DATASET, {'path': save_upload(file), 'name': file.name})
+            return Response(job_payload(request, job), status=status.HTTP_202_ACCEPTED)
+
         try:
-            df = pd.read_csv(file)
-            numeric_features = df.select_dtypes(include=[np.number])
-            if numeric_features.empty:
-                return Response({'error': 'Dataset does not contain numeric features.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            features = numeric_features.values
-
-            iso_forest_data = self.detect_anomalies_with_iso_forest(features)
-            svm_data = self.detect_anomalies_with_svm(features)
-            cluster_graph = self.perform_clustering(features)
-
-            return Response({
-                **iso_forest_data,
-                **svm_data,
-                'cluster_graph': cluster_graph,
-            })
-
-        except pd.errors.EmptyDataError:
-            return Response({'error': 'Uploaded file is empty. Please upload a non-empty CSV file.'}, status=status.HTTP_400_BAD_REQUEST)
-        except pd.errors.ParserError:
-            return Response({'error': 'Error parsing the file. Ensure it is a valid CSV format.'}, status=status.HTTP_400_BAD_REQUEST)
+            if timings_requested(request):
+                with collect_timings() as timings:
+                    result = self.analyze_dataset(file)
+                return Response({**result, 'timings': timings.as_dict()})
+            return Response(self.analyze_dataset(file))
+        except DatasetError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': f'An unexpected error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def detect_anomalies_with_iso_forest(self, features):
-        model = IsolationForest(contamination=0.1)
+    def analyze_dataset(self, file, progress=None, name=None):
+        """
+        Run every dataset detector over an uploaded CSV, Parquet, Arrow or .npy file (or path).
+        """
+        progress = progress or (lambda message: None)
+        progress('Reading dataset')
+        with stage('dataset.ingest'):
+            sample = load_dataset(file, name=name)
+        features = sample.features
+
+        detector_results, stage_timings = run_dataset_stages(self, features, sample.row_indices, progress)
+
+        return {
+            'total_rows': sample.total_rows,
+            'analyzed_rows': len(features),
+            'sampled': sample.sampled,
+            'numeric_columns': sample.columns,
+            **detector_results,
+            'stage_timings': stage_timings,
+        }
+
+    def detect_anomalies_with_iso_forest(self, features, row_indices=None):
+        model, variant = make_iso_forest(len(features))
         model.fit(features)
         predictions = model.predict(features)
         anomalies = np.where(predictions == -1)[0]
-        explanations = [f'Anomaly detected at index {i}' for i in anomalies]
+        reported = row_indices[anomalies] if row_indices is not None else anomalies
+        explanations = [f'Anomaly detected at index {i}' for i in reported]
 
-        shap_data = self.explain_anomalies_with_shap(model, features)
+        shap_data = self.explain_anomalies_with_shap(model, features, anomalies)
 
         return {
+            'iso_forest_model': variant,
             'num_iso_forest_anomalies': len(anomalies),
-            'iso_forest_anomalies': anomalies.tolist(),
+            'iso_forest_anomalies': reported.tolist(),
             'iso_forest_explanations': explanations,
             'iso_forest_graph': self.generate_anomaly_graph(features, anomalies, 'Isolation Forest'),
             **shap_data
         }
 
-    def explain_anomalies_with_shap(self, model, features):
-        explainer = shap.KernelExplainer(lambda x: model.predict(x), features)
-        shap_values = explainer.shap_values(features)
+    @stage('dataset.shap')
+    def explain_anomalies_with_shap(self, model, features, anomalies=None):
+        """
+        Explain the flagged anomalies (plus a sample of normal rows) with SHAP.
 
-        plt.figure()
-        shap.summary_plot(shap_values, features, plot_type="bar", show=False)
+        TreeExplainer computes exact values for the fitted IsolationForest in
+        polynomial time; KernelExplainer over a k-means summarized background
+        is only used if the tree path is unavailable. Rows are explained in
+        chunks until the configured time budget runs out.
+        """
+        options = {**DEFAULT_SHAP, **getattr(settings, 'CODECHECKER_SHAP', {})}
+        rows = self.select_rows_to_explain(len(features), anomalies, options)
 
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        buf.seek(0)
-        img_str = base64.b64encode(buf.getvalue()).decode('utf-8')
-        buf.close()
-        plt.close()
+        try:
+            explainer = shap.TreeExplainer(model)
+            method = 'tree'
+            background_size = None
+        except Exception as e:
+            logger.info("TreeExplainer unavailable (%s); falling back to KernelExplainer", e)
+            background = features
+            if len(features) > options['BACKGROUND_CLUSTERS']:
+                background = shap.kmeans(features, options['BACKGROUND_CLUSTERS'])
+            explainer = shap.KernelExplainer(model.decision_function, background)
+            method = 'kernel'
+            background_size = min(len(features), options['BACKGROUND_CLUSTERS'])
+
+        started = time.perf_counter()
+        explained = []
+        for start in range(0, len(rows), options['CHUNK_ROWS']):
+            if explained and time.perf_counter() - started > options['TIME_BUDGET']:
+                break
+            chunk = rows[start:start + options['CHUNK_ROWS']]
+            explained.append((chunk, np.asarray(explainer.shap_values(features[chunk]))))
+
+        explained_rows = np.concatenate([chunk for chunk, _ in explained])
+        shap_values = np.concatenate([values for _, values in explained])
+
+        mean_abs = np.abs(shap_values).reshape(-1, features.shape[1]).mean(axis=0)
+        shap_summary_plot = register_chart('shap_summary', {
+            'feature_names': [f'Feature {index}' for index in range(features.shape[1])],
+            'mean_abs': np.round(mean_abs, 6).tolist(),
+        })
 
         return {
-            'shap_summary_plot': img_str
+            'shap_summary_plot': shap_summary_plot,
+            'shap_method': method,
+            'shap_background_size': background_size,
+            'shap_explained_rows': len(explained_rows),
+            'shap_truncated': len(explained_rows) < len(rows),
+            'shap_seconds': round(time.perf_counter() - started, 3),
         }
 
-    def detect_anomalies_with_svm(self, features):
-        model = OneClassSVM(nu=0.1, kernel="rbf", gamma=0.1)
+    def select_rows_to_explain(self, num_rows, anomalies, options):
+        """
+        Indices of the anomalies (capped) followed by a fixed-seed sample of the other rows.
+        """
+        anomalies = np.asarray(anomalies if anomalies is not None else [], dtype=np.int64)
+        anomalies = anomalies[:options['MAX_ANOMALIES']]
+
+        rng = np.random.default_rng(0)
+        others = np.setdiff1d(np.arange(num_rows), anomalies, assume_unique=True)
+        sample_size = min(len(others), options['SAMPLE_ROWS'])
+        sample = np.sort(rng.choice(others, size=sample_size, replace=False)) if sample_size else others[:0]
+
+        return np.concatenate([anomalies, sample])
+
+    def detect_anomalies_with_svm(self, features, row_indices=None):
+        model, variant = make_svm(len(features))
         model.fit(features)
         predictions = model.predict(features)
         anomalies = np.where(predictions == -1)[0]
-        explanations = [f'Anomaly detected at index {i}' for i in anomalies]
+        reported = row_indices[anomalies] if row_indices is not None else anomalies
+        explanations = [f'Anomaly detected at index {i}' for i in reported]
 
         return {
+            'svm_model': variant,
             'num_svm_anomalies': len(anomalies),
-            'svm_anomalies': anomalies.tolist(),
+            'svm_anomalies': reported.tolist(),
             'svm_explanations': explanations,
             'svm_graph': self.generate_anomaly_graph(features, anomalies, 'One-Class SVM')
         }
 
     def perform_clustering(self, features):
-        model = KMeans(n_clusters=3)
+        model, variant = make_kmeans(len(features))
         cluster_labels = model.fit_predict(features)
 
-        plt.figure(figsize=(10, 6))
-        scatter = plt.scatter(features[:, 0], features[:, 1], c=cluster_labels, cmap='viridis')
-        plt.colorbar(scatter, label='Cluster Label')
-        plt.title('KMeans Clustering')
-        plt.xlabel('Feature 1')
-        plt.ylabel('Feature 2')
-
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        buf.seek(0)
-        img_str = base64.b64encode(buf.getvalue()).decode('utf-8')
-        buf.close()
-        plt.close()
-
-        return img_str
+        return {
+            'clustering_model': variant,
+            'cluster_graph': register_chart('clusters', cluster_chart_data(features, cluster_labels)),
+        }
 
     def generate_anomaly_graph(self, features, anomalies, model_name):
-        plt.figure(figsize=(10, 6))
-        plt.scatter(range(len(features)), features[:, 0], c='blue', label='Normal')
-        plt.scatter(anomalies, features[anomalies, 0], c='red', label='Anomaly')
-        plt.title(f'{model_name} Anomaly Detection')
-        plt.xlabel('Index')
-        plt.ylabel('Feature Value')
-        plt.legend()
-        plt.grid(True)
-
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        buf.seek(0)
-        img_str = base64.b64encode(buf.getvalue()).decode('utf-8')
-        buf.close()
-        plt.close()
-
-        return img_str
\ No newline at end of file
+        return register_chart('anomalies', anomaly_chart_data(features[:, 0], anomalies, model_name))
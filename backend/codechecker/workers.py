@@ -0,0 +1,14 @@
+import os
+
+
+def init_django_worker():
+    """
+    Prepare a freshly spawned worker process to use Django and the ORM.
+
+    Spawned workers unpickle their initializer before Django is set up,
+    so it lives in this module, which imports nothing that needs the app
+    registry.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'CodeCheckerAI.settings')
+    import django
+    django.setup()
@@ -142,13 +142,13 @@ const CodeCheckerForm = () => {
         {keywordChart && (
           <div className="keyword-chart">
             <h3 className="section-title">Keyword Distribution</h3>
-            <img src={`data:image/png;base64,${keywordChart}`} alt="Keyword Distribution Chart" />
+            <img src={`http://127.0.0.1:8000${keywordChart}`} alt="Keyword Distribution Chart" />
           </div>
         )}
         {codeCloneHeatmap && (
           <div className="code-clone-heatmap">
             <h3 className="section-title">Code Clones Heatmap</h3>
-            <img src={`data:image/png;base64,${codeCloneHeatmap}`} alt="Code Clones Heatmap" />
+            <img src={`http://127.0.0.1:8000${codeCloneHeatmap}`} alt="Code Clones Heatmap" />
           </div>
         )}
         {error && (
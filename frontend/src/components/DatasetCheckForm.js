@@ -86,28 +86,28 @@ const DatasetCheckForm = () => {
             {result.iso_forest_graph && (
               <div className="anomaly-graph">
                 <h3>Isolation Forest Anomaly Graph</h3>
-                <img src={`data:image/png;base64,${result.iso_forest_graph}`} alt="Isolation Forest Anomaly Graph" data-tip="Isolation Forest Anomaly Graph" />
+                <img src={`http://127.0.0.1:8000${result.iso_forest_graph}`} alt="Isolation Forest Anomaly Graph" data-tip="Isolation Forest Anomaly Graph" />
                 <Tooltip />
               </div>
             )}
             {result.svm_graph && (
               <div className="anomaly-graph">
                 <h3>One-Class SVM Anomaly Graph</h3>
-                <img src={`data:image/png;base64,${result.svm_graph}`} alt="One-Class SVM Anomaly Graph" data-tip="One-Class SVM Anomaly Graph" />
+                <img src={`http://127.0.0.1:8000${result.svm_graph}`} alt="One-Class SVM Anomaly Graph" data-tip="One-Class SVM Anomaly Graph" />
                 <Tooltip />
               </div>
             )}
             {result.cluster_graph && (
               <div className="cluster-graph">
                 <h3>KMeans Clustering</h3>
-                <img src={`data:image/png;base64,${result.cluster_graph}`} alt="KMeans Clustering" data-tip="KMeans Clustering" />
+                <img src={`http://127.0.0.1:8000${result.cluster_graph}`} alt="KMeans Clustering" data-tip="KMeans Clustering" />
                 <Tooltip />
               </div>
             )}
 {result.shap_summary_plot && (
   <div className="shap-results">
     <h3>SHAP Summary Plot</h3>
-    <img src={`data:image/png;base64,${result.shap_summary_plot}`} alt="SHAP Summary Plot" data-tip="SHAP Summary Plot" />
+    <img src={`http://127.0.0.1:8000${result.shap_summary_plot}`} alt="SHAP Summary Plot" data-tip="SHAP Summary Plot" />
     <Tooltip />
   </div>
 )}
@@ -65,6 +65,7 @@ const GithubRepoChecker = () => {
             result.security_vulnerabilities.map((vulnerability, index) => (
               <div key={index} className="vulnerability">
                 <p><strong>Vulnerability:</strong> {vulnerability.issue}</p>
+                <p><strong>Location:</strong> {vulnerability.file}:{vulnerability.line}:{vulnerability.column}</p>
                 <p><strong>Description:</strong> {vulnerability.description}</p>
                 <p><strong>Severity:</strong> {vulnerability.severity}</p>
               </div>
@@ -76,7 +77,7 @@ const GithubRepoChecker = () => {
           {result.commit_chart && (
             <div className="commit-chart">
               <h3 className="section-title">Commits per Day:</h3>
-              <img src={`data:image/png;base64,${result.commit_chart}`} alt="Commits per Day Chart" />
+              <img src={`http://127.0.0.1:8000${result.commit_chart}`} alt="Commits per Day Chart" />
             </div>
           )}
         </div>